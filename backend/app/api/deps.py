@@ -7,6 +7,8 @@ from sqlalchemy import select
 from app.config import get_settings
 from app.db.database import get_db
 from app.db.models import User
+from app.models.user import AuthPrincipal
+from app.services.principal_cache import principal_cache
 
 settings = get_settings()
 security = HTTPBearer(auto_error=False)
@@ -15,7 +17,7 @@ security = HTTPBearer(auto_error=False)
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-) -> User:
+) -> AuthPrincipal:
     if credentials is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -42,22 +44,31 @@ async def get_current_user(
             detail="Invalid token"
         )
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
 
-    if user is None:
+    result = await db.execute(
+        select(User.id, User.email, User.name, User.avatar_url, User.created_at)
+        .where(User.id == user_id)
+    )
+    row = result.first()
+
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
 
-    return user
+    principal = AuthPrincipal.model_validate(row)
+    principal_cache.set(principal)
+    return principal
 
 
 async def get_current_user_optional(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-) -> User | None:
+) -> AuthPrincipal | None:
     if credentials is None:
         return None
 
@@ -6,16 +6,15 @@ for streaming agent responses to the frontend.
 
 from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
-from openai import AsyncOpenAI
 from app.config import get_settings
-import json
+from app.services.agui_events import create_event
+from app.services.conversation_context import pack_messages
+from app.services.llm_gateway import LLMUnavailableError, llm_gateway
 import uuid
-import time
-from typing import AsyncGenerator, Any, Optional
+from typing import AsyncGenerator, Optional
 
 router = APIRouter()
 settings = get_settings()
-client = AsyncOpenAI(api_key=settings.openai_api_key)
 
 SYSTEM_PROMPT = """You are TripMate AI, an expert travel planning assistant. Your role is to help users plan their perfect trip by understanding their preferences and providing personalized recommendations.
 
@@ -41,20 +40,11 @@ RESPONSE FORMAT:
 - Offer alternatives when appropriate"""
 
 
-def create_event(event_type: str, **kwargs) -> str:
-    """Create an AG-UI formatted event."""
-    event = {
-        "type": event_type,
-        "timestamp": int(time.time() * 1000),
-        **kwargs
-    }
-    return f"data: {json.dumps(event)}\n\n"
-
-
 async def stream_agent_response(
     messages: list,
     thread_id: str,
-    run_id: str
+    run_id: str,
+    user_id: Optional[str] = None
 ) -> AsyncGenerator[str, None]:
     """Stream AG-UI events from the OpenAI agent."""
 
@@ -65,14 +55,17 @@ async def stream_agent_response(
         run_id=run_id
     )
 
-    # Prepare messages for OpenAI
-    openai_messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-
-    for msg in messages[-10:]:  # Keep last 10 messages for context
-        role = msg.get("role", "user")
-        content = msg.get("content", "")
-        if role in ["user", "assistant"] and content:
-            openai_messages.append({"role": role, "content": content})
+    # Prepare messages for OpenAI: recent turns packed into the prompt token budget
+    conversation = [
+        {"role": msg.get("role"), "content": msg.get("content")}
+        for msg in messages[-settings.chat_history_window:]
+        if msg.get("role") in ["user", "assistant"] and msg.get("content")
+    ]
+    if conversation and conversation[-1]["role"] == "user":
+        latest = conversation.pop()["content"]
+        openai_messages = pack_messages(SYSTEM_PROMPT, latest, history=conversation)
+    else:
+        openai_messages = [{"role": "system", "content": SYSTEM_PROMPT}] + conversation
 
     try:
         # Create message ID for this response
@@ -86,12 +79,12 @@ async def stream_agent_response(
         )
 
         # Stream from OpenAI
-        stream = await client.chat.completions.create(
+        stream = llm_gateway.stream_chat_completion(
+            user_id=user_id,
             model="gpt-4o-mini",
             messages=openai_messages,
             temperature=0.7,
-            max_tokens=2000,
-            stream=True
+            max_tokens=2000
         )
 
         full_content = ""
@@ -120,6 +113,14 @@ async def stream_agent_response(
             run_id=run_id
         )
 
+    except LLMUnavailableError as e:
+        yield create_event(
+            "RUN_ERROR",
+            message=str(e),
+            code="RATE_LIMITED",
+            retry_after=e.retry_after
+        )
+
     except Exception as e:
         # Emit RUN_ERROR event
         yield create_event(
@@ -146,7 +147,12 @@ async def agent_endpoint(request: Request):
     run_id = f"run_{uuid.uuid4().hex[:8]}"
 
     return StreamingResponse(
-        stream_agent_response(messages, thread_id, run_id),
+        stream_agent_response(
+            messages,
+            thread_id,
+            run_id,
+            user_id=request.client.host if request.client else None
+        ),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -195,6 +201,8 @@ async def agent_info():
                         "interests": {"type": "array", "items": {"type": "string"}},
                         "budget": {"type": "string", "enum": ["budget", "mid-range", "luxury"]},
                         "climate": {"type": "string"},
+                        "month": {"type": "integer", "minimum": 1, "maximum": 12},
+                        "country": {"type": "string"},
                         "count": {"type": "integer", "default": 5}
                     }
                 }
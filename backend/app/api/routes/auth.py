@@ -11,9 +11,10 @@ from typing import Optional
 
 from app.db.database import get_db
 from app.db.models import User
-from app.models.user import UserCreate, UserLogin, UserResponse, Token
+from app.models.user import AuthPrincipal, UserCreate, UserLogin, UserResponse, Token
 from app.config import get_settings
 from app.api.deps import get_current_user
+from app.services.principal_cache import principal_cache
 
 router = APIRouter()
 settings = get_settings()
@@ -51,6 +52,11 @@ def verify_password(password: str, hashed: str) -> bool:
         return False
 
 
+def user_claims(user: User) -> dict:
+    """Identity carried in the token so clients need not call /me for it."""
+    return {"sub": user.id, "email": user.email, "name": user.name}
+
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
@@ -80,7 +86,7 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     await db.refresh(user)
 
     # Create token
-    access_token = create_access_token({"sub": user.id})
+    access_token = create_access_token(user_claims(user))
     return Token(access_token=access_token)
 
 
@@ -95,12 +101,12 @@ async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
             detail="Invalid credentials"
         )
 
-    access_token = create_access_token({"sub": user.id})
+    access_token = create_access_token(user_claims(user))
     return Token(access_token=access_token)
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: AuthPrincipal = Depends(get_current_user)):
     return current_user
 
 
@@ -180,7 +186,8 @@ async def google_auth(auth_request: GoogleAuthRequest, db: AsyncSession = Depend
         user.name = google_user.name or user.name
         user.avatar_url = google_user.picture or user.avatar_url
         await db.commit()
-        access_token = create_access_token({"sub": user.id})
+        principal_cache.invalidate(user.id)
+        access_token = create_access_token(user_claims(user))
         return Token(access_token=access_token)
 
     # Check if user exists with this email (registered with password)
@@ -195,7 +202,8 @@ async def google_auth(auth_request: GoogleAuthRequest, db: AsyncSession = Depend
         if not existing_user.name:
             existing_user.name = google_user.name
         await db.commit()
-        access_token = create_access_token({"sub": existing_user.id})
+        principal_cache.invalidate(existing_user.id)
+        access_token = create_access_token(user_claims(existing_user))
         return Token(access_token=access_token)
 
     # Create new user with Google OAuth
@@ -211,5 +219,5 @@ async def google_auth(auth_request: GoogleAuthRequest, db: AsyncSession = Depend
     await db.commit()
     await db.refresh(new_user)
 
-    access_token = create_access_token({"sub": new_user.id})
+    access_token = create_access_token(user_claims(new_user))
     return Token(access_token=access_token)
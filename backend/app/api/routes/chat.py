@@ -1,13 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from typing import List, Literal, Optional
+from datetime import datetime, timezone
 
 from app.db.database import get_db
-from app.db.models import User, ChatSession, ChatMessage
-from app.models.chat import ChatRequest, ChatResponse, ChatSessionResponse, ChatMessageResponse
+from app.db.models import ChatSession, ChatMessage, generate_uuid
+from app.models.chat import ChatRequest, ChatResponse, ChatSessionResponse, ChatSessionSummary, ChatMessageResponse
+from app.models.user import AuthPrincipal
 from app.api.deps import get_current_user
 from app.services.agent_service import process_chat_message
+from app.services.chat_history import get_recent_history, history_cache, turn_history
+from app.services.chat_outbox import build_turn, chat_outbox
+from app.services.chat_sessions import session_messages, session_summary_columns
+from app.services.conversation_context import load_summary, summary_refresher
+from app.utils.pagination import after_cursor, page_response, page_size, parse_fields
 
 router = APIRouter()
 
@@ -15,84 +22,129 @@ router = APIRouter()
 @router.post("", response_model=ChatResponse)
 async def send_message(
     request: ChatRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get or create session
+    user_id = current_user.id
+    # Explicit timestamps keep turn order stable within a second
+    user_created_at = datetime.now(timezone.utc)
+
+    # Read phase: resolve the session and load model context
     if request.session_id:
         result = await db.execute(
-            select(ChatSession).where(
+            select(ChatSession.id).where(
                 ChatSession.id == request.session_id,
-                ChatSession.user_id == current_user.id
+                ChatSession.user_id == user_id
             )
         )
-        session = result.scalar_one_or_none()
-        if not session:
+        session_id = result.scalar_one_or_none()
+        if not session_id:
             raise HTTPException(status_code=404, detail="Chat session not found")
+        # Only the running summary and the messages it does not cover yet are used as model context
+        summary, covered = await load_summary(db, session_id)
+        history = await get_recent_history(db, session_id, after=covered)
+        new_session = False
     else:
-        session = ChatSession(user_id=current_user.id)
-        db.add(session)
-        await db.commit()
-        await db.refresh(session)
-
-    # Save user message
-    user_message = ChatMessage(
-        session_id=session.id,
-        role="user",
-        content=request.message
-    )
-    db.add(user_message)
-    await db.commit()
+        session_id = generate_uuid()
+        history = []
+        summary = None
+        new_session = True
 
-    # Get chat history
-    result = await db.execute(
-        select(ChatMessage)
-        .where(ChatMessage.session_id == session.id)
-        .order_by(ChatMessage.created_at)
-    )
-    history = result.scalars().all()
+    # Release the connection before the model call; nothing is held open while waiting on it
+    await db.close()
 
-    # Process with AI
     ai_response = await process_chat_message(
         message=request.message,
-        history=[{"role": m.role, "content": m.content} for m in history],
-        trip_context=request.trip_context
+        history=history,
+        trip_context=request.trip_context,
+        user_id=user_id,
+        summary=summary
     )
 
-    # Save AI response
-    ai_message = ChatMessage(
-        session_id=session.id,
-        role="assistant",
-        content=ai_response["message"],
-        message_metadata=ai_response.get("metadata")
+    # Write phase: session (if new) and both messages in one transaction
+    turn = build_turn(
+        session_id=session_id,
+        user_id=user_id,
+        new_session=new_session,
+        user_content=request.message,
+        user_created_at=user_created_at,
+        assistant_content=ai_response["message"],
+        assistant_created_at=datetime.now(timezone.utc),
+        metadata=ai_response.get("metadata")
     )
-    db.add(ai_message)
-    await db.commit()
+    stored = await chat_outbox.save(turn)
+
+    if new_session:
+        history_cache.set(session_id, [])
+    history_cache.extend(session_id, turn_history(turn))
+    if stored:
+        # Fold turns that left the window into the summary, off the request path
+        summary_refresher.schedule(session_id, user_id)
 
     return ChatResponse(
         message=ai_response["message"],
-        session_id=session.id,
+        session_id=session_id,
         metadata=ai_response.get("metadata")
     )
 
 
-@router.get("/sessions", response_model=List[ChatSessionResponse])
+@router.get("/sessions", response_model=List[ChatSessionSummary])
 async def list_sessions(
-    current_user: User = Depends(get_current_user),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated session fields to return"),
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(ChatSession)
+    """Chat sessions with message count, last message preview and last activity, newest first.
+
+    Paged when `limit` or `cursor` is given; messages are read from
+    /sessions/{id}/messages.
+    """
+    size = page_size(limit, cursor)
+    columns = session_summary_columns()
+    names = parse_fields(fields, list(columns))
+    selected = dict.fromkeys(["id", "created_at", *(names or columns)])
+    query = (
+        select(*(columns[name].label(name) for name in selected))
         .where(ChatSession.user_id == current_user.id)
-        .order_by(ChatSession.created_at.desc())
+        .order_by(ChatSession.created_at.desc(), ChatSession.id.desc())
+    )
+    if cursor:
+        query = query.where(after_cursor(ChatSession, ChatSession.created_at, cursor, descending=True))
+    if size is not None:
+        query = query.limit(size + 1)
+    result = await db.execute(query)
+    return page_response(result.all(), size, "created_at", ChatSessionSummary, names)
+
+
+@router.get("/sessions/{session_id}/messages", response_model=List[ChatMessageResponse])
+async def list_session_messages(
+    session_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    order: Literal["asc", "desc"] = "asc",
+    current_user: AuthPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """One page of a session's messages; `order=desc` pages back from the newest."""
+    size = page_size(limit, cursor, always=True)
+    descending = order == "desc"
+    criteria = (after_cursor(ChatMessage, ChatMessage.created_at, cursor, descending=descending),) if cursor else ()
+    order_by = (
+        (ChatMessage.created_at.desc(), ChatMessage.id.desc()) if descending
+        else (ChatMessage.created_at, ChatMessage.id)
+    )
+    messages = await session_messages(
+        db, session_id, current_user.id, *criteria, order_by=order_by, limit=size + 1
     )
-    return result.scalars().all()
+    return page_response(messages, size, "created_at", ChatMessageResponse)
 
 
 @router.get("/sessions/{session_id}", response_model=ChatSessionResponse)
 async def get_session(
     session_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
@@ -133,7 +185,7 @@ async def get_session(
 @router.delete("/sessions/{session_id}")
 async def delete_session(
     session_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
@@ -149,4 +201,5 @@ async def delete_session(
 
     await db.delete(session)
     await db.commit()
+    history_cache.invalidate(session_id)
     return {"message": "Session deleted successfully"}
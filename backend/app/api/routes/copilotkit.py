@@ -1,10 +1,9 @@
 from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
 import json
-from app.services.agent_service import TravelAgent
+from app.services.agent_service import travel_agent
 
 router = APIRouter()
-travel_agent = TravelAgent()
 
 
 @router.post("/copilotkit")
@@ -26,7 +25,11 @@ async def copilotkit_endpoint(request: Request):
                     break
 
             if user_message:
-                response = await travel_agent.process(user_message, messages)
+                response = await travel_agent.process(
+                    user_message,
+                    messages,
+                    user_id=request.client.host if request.client else None
+                )
 
                 # Stream response in CopilotKit format
                 yield f"data: {json.dumps({'type': 'textMessageStart', 'id': 'msg-1'})}\n\n"
@@ -0,0 +1,36 @@
+"""Destination recommendations."""
+from fastapi import APIRouter, Depends, HTTPException
+from typing import List
+
+from app.config import get_settings
+from app.models.trip import DestinationPreferences, DestinationRecommendation
+from app.models.user import AuthPrincipal
+from app.api.deps import get_current_user
+from app.services.agent_service import generate_destination_recommendations, phrase_match_reasons
+from app.services.destination_catalog import destination_catalog
+
+router = APIRouter()
+settings = get_settings()
+
+
+@router.post("/recommendations", response_model=List[DestinationRecommendation])
+async def recommend_destinations(
+    preferences: DestinationPreferences,
+    current_user: AuthPrincipal = Depends(get_current_user)
+):
+    """Destinations matching the preferences, best match first.
+
+    Served from the bundled catalog with deterministic scores; the model only
+    phrases the match reasons. Countries the catalog does not cover fall back
+    to model-generated recommendations.
+    """
+    recommendations = destination_catalog.recommend(preferences)
+    if recommendations:
+        if settings.destination_llm_reasons:
+            recommendations = await phrase_match_reasons(recommendations, preferences, user_id=current_user.id)
+        return recommendations
+
+    recommendations = await generate_destination_recommendations(preferences, user_id=current_user.id)
+    if recommendations is None:
+        raise HTTPException(status_code=502, detail="Could not generate recommendations")
+    return recommendations
@@ -1,146 +1,401 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from pydantic import ValidationError
+from typing import List, Optional
+import asyncio
+import uuid
 
 from app.db.database import get_db
-from app.db.models import User, Trip, Itinerary
-from app.models.itinerary import ItineraryCreate, ItineraryResponse
+from app.db.models import Itinerary
+from app.models.itinerary import (
+    DayRegenerateRequest,
+    ItineraryCreate,
+    ItineraryDiffResponse,
+    ItineraryPatchOperation,
+    ItineraryResponse,
+    ItineraryVersionResponse,
+    ItineraryVersionSummary,
+)
+from app.models.job import JobResponse
+from app.models.user import AuthPrincipal
 from app.api.deps import get_current_user
-from app.services.agent_service import generate_itinerary_for_trip
+from app.services.agent_service import generate_itinerary_day
+from app.services.agui_events import stream_itinerary_events
+from app.services.itinerary_edits import apply_operations, replace_day, replace_time_slot
+from app.services.itinerary_history import document_at, list_versions, save_itinerary_version
+from app.services.itinerary_service import generate_and_save_itinerary, snapshot_trip
+from app.services.job_queue import job_queue
+from app.services.trip_access import get_trip_for_user, owned_child, owned_children
+from app.utils.etag import etag_matches, version_etag
+from app.utils.json_patch import JsonPatchError, JsonPatchTestFailed, diff_documents
 
 router = APIRouter()
 
 
-@router.get("/{trip_id}/itinerary", response_model=ItineraryResponse)
+def itinerary_response(itinerary: Itinerary) -> JSONResponse:
+    """Itinerary with its ETag; `data` is not re-validated, it was validated when written."""
+    content = {
+        "id": itinerary.id,
+        "trip_id": itinerary.trip_id,
+        "data": itinerary.data,
+        "version": itinerary.version,
+        "created_at": itinerary.created_at,
+        "updated_at": itinerary.updated_at,
+    }
+    return JSONResponse(
+        content=jsonable_encoder(content),
+        headers={"ETag": version_etag(itinerary.id, itinerary.version), "Cache-Control": "private, no-cache"}
+    )
+
+
+def check_if_match(itinerary: Itinerary, if_match: Optional[str]) -> None:
+    """412 unless If-Match is absent or matches the itinerary's current ETag."""
+    etag = version_etag(itinerary.id, itinerary.version)
+    if if_match and not etag_matches(if_match, etag, weak=False):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Itinerary has been modified",
+            headers={"ETag": etag}
+        )
+
+
+def modified_error(if_match: Optional[str]) -> HTTPException:
+    """Another write won the compare-and-set between our read and update."""
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED if if_match else status.HTTP_409_CONFLICT,
+        detail="Itinerary has been modified"
+    )
+
+
+async def enqueue_itinerary_job(
+    trip_id: str,
+    user_id: str,
+    preferences: Optional[dict] = None,
+    regenerate: bool = False
+) -> JSONResponse:
+    """Queue itinerary generation and answer 202 Accepted with the job."""
+    try:
+        job = await job_queue.submit(
+            "itinerary",
+            user_id=user_id,
+            trip_id=trip_id,
+            params={"preferences": preferences, "regenerate": regenerate}
+        )
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many itinerary generations in progress, please retry shortly",
+            headers={"Retry-After": "5"},
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=jsonable_encoder(JobResponse.model_validate(job)),
+        headers={"Location": f"/api/jobs/{job.id}"},
+    )
+
+
+@router.get(
+    "/{trip_id}/itinerary",
+    response_model=ItineraryResponse,
+    responses={304: {"description": "Itinerary unchanged since the given ETag"}}
+)
 async def get_itinerary(
     trip_id: str,
-    current_user: User = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Verify trip ownership
-    result = await db.execute(
-        select(Trip).where(Trip.id == trip_id, Trip.user_id == current_user.id)
-    )
-    trip = result.scalar_one_or_none()
-    if not trip:
-        raise HTTPException(status_code=404, detail="Trip not found")
+    if if_none_match:
+        # Revalidation reads only (id, version), never the document
+        rows = await owned_children(
+            db, Itinerary, trip_id, current_user.id, columns=(Itinerary.id, Itinerary.version)
+        )
+        if not rows:
+            raise HTTPException(status_code=404, detail="Itinerary not found")
+        etag = version_etag(*rows[0])
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
-    # Get itinerary
-    result = await db.execute(
-        select(Itinerary).where(Itinerary.trip_id == trip_id)
+    itinerary = await owned_child(
+        db, Itinerary, trip_id, current_user.id, detail="Itinerary not found"
     )
-    itinerary = result.scalar_one_or_none()
-
-    if not itinerary:
-        raise HTTPException(status_code=404, detail="Itinerary not found")
+    return itinerary_response(itinerary)
 
-    return itinerary
 
-
-@router.post("/{trip_id}/itinerary", response_model=ItineraryResponse)
+@router.post(
+    "/{trip_id}/itinerary",
+    response_model=ItineraryResponse,
+    responses={202: {"model": JobResponse}}
+)
 async def create_itinerary(
     trip_id: str,
-    current_user: User = Depends(get_current_user),
+    background: bool = False,
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Verify trip ownership
+    trip = await get_trip_for_user(trip_id, current_user.id, db)
+
+    if background:
+        return await enqueue_itinerary_job(trip_id, current_user.id)
+
+    # Don't hold a pooled connection while the model runs; the save opens its own session
+    trip = snapshot_trip(trip)
+    await db.close()
+
+    # Generate itinerary using AI (concurrent identical requests share one run)
+    itinerary_id = await generate_and_save_itinerary(trip)
+
     result = await db.execute(
-        select(Trip).where(Trip.id == trip_id, Trip.user_id == current_user.id)
+        select(Itinerary).where(Itinerary.id == itinerary_id)
     )
-    trip = result.scalar_one_or_none()
-    if not trip:
-        raise HTTPException(status_code=404, detail="Trip not found")
+    return itinerary_response(result.scalar_one())
 
-    # Generate itinerary using AI
-    itinerary_data = await generate_itinerary_for_trip(trip)
 
-    # Check if itinerary exists
-    result = await db.execute(
-        select(Itinerary).where(Itinerary.trip_id == trip_id)
+@router.put(
+    "/{trip_id}/itinerary",
+    response_model=ItineraryResponse,
+    responses={412: {"description": "If-Match does not match the current ETag"}}
+)
+async def update_itinerary(
+    trip_id: str,
+    itinerary_data: ItineraryCreate,
+    if_match: Optional[str] = Header(None),
+    current_user: AuthPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Replace the itinerary; with If-Match only if it still is the version the client saw."""
+    itinerary = await owned_child(
+        db, Itinerary, trip_id, current_user.id, detail="Itinerary not found"
     )
-    existing = result.scalar_one_or_none()
+    check_if_match(itinerary, if_match)
 
-    if existing:
-        existing.data = itinerary_data
-        existing.version += 1
-        itinerary = existing
-    else:
-        itinerary = Itinerary(
-            trip_id=trip_id,
-            data=itinerary_data
+    # Compare-and-set on version so a concurrent write between read and update is not lost
+    if not await save_itinerary_version(db, itinerary, itinerary_data.data.model_dump(), current_user.id):
+        raise modified_error(if_match)
+    await db.commit()
+    await db.refresh(itinerary)
+    return itinerary_response(itinerary)
+
+
+@router.patch(
+    "/{trip_id}/itinerary",
+    response_model=ItineraryResponse,
+    responses={
+        409: {"description": "A test operation failed or the itinerary changed concurrently"},
+        412: {"description": "If-Match does not match the current ETag"},
+    }
+)
+async def patch_itinerary(
+    trip_id: str,
+    operations: List[ItineraryPatchOperation],
+    if_match: Optional[str] = Header(None),
+    current_user: AuthPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Edit the itinerary with RFC 6902 JSON Patch and/or move_activity, edit_activity
+    and add_day operations, applied in order and atomically."""
+    itinerary = await owned_child(
+        db, Itinerary, trip_id, current_user.id, detail="Itinerary not found"
+    )
+    check_if_match(itinerary, if_match)
+
+    try:
+        data, patch = apply_operations(itinerary.data, operations)
+    except JsonPatchTestFailed as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except JsonPatchError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=jsonable_encoder(e.errors(include_url=False, include_context=False))
         )
-        db.add(itinerary)
 
+    if not patch:
+        return itinerary_response(itinerary)
+    if not await save_itinerary_version(db, itinerary, data, current_user.id, patch=patch):
+        raise modified_error(if_match)
     await db.commit()
     await db.refresh(itinerary)
-    return itinerary
+    return itinerary_response(itinerary)
 
 
-@router.put("/{trip_id}/itinerary", response_model=ItineraryResponse)
-async def update_itinerary(
+@router.get("/{trip_id}/itinerary/versions", response_model=List[ItineraryVersionSummary])
+async def get_itinerary_versions(
     trip_id: str,
-    itinerary_data: ItineraryCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Verify trip ownership
-    result = await db.execute(
-        select(Trip).where(Trip.id == trip_id, Trip.user_id == current_user.id)
+    """Recorded versions of the itinerary, newest first."""
+    rows = await owned_children(db, Itinerary, trip_id, current_user.id, columns=(Itinerary.id,))
+    if not rows:
+        raise HTTPException(status_code=404, detail="Itinerary not found")
+    return await list_versions(db, rows[0][0])
+
+
+@router.get("/{trip_id}/itinerary/versions/{version}", response_model=ItineraryVersionResponse)
+async def get_itinerary_version(
+    trip_id: str,
+    version: int,
+    current_user: AuthPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    itinerary = await owned_child(
+        db, Itinerary, trip_id, current_user.id, detail="Itinerary not found"
     )
-    trip = result.scalar_one_or_none()
-    if not trip:
-        raise HTTPException(status_code=404, detail="Trip not found")
+    data = await document_at(db, itinerary, version)
+    return ItineraryVersionResponse(itinerary_id=itinerary.id, version=version, data=data)
 
-    # Get itinerary
-    result = await db.execute(
-        select(Itinerary).where(Itinerary.trip_id == trip_id)
+
+@router.get("/{trip_id}/itinerary/diff", response_model=ItineraryDiffResponse)
+async def diff_itinerary_versions(
+    trip_id: str,
+    from_version: int = Query(..., alias="from"),
+    to_version: Optional[int] = Query(None, alias="to", description="Defaults to the current version"),
+    current_user: AuthPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    itinerary = await owned_child(
+        db, Itinerary, trip_id, current_user.id, detail="Itinerary not found"
+    )
+    to_version = itinerary.version if to_version is None else to_version
+    patch = diff_documents(
+        await document_at(db, itinerary, from_version),
+        await document_at(db, itinerary, to_version)
     )
-    itinerary = result.scalar_one_or_none()
+    return ItineraryDiffResponse(from_version=from_version, to_version=to_version, patch=patch)
 
-    if not itinerary:
-        raise HTTPException(status_code=404, detail="Itinerary not found")
 
-    itinerary.data = itinerary_data.data.model_dump()
-    itinerary.version += 1
+@router.post(
+    "/{trip_id}/itinerary/versions/{version}/restore",
+    response_model=ItineraryResponse,
+    responses={412: {"description": "If-Match does not match the current ETag"}}
+)
+async def restore_itinerary_version(
+    trip_id: str,
+    version: int,
+    if_match: Optional[str] = Header(None),
+    current_user: AuthPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Make an earlier version current again, as a new version."""
+    itinerary = await owned_child(
+        db, Itinerary, trip_id, current_user.id, detail="Itinerary not found"
+    )
+    check_if_match(itinerary, if_match)
+
+    data = await document_at(db, itinerary, version)
+    if not await save_itinerary_version(db, itinerary, data, current_user.id):
+        raise modified_error(if_match)
     await db.commit()
     await db.refresh(itinerary)
-    return itinerary
+    return itinerary_response(itinerary)
 
 
-@router.post("/{trip_id}/itinerary/regenerate", response_model=ItineraryResponse)
+@router.post(
+    "/{trip_id}/itinerary/regenerate",
+    response_model=ItineraryResponse,
+    responses={202: {"model": JobResponse}}
+)
 async def regenerate_itinerary(
     trip_id: str,
     preferences: dict = None,
-    current_user: User = Depends(get_current_user),
+    background: bool = False,
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    # Verify trip ownership
+    trip = await get_trip_for_user(trip_id, current_user.id, db)
+
+    if background:
+        return await enqueue_itinerary_job(trip_id, current_user.id, preferences, regenerate=True)
+
+    # Don't hold a pooled connection while the model runs; the save opens its own session
+    trip = snapshot_trip(trip)
+    await db.close()
+
+    # Regenerate itinerary with new preferences, never from the completion cache
+    # (concurrent identical requests still share one run)
+    itinerary_id = await generate_and_save_itinerary(trip, preferences, regenerate=True)
+
     result = await db.execute(
-        select(Trip).where(Trip.id == trip_id, Trip.user_id == current_user.id)
+        select(Itinerary).where(Itinerary.id == itinerary_id)
     )
-    trip = result.scalar_one_or_none()
-    if not trip:
-        raise HTTPException(status_code=404, detail="Trip not found")
+    return itinerary_response(result.scalar_one())
 
-    # Regenerate itinerary with new preferences
-    itinerary_data = await generate_itinerary_for_trip(trip, preferences)
 
-    # Update existing itinerary
-    result = await db.execute(
-        select(Itinerary).where(Itinerary.trip_id == trip_id)
+@router.post(
+    "/{trip_id}/itinerary/days/{day_number}/regenerate",
+    response_model=ItineraryResponse,
+    responses={409: {"description": "The itinerary changed while the day was regenerated"}}
+)
+async def regenerate_itinerary_day(
+    trip_id: str,
+    day_number: int,
+    request: Optional[DayRegenerateRequest] = None,
+    current_user: AuthPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Regenerate one day, or one time slot of it, and splice it into the itinerary."""
+    request = request or DayRegenerateRequest()
+    trip = snapshot_trip(await get_trip_for_user(trip_id, current_user.id, db))
+    itinerary = await owned_child(
+        db, Itinerary, trip_id, current_user.id, detail="Itinerary not found"
+    )
+    day_index = next(
+        (index for index, day in enumerate(itinerary.data.get("days", [])) if day.get("day_number") == day_number),
+        None
     )
-    itinerary = result.scalar_one_or_none()
+    if day_index is None:
+        raise HTTPException(status_code=404, detail="Day not found")
 
-    if itinerary:
-        itinerary.data = itinerary_data
-        itinerary.version += 1
+    # Don't hold a pooled connection while the model runs
+    await db.close()
+
+    time_slot = request.time_slot.value if request.time_slot else None
+    generated = await generate_itinerary_day(trip, itinerary.data, day_index, time_slot, request.preferences)
+    if generated is None:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Could not regenerate the day, please retry")
+
+    if time_slot:
+        data = replace_time_slot(itinerary.data, day_index, time_slot, generated)
     else:
-        itinerary = Itinerary(
-            trip_id=trip_id,
-            data=itinerary_data
+        data = replace_day(itinerary.data, day_index, generated)
+    if not await save_itinerary_version(db, itinerary, data, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Itinerary was modified while regenerating, please retry"
         )
-        db.add(itinerary)
-
     await db.commit()
-    await db.refresh(itinerary)
-    return itinerary
+
+    result = await db.execute(
+        select(Itinerary).where(Itinerary.id == itinerary.id)
+    )
+    return itinerary_response(result.scalar_one())
+
+
+@router.post("/{trip_id}/itinerary/stream")
+async def stream_itinerary(
+    trip_id: str,
+    preferences: dict = None,
+    current_user: AuthPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Generate an itinerary and stream each day as an AG-UI STATE_DELTA event."""
+    trip = await get_trip_for_user(trip_id, current_user.id, db)
+
+    thread_id = f"thread_{uuid.uuid4().hex[:8]}"
+    run_id = f"run_{uuid.uuid4().hex[:8]}"
+
+    return StreamingResponse(
+        stream_itinerary_events(snapshot_trip(trip), preferences, thread_id, run_id),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        }
+    )
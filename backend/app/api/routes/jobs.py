@@ -0,0 +1,91 @@
+"""Status and progress endpoints for background jobs."""
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import AsyncGenerator
+import asyncio
+
+from app.db.database import AsyncSessionLocal, get_db
+from app.db.models import GenerationJob
+from app.models.job import JobEvent, JobResponse
+from app.models.user import AuthPrincipal
+from app.api.deps import get_current_user
+from app.services.job_queue import TERMINAL_STATUSES, job_event, job_queue
+
+router = APIRouter()
+
+# Seconds between keep-alives; also how often the DB is re-polled in case the
+# job runs in another worker process
+KEEPALIVE_SECONDS = 15
+
+
+async def get_job_for_user(job_id: str, user_id: str, db: AsyncSession) -> GenerationJob:
+    result = await db.execute(
+        select(GenerationJob).where(GenerationJob.id == job_id, GenerationJob.user_id == user_id)
+    )
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def format_sse(event: JobEvent) -> str:
+    return f"event: progress\ndata: {event.model_dump_json()}\n\n"
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    current_user: AuthPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    return await get_job_for_user(job_id, current_user.id, db)
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    current_user: AuthPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stream job progress as server-sent events until the job finishes."""
+    # Subscribe before reading the current state so no transition is missed
+    queue = job_queue.subscribe(job_id)
+    try:
+        job = await get_job_for_user(job_id, current_user.id, db)
+    except HTTPException:
+        job_queue.unsubscribe(job_id, queue)
+        raise
+    initial = job_event(job)
+
+    async def generate() -> AsyncGenerator[str, None]:
+        last = initial
+        try:
+            yield format_sse(last)
+            while last.status not in TERMINAL_STATUSES:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    async with AsyncSessionLocal() as session:
+                        result = await session.execute(
+                            select(GenerationJob).where(GenerationJob.id == job_id)
+                        )
+                        event = job_event(result.scalar_one())
+                    if event == last:
+                        yield ": keepalive\n\n"
+                        continue
+                last = event
+                yield format_sse(event)
+        finally:
+            job_queue.unsubscribe(job_id, queue)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        }
+    )
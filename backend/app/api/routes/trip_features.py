@@ -1,86 +1,78 @@
 """API routes for trip packing lists and todos."""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import Optional, List
 from datetime import datetime
 
+from app.config import get_settings
 from app.db.database import get_db
-from app.db.models import Trip, PackingItem, TripTodo
+from app.db.models import PackingItem, TripTodo
+from app.models.trip_features import (
+    PackingItemBulkRequest,
+    PackingItemBulkResponse,
+    PackingItemBulkUpdate,
+    PackingItemCreate,
+    PackingItemResponse,
+    PackingItemUpdate,
+    TodoBulkRequest,
+    TodoBulkResponse,
+    TodoCreate,
+    TodoResponse,
+    TodoUpdate,
+)
 from app.api.deps import get_current_user
+from app.services.trip_access import insert_for_owned_trip, owned_child, owned_children
+from app.services.trip_features_service import (
+    apply_updates,
+    delete_rows,
+    insert_packing_items,
+    insert_todos,
+    todo_completion_updates,
+)
+from app.utils.pagination import after_cursor, column_fields, columns_for, page_response, page_size, parse_fields
 
 router = APIRouter()
+settings = get_settings()
 
 
-# Pydantic models for packing items
-class PackingItemCreate(BaseModel):
-    category: str
-    item: str
-    quantity: int = 1
-    notes: Optional[str] = None
-
-
-class PackingItemUpdate(BaseModel):
-    category: Optional[str] = None
-    item: Optional[str] = None
-    packed: Optional[bool] = None
-    quantity: Optional[int] = None
-    notes: Optional[str] = None
-
-
-class PackingItemResponse(BaseModel):
-    id: str
-    trip_id: str
-    category: str
-    item: str
-    packed: bool
-    quantity: int
-    notes: Optional[str]
-
-    class Config:
-        from_attributes = True
-
-
-# Pydantic models for todos
-class TodoCreate(BaseModel):
-    title: str
-    description: Optional[str] = None
-    due_date: Optional[str] = None
-    priority: int = 0
-
-
-class TodoUpdate(BaseModel):
-    title: Optional[str] = None
-    description: Optional[str] = None
-    completed: Optional[bool] = None
-    due_date: Optional[str] = None
-    priority: Optional[int] = None
-
-
-class TodoResponse(BaseModel):
-    id: str
-    trip_id: str
-    title: str
-    description: Optional[str]
-    completed: bool
-    due_date: Optional[str]
-    completed_at: Optional[datetime]
-    priority: int
-
-    class Config:
-        from_attributes = True
-
-
-# Helper to verify trip ownership
-async def get_trip_for_user(trip_id: str, user_id: str, db: AsyncSession) -> Trip:
-    result = await db.execute(
-        select(Trip).where(Trip.id == trip_id, Trip.user_id == user_id)
+async def list_trip_children(
+    db: AsyncSession,
+    model,
+    response_model,
+    trip_id: str,
+    user_id: str,
+    limit: Optional[int],
+    cursor: Optional[str],
+    fields: Optional[str],
+    order_by
+):
+    """Packing items or todos of an owned trip.
+
+    Unpaged lists keep their display order; pages (`limit`/`cursor`) follow
+    (created_at, id) so they can be resumed from a cursor.
+    """
+    size = page_size(limit, cursor)
+    names = parse_fields(fields, column_fields(model, response_model))
+    criteria = ()
+    if size is not None:
+        order_by = (model.created_at, model.id)
+        if cursor:
+            criteria = (after_cursor(model, model.created_at, cursor),)
+    columns = columns_for(model, names, model.created_at) if names else None
+
+    rows = await owned_children(
+        db, model, trip_id, user_id, *criteria,
+        columns=columns,
+        order_by=order_by,
+        limit=size + 1 if size is not None else None
     )
-    trip = result.scalar_one_or_none()
-    if not trip:
-        raise HTTPException(status_code=404, detail="Trip not found")
-    return trip
+    if columns is not None:
+        keys = [column.key for column in columns]
+        rows = [dict(zip(keys, row)) for row in rows]
+    return page_response(rows, size, "created_at", response_model, names)
 
 
 # ============ PACKING ITEMS ENDPOINTS ============
@@ -88,18 +80,17 @@ async def get_trip_for_user(trip_id: str, user_id: str, db: AsyncSession) -> Tri
 @router.get("/{trip_id}/packing", response_model=List[PackingItemResponse])
 async def get_packing_items(
     trip_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user=Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all packing items for a trip."""
-    await get_trip_for_user(trip_id, current_user.id, db)
-
-    result = await db.execute(
-        select(PackingItem)
-        .where(PackingItem.trip_id == trip_id)
-        .order_by(PackingItem.category, PackingItem.item)
+    """Get packing items for a trip."""
+    return await list_trip_children(
+        db, PackingItem, PackingItemResponse, trip_id, current_user.id, limit, cursor, fields,
+        order_by=(PackingItem.category, PackingItem.item)
     )
-    return result.scalars().all()
 
 
 @router.post("/{trip_id}/packing", response_model=PackingItemResponse)
@@ -110,21 +101,66 @@ async def create_packing_item(
     db: AsyncSession = Depends(get_db)
 ):
     """Add a packing item to a trip."""
-    await get_trip_for_user(trip_id, current_user.id, db)
-
-    item = PackingItem(
-        trip_id=trip_id,
-        category=item_data.category,
-        item=item_data.item,
-        quantity=item_data.quantity,
-        notes=item_data.notes,
-    )
-    db.add(item)
-    await db.commit()
-    await db.refresh(item)
+    try:
+        item = await insert_for_owned_trip(db, PackingItem, trip_id, current_user.id, item_data.model_dump())
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Packing item already exists")
     return item
 
 
+@router.patch("/{trip_id}/packing", response_model=List[PackingItemResponse])
+async def patch_packing_items(
+    trip_id: str,
+    changes: List[PackingItemBulkUpdate],
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Apply a batch of packing item diffs and return only the rows that changed.
+
+    Clients debounce checklist edits and send them here together; later diffs
+    for the same item win. Rows are written with one UPDATE per distinct set
+    of changed fields.
+    """
+    if len(changes) > settings.packing_patch_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.packing_patch_max_items} changes per request",
+        )
+    diffs = {}
+    for change in changes:
+        diffs.setdefault(change.id, {}).update(change.model_dump(exclude_unset=True, exclude={"id"}))
+
+    items = {
+        item.id: item
+        for item in await owned_children(db, PackingItem, trip_id, current_user.id, PackingItem.id.in_(diffs))
+    }
+    if len(items) != len(diffs):
+        raise HTTPException(status_code=404, detail="Packing item not found")
+
+    updates = []
+    for item_id, diff in diffs.items():
+        diff = {key: value for key, value in diff.items() if getattr(items[item_id], key) != value}
+        if diff:
+            updates.append({"id": item_id, **diff})
+
+    try:
+        await apply_updates(db, PackingItem, updates)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Packing item already exists")
+
+    changed = []
+    for change in updates:
+        item = items[change["id"]]
+        for key, value in change.items():
+            set_committed_value(item, key, value)
+        changed.append(item)
+    return changed
+
+
 @router.put("/{trip_id}/packing/{item_id}", response_model=PackingItemResponse)
 async def update_packing_item(
     trip_id: str,
@@ -134,23 +170,20 @@ async def update_packing_item(
     db: AsyncSession = Depends(get_db)
 ):
     """Update a packing item."""
-    await get_trip_for_user(trip_id, current_user.id, db)
-
-    result = await db.execute(
-        select(PackingItem).where(
-            PackingItem.id == item_id,
-            PackingItem.trip_id == trip_id
-        )
+    item = await owned_child(
+        db, PackingItem, trip_id, current_user.id, PackingItem.id == item_id,
+        detail="Packing item not found"
     )
-    item = result.scalar_one_or_none()
-    if not item:
-        raise HTTPException(status_code=404, detail="Packing item not found")
 
     update_data = item_data.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(item, key, value)
 
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Packing item already exists")
     await db.refresh(item)
     return item
 
@@ -163,17 +196,10 @@ async def delete_packing_item(
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a packing item."""
-    await get_trip_for_user(trip_id, current_user.id, db)
-
-    result = await db.execute(
-        select(PackingItem).where(
-            PackingItem.id == item_id,
-            PackingItem.trip_id == trip_id
-        )
+    item = await owned_child(
+        db, PackingItem, trip_id, current_user.id, PackingItem.id == item_id,
+        detail="Packing item not found"
     )
-    item = result.scalar_one_or_none()
-    if not item:
-        raise HTTPException(status_code=404, detail="Packing item not found")
 
     await db.delete(item)
     await db.commit()
@@ -187,8 +213,6 @@ async def generate_packing_list(
     db: AsyncSession = Depends(get_db)
 ):
     """Generate AI-suggested packing items based on trip details."""
-    trip = await get_trip_for_user(trip_id, current_user.id, db)
-
     # Default packing suggestions by category
     default_items = {
         "Documents": [
@@ -227,33 +251,59 @@ async def generate_packing_list(
         ],
     }
 
-    created_items = []
-    for category, items in default_items.items():
-        for item_name in items:
-            # Check if item already exists
-            existing = await db.execute(
-                select(PackingItem).where(
-                    PackingItem.trip_id == trip_id,
-                    PackingItem.category == category,
-                    PackingItem.item == item_name
-                )
-            )
-            if existing.scalar_one_or_none():
-                continue
+    created_items = await insert_packing_items(db, trip_id, current_user.id, [
+        {"category": category, "item": item_name}
+        for category, items in default_items.items()
+        for item_name in items
+    ])
+    await db.commit()
+    return created_items
 
-            item = PackingItem(
-                trip_id=trip_id,
-                category=category,
-                item=item_name,
-            )
-            db.add(item)
-            created_items.append(item)
 
-    await db.commit()
-    for item in created_items:
-        await db.refresh(item)
+@router.post("/{trip_id}/packing/bulk", response_model=PackingItemBulkResponse)
+async def bulk_packing_items(
+    trip_id: str,
+    request: PackingItemBulkRequest,
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create, update and delete packing items in one request.
+
+    Created items that duplicate an existing (category, item) pair are skipped.
+    """
+    updates = [change.model_dump(exclude_unset=True) for change in request.update]
+    referenced = {change["id"] for change in updates} | set(request.delete)
+    if referenced or not request.create:
+        found = await owned_children(
+            db, PackingItem, trip_id, current_user.id, PackingItem.id.in_(referenced),
+            columns=(PackingItem.id,)
+        )
+        if len(found) != len(referenced):
+            raise HTTPException(status_code=404, detail="Packing item not found")
+
+    try:
+        created = []
+        if request.create:
+            created = await insert_packing_items(
+                db, trip_id, current_user.id, [item.model_dump() for item in request.create]
+            )
+        await apply_updates(db, PackingItem, updates)
+        await delete_rows(db, PackingItem, trip_id, request.delete)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Packing item already exists")
+
+    updated = []
+    if updates:
+        result = await db.execute(
+            select(PackingItem)
+            .where(PackingItem.id.in_({change["id"] for change in updates}))
+            .order_by(PackingItem.category, PackingItem.item)
+        )
+        updated = result.scalars().all()
 
-    return created_items
+    return PackingItemBulkResponse(created=created, updated=updated, deleted=sorted(set(request.delete)))
 
 
 # ============ TODOS ENDPOINTS ============
@@ -261,18 +311,17 @@ async def generate_packing_list(
 @router.get("/{trip_id}/todos", response_model=List[TodoResponse])
 async def get_todos(
     trip_id: str,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user=Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all todos for a trip."""
-    await get_trip_for_user(trip_id, current_user.id, db)
-
-    result = await db.execute(
-        select(TripTodo)
-        .where(TripTodo.trip_id == trip_id)
-        .order_by(TripTodo.priority.desc(), TripTodo.due_date, TripTodo.created_at)
+    """Get todos for a trip."""
+    return await list_trip_children(
+        db, TripTodo, TodoResponse, trip_id, current_user.id, limit, cursor, fields,
+        order_by=(TripTodo.priority.desc(), TripTodo.due_date, TripTodo.created_at)
     )
-    return result.scalars().all()
 
 
 @router.post("/{trip_id}/todos", response_model=TodoResponse)
@@ -283,18 +332,12 @@ async def create_todo(
     db: AsyncSession = Depends(get_db)
 ):
     """Add a todo to a trip."""
-    await get_trip_for_user(trip_id, current_user.id, db)
-
-    todo = TripTodo(
-        trip_id=trip_id,
-        title=todo_data.title,
-        description=todo_data.description,
-        due_date=todo_data.due_date,
-        priority=todo_data.priority,
-    )
-    db.add(todo)
-    await db.commit()
-    await db.refresh(todo)
+    try:
+        todo = await insert_for_owned_trip(db, TripTodo, trip_id, current_user.id, todo_data.model_dump())
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Todo already exists")
     return todo
 
 
@@ -307,17 +350,10 @@ async def update_todo(
     db: AsyncSession = Depends(get_db)
 ):
     """Update a todo."""
-    await get_trip_for_user(trip_id, current_user.id, db)
-
-    result = await db.execute(
-        select(TripTodo).where(
-            TripTodo.id == todo_id,
-            TripTodo.trip_id == trip_id
-        )
+    todo = await owned_child(
+        db, TripTodo, trip_id, current_user.id, TripTodo.id == todo_id,
+        detail="Todo not found"
     )
-    todo = result.scalar_one_or_none()
-    if not todo:
-        raise HTTPException(status_code=404, detail="Todo not found")
 
     update_data = todo_data.model_dump(exclude_unset=True)
 
@@ -331,7 +367,11 @@ async def update_todo(
     for key, value in update_data.items():
         setattr(todo, key, value)
 
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Todo already exists")
     await db.refresh(todo)
     return todo
 
@@ -344,17 +384,10 @@ async def delete_todo(
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a todo."""
-    await get_trip_for_user(trip_id, current_user.id, db)
-
-    result = await db.execute(
-        select(TripTodo).where(
-            TripTodo.id == todo_id,
-            TripTodo.trip_id == trip_id
-        )
+    todo = await owned_child(
+        db, TripTodo, trip_id, current_user.id, TripTodo.id == todo_id,
+        detail="Todo not found"
     )
-    todo = result.scalar_one_or_none()
-    if not todo:
-        raise HTTPException(status_code=404, detail="Todo not found")
 
     await db.delete(todo)
     await db.commit()
@@ -368,8 +401,6 @@ async def generate_todos(
     db: AsyncSession = Depends(get_db)
 ):
     """Generate default pre-trip todos."""
-    trip = await get_trip_for_user(trip_id, current_user.id, db)
-
     default_todos = [
         {"title": "Book flights", "priority": 2},
         {"title": "Reserve hotels/accommodation", "priority": 2},
@@ -383,28 +414,53 @@ async def generate_todos(
         {"title": "Arrange airport transportation", "priority": 1},
     ]
 
-    created_todos = []
-    for todo_data in default_todos:
-        # Check if todo already exists
-        existing = await db.execute(
-            select(TripTodo).where(
-                TripTodo.trip_id == trip_id,
-                TripTodo.title == todo_data["title"]
-            )
-        )
-        if existing.scalar_one_or_none():
-            continue
+    created_todos = await insert_todos(db, trip_id, current_user.id, default_todos)
+    await db.commit()
+    return created_todos
 
-        todo = TripTodo(
-            trip_id=trip_id,
-            title=todo_data["title"],
-            priority=todo_data["priority"],
-        )
-        db.add(todo)
-        created_todos.append(todo)
 
-    await db.commit()
-    for todo in created_todos:
-        await db.refresh(todo)
+@router.post("/{trip_id}/todos/bulk", response_model=TodoBulkResponse)
+async def bulk_todos(
+    trip_id: str,
+    request: TodoBulkRequest,
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create, update and delete todos in one request.
+
+    Created todos whose title already exists on the trip are skipped.
+    """
+    updates = [change.model_dump(exclude_unset=True) for change in request.update]
+    referenced = {change["id"] for change in updates} | set(request.delete)
+    completed = {}
+    if referenced or not request.create:
+        completed = dict(await owned_children(
+            db, TripTodo, trip_id, current_user.id, TripTodo.id.in_(referenced),
+            columns=(TripTodo.id, TripTodo.completed)
+        ))
+        if len(completed) != len(referenced):
+            raise HTTPException(status_code=404, detail="Todo not found")
+
+    try:
+        created = []
+        if request.create:
+            created = await insert_todos(
+                db, trip_id, current_user.id, [todo.model_dump() for todo in request.create]
+            )
+        await apply_updates(db, TripTodo, todo_completion_updates(updates, completed))
+        await delete_rows(db, TripTodo, trip_id, request.delete)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Todo already exists")
+
+    updated = []
+    if updates:
+        result = await db.execute(
+            select(TripTodo)
+            .where(TripTodo.id.in_({change["id"] for change in updates}))
+            .order_by(TripTodo.priority.desc(), TripTodo.due_date, TripTodo.created_at)
+        )
+        updated = result.scalars().all()
 
-    return created_todos
+    return TodoBulkResponse(created=created, updated=updated, deleted=sorted(set(request.delete)))
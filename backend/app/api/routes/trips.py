@@ -1,34 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import List
+from sqlalchemy.orm import selectinload
+from typing import Dict, List, Optional
 import uuid
 
 from app.db.database import get_db
-from app.db.models import User, Trip
-from app.models.trip import TripCreate, TripUpdate, TripResponse
+from app.db.models import Trip
+from app.models.itinerary import ItineraryResponse
+from app.models.trip import BudgetEstimateResponse, TripCreate, TripFullResponse, TripUpdate, TripResponse
+from app.models.trip_features import PackingItemResponse, TodoResponse
+from app.models.user import AuthPrincipal
 from app.api.deps import get_current_user
+from app.utils.etag import etag_for, etag_matches
+from app.utils.pagination import after_cursor, column_fields, columns_for, page_response, page_size, parse_fields
 
 router = APIRouter()
 
 
+# ?include= names (and short aliases) mapped to Trip relationships
+TRIP_INCLUDES: Dict[str, str] = {
+    "itinerary": "itinerary",
+    "budget": "budget_estimate",
+    "budget_estimate": "budget_estimate",
+    "packing": "packing_items",
+    "packing_items": "packing_items",
+    "todos": "todos",
+}
+
+
 @router.get("", response_model=List[TripResponse])
 async def list_trips(
-    current_user: User = Depends(get_current_user),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated trip fields to return"),
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(Trip)
-        .where(Trip.user_id == current_user.id)
-        .order_by(Trip.updated_at.desc())
+    """Trips, most recently updated first; paged when `limit` or `cursor` is given."""
+    size = page_size(limit, cursor)
+    names = parse_fields(fields, column_fields(Trip, TripResponse))
+    query = select(*columns_for(Trip, names, Trip.updated_at)) if names else select(Trip)
+    query = (
+        query.where(Trip.user_id == current_user.id)
+        .order_by(Trip.updated_at.desc(), Trip.id.desc())
     )
-    return result.scalars().all()
+    if cursor:
+        query = query.where(after_cursor(Trip, Trip.updated_at, cursor, descending=True))
+    if size is not None:
+        query = query.limit(size + 1)
+    result = await db.execute(query)
+    rows = result.all() if names else result.scalars().all()
+    return page_response(rows, size, "updated_at", TripResponse, names)
 
 
 @router.post("", response_model=TripResponse)
 async def create_trip(
     trip_data: TripCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     trip = Trip(
@@ -44,7 +75,7 @@ async def create_trip(
 @router.get("/{trip_id}", response_model=TripResponse)
 async def get_trip(
     trip_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
@@ -58,11 +89,73 @@ async def get_trip(
     return trip
 
 
+@router.get(
+    "/{trip_id}/full",
+    response_model=TripFullResponse,
+    response_model_exclude_unset=True,
+    responses={304: {"description": "Dashboard unchanged since the given ETag"}}
+)
+async def get_trip_full(
+    trip_id: str,
+    request: Request,
+    include: Optional[str] = Query(
+        None, description="Comma-separated subset of itinerary,budget,packing,todos (default: all)"
+    ),
+    current_user: AuthPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Trip dashboard: the trip plus its itinerary, budget, packing items and todos in one request."""
+    if include:
+        requested = [name.strip() for name in include.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in TRIP_INCLUDES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown include: {', '.join(unknown)}")
+        relations = {TRIP_INCLUDES[name] for name in requested}
+    else:
+        relations = set(TRIP_INCLUDES.values())
+
+    result = await db.execute(
+        select(Trip)
+        .where(Trip.id == trip_id, Trip.user_id == current_user.id)
+        .options(*(selectinload(getattr(Trip, relation)) for relation in sorted(relations)))
+    )
+    trip = result.scalar_one_or_none()
+
+    if not trip:
+        raise HTTPException(status_code=404, detail="Trip not found")
+
+    payload = TripResponse.model_validate(trip).model_dump()
+    if "itinerary" in relations:
+        payload["itinerary"] = trip.itinerary and ItineraryResponse.model_validate(trip.itinerary)
+    if "budget_estimate" in relations:
+        payload["budget_estimate"] = trip.budget_estimate and BudgetEstimateResponse.model_validate(trip.budget_estimate)
+    if "packing_items" in relations:
+        payload["packing_items"] = [
+            PackingItemResponse.model_validate(item)
+            for item in sorted(trip.packing_items, key=lambda item: (item.category, item.item))
+        ]
+    if "todos" in relations:
+        payload["todos"] = [
+            TodoResponse.model_validate(todo)
+            for todo in sorted(
+                trip.todos,
+                key=lambda todo: (-(todo.priority or 0), todo.due_date is not None, todo.due_date or "", todo.created_at)
+            )
+        ]
+
+    content = jsonable_encoder(payload)
+    etag = etag_for(content)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return JSONResponse(content=content, headers=headers)
+
+
 @router.put("/{trip_id}", response_model=TripResponse)
 async def update_trip(
     trip_id: str,
     trip_data: TripUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
@@ -85,7 +178,7 @@ async def update_trip(
 @router.delete("/{trip_id}")
 async def delete_trip(
     trip_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
@@ -104,7 +197,7 @@ async def delete_trip(
 @router.post("/{trip_id}/duplicate", response_model=TripResponse)
 async def duplicate_trip(
     trip_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
@@ -135,7 +228,7 @@ async def duplicate_trip(
 @router.post("/{trip_id}/share")
 async def share_trip(
     trip_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthPrincipal = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     result = await db.execute(
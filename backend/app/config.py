@@ -15,19 +15,92 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str = "sqlite+aiosqlite:///./tripmate.db"
+    db_echo: bool = False  # log every SQL statement (independent of debug)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_pre_ping: bool = True
+    db_pool_recycle_seconds: int = 1800
+    db_statement_cache_size: int = 100  # asyncpg prepared statements; 0 behind pgbouncer
+    db_statement_timeout_ms: int = 30000  # Postgres server-side; 0 disables
+    db_slow_query_ms: float = 200.0
+    # SQLite profile: WAL, one writer connection, a pool of read-only connections
+    sqlite_wal: bool = True
+    sqlite_read_pool_size: int = 8
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
 
     # JWT Auth
     jwt_secret_key: str = "your-secret-key-change-in-production"
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    auth_cache_ttl_seconds: int = 60  # resolved principals per user id; 0 disables
+    auth_cache_max_entries: int = 10000
 
     # OpenAI
     openai_api_key: str = ""
+    openai_base_url: str = ""  # e.g. http://localhost:9000/v1 for benchmarks/fake_llm.py
+
+    # LLM gateway (connection pool, concurrency, provider rate limits, retries)
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_timeout_seconds: float = 60.0
+    llm_max_concurrency: int = 32
+    llm_per_user_concurrency: int = 2
+    llm_structured_outputs: bool = True  # response_format=json_schema for JSON generation
+    llm_rpm_limit: int = 500  # 0 disables
+    llm_tpm_limit: int = 200000  # 0 disables
+    llm_max_retries: int = 5
+    llm_retry_deadline_seconds: float = 30.0
 
     # Google OAuth
     google_client_id: str = ""
     google_client_secret: str = ""
 
+    # Completion cache
+    completion_cache_enabled: bool = True
+    completion_cache_ttl_seconds: int = 3600
+    completion_cache_max_entries: int = 1000
+    completion_cache_max_bytes: int = 16 * 1024 * 1024
+    completion_cache_persistent: bool = False
+
+    # Chat history
+    chat_history_window: int = 10  # messages sent to the model as context
+    chat_history_cache_sessions: int = 0  # rolling windows cached in-process; 0 disables
+    context_token_budget: int = 3000  # system prompt + summary + history + new message
+    summary_refresh_every: int = 6  # unsummarized messages outside the window before refreshing
+    summary_max_tokens: int = 400
+    chat_outbox_path: str = "./chat_outbox.jsonl"  # base name; each process spools to chat_outbox.<pid>.jsonl
+    chat_outbox_retry_seconds: float = 5.0
+    chat_outbox_max_attempts: int = 20  # replays before a turn is moved to chat_outbox.dead.jsonl
+
+    # Itinerary generation
+    itinerary_day_max_tokens: int = 900  # per generated day (regeneration and fan-out chunks)
+    itinerary_chunk_days: int = 3  # longer trips: skeleton first, then chunks of this many days
+    itinerary_fanout_concurrency: int = 4  # chunks in flight per itinerary (llm_per_user_concurrency also applies)
+
+    # Destination recommendations
+    destination_catalog_path: str = ""  # empty: the bundled app/data/destinations.json
+    destination_llm_reasons: bool = True  # let the model phrase catalog match reasons
+
+    # Itinerary history
+    itinerary_snapshot_every: int = 10  # versions between full snapshots
+    itinerary_history_max_versions: int = 100  # oldest versions beyond this are compacted away; 0 keeps all
+
+    # List endpoints (keyset pages when ?limit= or ?cursor= is given)
+    list_page_size: int = 50
+    list_page_max: int = 200
+
+    # Packing checklist edits (PATCH /api/trips/{id}/packing)
+    packing_patch_max_items: int = 200  # diffs per request; larger batches are 413
+
+    # Background jobs
+    job_workers: int = 4
+    job_queue_max_size: int = 100
+    job_heartbeat_seconds: float = 15.0  # how often a worker marks its unfinished jobs alive
+    job_stale_seconds: float = 60.0  # unfinished jobs without a heartbeat this long are failed
+
     # Presales
     anonymous_query_limit: int = 5
 
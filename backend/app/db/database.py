@@ -1,28 +1,197 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
-from app.config import get_settings
+from typing import Any, Dict, List
+
+from sqlalchemy import UniqueConstraint, event, inspect, text
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql.elements import TextClause
+from app.config import Settings, get_settings
+from app.db.instrumentation import QueryStats, instrument_engine
 
 settings = get_settings()
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-    future=True
-)
 
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False
-)
+def is_sqlite_file(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def engine_options(settings: Settings, read_only: bool = False) -> Dict[str, Any]:
+    """Engine keyword arguments for the configured database backend.
+
+    With the SQLite WAL profile the writer engine holds a single connection,
+    so writes queue on pool checkout instead of failing with "database is
+    locked"; `read_only=True` builds the pool of query_only reader connections.
+    """
+    url = make_url(settings.database_url)
+    options: Dict[str, Any] = {"url": url, "echo": settings.db_echo, "future": True}
+    if url.get_backend_name() == "sqlite":
+        if settings.sqlite_wal and is_sqlite_file(url):
+            options.update(
+                poolclass=AsyncAdaptedQueuePool,
+                pool_size=settings.sqlite_read_pool_size if read_only else 1,
+                max_overflow=settings.db_max_overflow if read_only else 0,
+                pool_timeout=settings.db_pool_timeout_seconds,
+            )
+        return options
+
+    options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_recycle=settings.db_pool_recycle_seconds,
+    )
+    if url.get_driver_name() == "asyncpg":
+        # SQLAlchemy's own prepared statement cache plus asyncpg's
+        options["url"] = url.update_query_dict(
+            {"prepared_statement_cache_size": str(settings.db_statement_cache_size)}
+        )
+        connect_args: Dict[str, Any] = {"statement_cache_size": settings.db_statement_cache_size}
+        if settings.db_statement_timeout_ms:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout_ms)}
+        options["connect_args"] = connect_args
+    return options
+
+
+def sqlite_pragmas(settings: Settings, read_only: bool = False) -> List[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    elif settings.sqlite_wal:
+        pragmas += ["PRAGMA journal_mode=WAL", f"PRAGMA synchronous={settings.sqlite_synchronous}"]
+    return pragmas
+
+
+def apply_pragmas(engine: AsyncEngine, pragmas: List[str]) -> None:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def create_engines(settings: Settings):
+    """Writer engine plus the engine used for plain reads (the same one unless SQLite WAL is on)."""
+    writer = create_async_engine(**engine_options(settings))
+    url = make_url(settings.database_url)
+    if url.get_backend_name() != "sqlite":
+        return writer, writer
+
+    apply_pragmas(writer, sqlite_pragmas(settings))
+    if not (settings.sqlite_wal and is_sqlite_file(url)):
+        return writer, writer
+    reader = create_async_engine(**engine_options(settings, read_only=True))
+    apply_pragmas(reader, sqlite_pragmas(settings, read_only=True))
+    return writer, reader
+
+
+engine, read_engine = create_engines(settings)
+
+query_stats = QueryStats(slow_query_ms=settings.db_slow_query_ms)
+instrument_engine(engine.sync_engine, query_stats)
+if read_engine is not engine:
+    instrument_engine(read_engine.sync_engine, query_stats)
+
+
+def is_write(clause) -> bool:
+    if clause is None:
+        return False
+    if getattr(clause, "is_dml", False):
+        return True
+    if isinstance(clause, TextClause):
+        return not clause.text.lstrip().lower().startswith(("select", "with"))
+    return False
+
+
+class RoutingSession(Session):
+    """Sends reads to the reader pool and everything else to the writer.
+
+    Once a transaction has written, it stays on the writer so it reads its
+    own uncommitted changes.
+    """
+
+    writer: Engine
+    reader: Engine
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or is_write(clause) or self.info.get("wrote"):
+            self.info["wrote"] = True
+            return self.writer
+        return self.reader
+
+
+@event.listens_for(RoutingSession, "after_transaction_end", propagate=True)
+def _reset_routing(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("wrote", None)
+
+
+def session_factory(writer: AsyncEngine, reader: AsyncEngine) -> async_sessionmaker:
+    if reader is writer:
+        return async_sessionmaker(writer, class_=AsyncSession, expire_on_commit=False)
+    routing_class = type(
+        "BoundRoutingSession",
+        (RoutingSession,),
+        {"writer": writer.sync_engine, "reader": reader.sync_engine}
+    )
+    return async_sessionmaker(class_=AsyncSession, sync_session_class=routing_class, expire_on_commit=False)
+
+
+AsyncSessionLocal = session_factory(engine, read_engine)
 
 Base = declarative_base()
 
 
+def upgrade_schema(connection) -> None:
+    """Bring tables created by an older create_all up to the current models.
+
+    create_all only creates missing tables. This adds missing nullable
+    columns and, for each named unique constraint the table lacks, deletes
+    duplicate rows (keeping the lowest id) and creates a unique index. It is
+    idempotent and cheap once the schema is current.
+    """
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        name = preparer.quote(table.name)
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {name} ADD COLUMN {preparer.quote(column.name)} {column_type}"))
+
+        unique = {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+        unique |= {index["name"] for index in inspector.get_indexes(table.name) if index["unique"]}
+        for constraint in table.constraints:
+            if not isinstance(constraint, UniqueConstraint) or not constraint.name or constraint.name in unique:
+                continue
+            columns = ", ".join(preparer.quote(column.name) for column in constraint.columns)
+            connection.execute(text(
+                f"DELETE FROM {name} WHERE id NOT IN (SELECT MIN(id) FROM {name} GROUP BY {columns})"
+            ))
+            connection.execute(text(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {preparer.quote(constraint.name)} ON {name} ({columns})"
+            ))
+
+
 async def init_db():
     from app.db import models  # noqa
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+
+
+async def dispose_engines():
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
 
 
 async def get_db():
@@ -0,0 +1,88 @@
+"""Per-query timing and connection pool statistics.
+
+Statement durations are recorded with SQLAlchemy cursor events into a
+fixed-bucket histogram, and statements slower than `db_slow_query_ms` are
+logged. Both are exposed by the /health/db probe together with pool usage.
+"""
+from bisect import bisect_left
+from typing import Any, Dict, List
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in milliseconds; the last bucket is open-ended
+HISTOGRAM_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class QueryStats:
+    def __init__(self, slow_query_ms: float):
+        self.slow_query_ms = slow_query_ms
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow = 0
+        self.buckets: List[int] = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.buckets[bisect_left(HISTOGRAM_BUCKETS_MS, duration_ms)] += 1
+        if self.slow_query_ms and duration_ms >= self.slow_query_ms:
+            self.slow += 1
+            logger.warning("Slow query (%.1f ms): %s", duration_ms, " ".join(statement.split())[:500])
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{bound}ms" for bound in HISTOGRAM_BUCKETS_MS] + ["inf"]
+        return {
+            "count": self.count,
+            "slow": self.slow,
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "histogram": dict(zip(labels, self.buckets)),
+        }
+
+
+def instrument_engine(engine: Engine, stats: QueryStats) -> None:
+    """Time every statement executed on `engine` (pass `async_engine.sync_engine`)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        stats.record(statement, (time.perf_counter() - started) * 1000)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """Checked-out connections against the pool's capacity (size + overflow)."""
+    pool = engine.pool
+    status: Dict[str, Any] = {"class": type(pool).__name__}
+    if not hasattr(pool, "checkedout"):
+        return status
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    status.update({
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_in": pool.checkedin(),
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+    })
+    return status
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Text, JSON, Boolean
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Text, JSON, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
@@ -51,6 +51,11 @@ class Trip(Base):
     packing_items = relationship("PackingItem", back_populates="trip", cascade="all, delete-orphan")
     todos = relationship("TripTodo", back_populates="trip", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset pages of a user's trips, most recently updated first
+        Index("ix_trips_user_updated", "user_id", "updated_at", "id"),
+    )
+
 
 class Itinerary(Base):
     __tablename__ = "itineraries"
@@ -63,6 +68,27 @@ class Itinerary(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     trip = relationship("Trip", back_populates="itinerary")
+    versions = relationship("ItineraryVersion", back_populates="itinerary", cascade="all, delete-orphan")
+
+
+class ItineraryVersion(Base):
+    """Append-only itinerary history: the JSON Patch that produced each version,
+    plus a periodic full snapshot to rebuild versions from."""
+    __tablename__ = "itinerary_versions"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    itinerary_id = Column(String, ForeignKey("itineraries.id", ondelete="CASCADE"), nullable=False)
+    version = Column(Integer, nullable=False)
+    patch = Column(JSON(none_as_null=True), nullable=True)  # RFC 6902 operations from version - 1 to version
+    snapshot = Column(JSON(none_as_null=True), nullable=True)  # full document at this version
+    user_id = Column(String, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    itinerary = relationship("Itinerary", back_populates="versions")
+
+    __table_args__ = (
+        UniqueConstraint("itinerary_id", "version", name="uq_itinerary_versions_itinerary_version"),
+    )
 
 
 class ChatSession(Base):
@@ -76,6 +102,10 @@ class ChatSession(Base):
     user = relationship("User", back_populates="chat_sessions")
     messages = relationship("ChatMessage", back_populates="session", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_chat_sessions_user_created", "user_id", "created_at", "id"),
+    )
+
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
@@ -89,6 +119,25 @@ class ChatMessage(Base):
 
     session = relationship("ChatSession", back_populates="messages")
 
+    __table_args__ = (
+        # Serves "last N messages of a session" and keyset reads after a given message
+        Index("ix_chat_messages_session_created", "session_id", "created_at", "id"),
+    )
+
+
+class ChatSummary(Base):
+    """Running summary of the older part of a chat session."""
+    __tablename__ = "chat_summaries"
+
+    session_id = Column(String, ForeignKey("chat_sessions.id", ondelete="CASCADE"), primary_key=True)
+    summary = Column(Text, nullable=False)
+    message_count = Column(Integer, default=0)  # leading messages covered by the summary
+    # Key of the last covered message, so later messages are read with a keyset predicate
+    covered_until = Column(DateTime(timezone=True), nullable=True)
+    covered_message_id = Column(String, nullable=True)
+    token_count = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 
 class BudgetEstimate(Base):
     __tablename__ = "budget_estimates"
@@ -121,6 +170,11 @@ class PackingItem(Base):
 
     trip = relationship("Trip", back_populates="packing_items")
 
+    __table_args__ = (
+        UniqueConstraint("trip_id", "category", "item", name="uq_packing_items_trip_category_item"),
+        Index("ix_packing_items_trip_created", "trip_id", "created_at", "id"),
+    )
+
 
 class TripTodo(Base):
     """Pre-trip preparation tasks."""
@@ -137,3 +191,39 @@ class TripTodo(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     trip = relationship("Trip", back_populates="todos")
+
+    __table_args__ = (
+        UniqueConstraint("trip_id", "title", name="uq_trip_todos_trip_title"),
+        Index("ix_trip_todos_trip_created", "trip_id", "created_at", "id"),
+    )
+
+
+class GenerationJob(Base):
+    """Background job (e.g. itinerary generation) run by the in-process worker pool."""
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    trip_id = Column(String, ForeignKey("trips.id", ondelete="CASCADE"), nullable=True)
+    kind = Column(String(50), nullable=False)  # itinerary
+    status = Column(String(20), default="queued")  # queued, running, succeeded, failed
+    progress = Column(Integer, default=0)  # 0-100
+    message = Column(String(255), nullable=True)
+    params = Column(JSON, nullable=True)
+    result_id = Column(String, nullable=True)
+    error = Column(Text, nullable=True)
+    worker_id = Column(String(100), nullable=True)  # process whose in-memory queue holds the job
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # refreshed while that process is alive
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class CompletionCacheEntry(Base):
+    """Persistent tier of the LLM completion cache."""
+    __tablename__ = "completion_cache"
+
+    key = Column(String(64), primary_key=True)
+    value = Column(JSON, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,11 +1,23 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from contextlib import asynccontextmanager
+from sqlalchemy import text
+import time
 
 from app.config import get_settings
-from app.db.database import init_db
-from app.api.routes import auth, trips, itinerary, chat, copilotkit, agui, trip_features
+from app.db.database import dispose_engines, engine, init_db, query_stats, read_engine
+from app.db.instrumentation import pool_status
+from app.services.chat_outbox import chat_outbox
+from app.services.completion_cache import completion_cache
+from app.services.destination_catalog import destination_catalog
+from app.services.job_queue import job_queue
+from app.services.llm_gateway import LLMUnavailableError, llm_gateway
+from app.services.principal_cache import principal_cache
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.tokens import preload_encoding
+from app.api.routes import auth, trips, itinerary, chat, copilotkit, agui, trip_features, jobs, destinations
 
 settings = get_settings()
 
@@ -44,9 +56,16 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    destination_catalog.load()
+    await preload_encoding()
+    await job_queue.start()
+    await chat_outbox.start()
     yield
     # Shutdown
-    pass
+    await chat_outbox.stop()
+    await job_queue.stop()
+    await llm_gateway.aclose()
+    await dispose_engines()
 
 
 app = FastAPI(
@@ -66,14 +85,28 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cross-origin clients can only read response headers listed here
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable_handler(request: Request, exc: LLMUnavailableError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
+
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(trips.router, prefix="/api/trips", tags=["Trips"])
 app.include_router(itinerary.router, prefix="/api/trips", tags=["Itinerary"])
 app.include_router(trip_features.router, prefix="/api/trips", tags=["Trip Features"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
 app.include_router(chat.router, prefix="/api/chat", tags=["Chat"])
+app.include_router(destinations.router, prefix="/api/destinations", tags=["Destinations"])
 app.include_router(copilotkit.router, prefix="/api", tags=["CopilotKit"])
 app.include_router(agui.router, prefix="/api", tags=["AG-UI"])
 
@@ -85,4 +118,26 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "completion_cache": completion_cache.stats(),
+        "auth_cache": principal_cache.stats(),
+    }
+
+
+@app.get("/health/db")
+async def database_health_check():
+    """Round-trip latency, pool saturation and query timing for the database."""
+    started = time.perf_counter()
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        return JSONResponse(status_code=503, content={"status": "unavailable", "error": type(e).__name__})
+    return {
+        "status": "healthy",
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        "pool": pool_status(engine.sync_engine),
+        "read_pool": pool_status(read_engine.sync_engine) if read_engine is not engine else None,
+        "queries": query_stats.snapshot(),
+    }
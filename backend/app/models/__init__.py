@@ -1,11 +1,19 @@
-from app.models.user import UserCreate, UserResponse, UserLogin, Token
-from app.models.trip import TripCreate, TripUpdate, TripResponse
-from app.models.itinerary import ItineraryCreate, ItineraryResponse, Activity, Meal, ItineraryDay
-from app.models.chat import ChatMessageCreate, ChatMessageResponse, ChatSessionResponse
+from app.models.user import UserCreate, UserResponse, UserLogin, Token, AuthPrincipal
+from app.models.trip import (
+    TripCreate, TripUpdate, TripResponse, TripFullResponse, BudgetEstimateResponse,
+    DestinationPreferences, DestinationRecommendation,
+)
+from app.models.itinerary import ItineraryCreate, ItineraryResponse, ItineraryPatchOperation, Activity, Meal, ItineraryDay
+from app.models.chat import ChatMessageCreate, ChatMessageResponse, ChatSessionResponse, ChatSessionSummary
+from app.models.job import JobStatus, JobResponse, JobEvent
+from app.models.trip_features import PackingItemResponse, TodoResponse
 
 __all__ = [
-    "UserCreate", "UserResponse", "UserLogin", "Token",
-    "TripCreate", "TripUpdate", "TripResponse",
-    "ItineraryCreate", "ItineraryResponse", "Activity", "Meal", "ItineraryDay",
-    "ChatMessageCreate", "ChatMessageResponse", "ChatSessionResponse"
+    "UserCreate", "UserResponse", "UserLogin", "Token", "AuthPrincipal",
+    "TripCreate", "TripUpdate", "TripResponse", "TripFullResponse", "BudgetEstimateResponse",
+    "DestinationPreferences", "DestinationRecommendation",
+    "ItineraryCreate", "ItineraryResponse", "ItineraryPatchOperation", "Activity", "Meal", "ItineraryDay",
+    "ChatMessageCreate", "ChatMessageResponse", "ChatSessionResponse", "ChatSessionSummary",
+    "JobStatus", "JobResponse", "JobEvent",
+    "PackingItemResponse", "TodoResponse"
 ]
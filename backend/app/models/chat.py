@@ -31,6 +31,19 @@ class ChatSessionResponse(BaseModel):
         from_attributes = True
 
 
+class ChatSessionSummary(BaseModel):
+    id: str
+    user_id: str
+    trip_id: Optional[str] = None
+    created_at: datetime
+    message_count: int = 0
+    last_message_preview: Optional[str] = None
+    last_activity_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class ChatRequest(BaseModel):
     message: str
     session_id: Optional[str] = None
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Annotated, Any, Dict, Literal, Optional, List, Union
 from datetime import datetime
 from enum import Enum
 
@@ -91,3 +91,66 @@ class ItineraryResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class DayRegenerateRequest(BaseModel):
+    time_slot: Optional[TimeSlot] = None  # only replace this part of the day
+    preferences: Optional[dict] = None
+
+
+class ItineraryVersionSummary(BaseModel):
+    version: int
+    user_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+    snapshot: bool  # stored as a full document rather than only a patch
+
+    class Config:
+        from_attributes = True
+
+
+class ItineraryVersionResponse(BaseModel):
+    itinerary_id: str
+    version: int
+    data: Dict[str, Any]
+
+
+class ItineraryDiffResponse(BaseModel):
+    from_version: int
+    to_version: int
+    patch: List[Dict[str, Any]]  # RFC 6902 operations turning from_version into to_version
+
+
+# PATCH /itinerary operations: RFC 6902 JSON Patch plus itinerary-level shortcuts
+class JsonPatchOperation(BaseModel):
+    op: Literal["add", "remove", "replace", "move", "copy", "test"]
+    path: str
+    from_: Optional[str] = Field(None, alias="from")
+    value: Any = None
+
+    class Config:
+        populate_by_name = True
+
+
+class MoveActivity(BaseModel):
+    op: Literal["move_activity"]
+    activity_id: str
+    to_day: int  # day_number
+    to_index: Optional[int] = None  # position in the target day; appended when omitted
+    time_slot: Optional[TimeSlot] = None
+
+
+class EditActivity(BaseModel):
+    op: Literal["edit_activity"]
+    activity_id: str
+    changes: Dict[str, Any]
+
+
+class AddDay(BaseModel):
+    op: Literal["add_day"]
+    day: ItineraryDay
+
+
+ItineraryPatchOperation = Annotated[
+    Union[JsonPatchOperation, MoveActivity, EditActivity, AddDay],
+    Field(discriminator="op")
+]
@@ -0,0 +1,37 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from enum import Enum
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    trip_id: Optional[str] = None
+    status: JobStatus
+    progress: int
+    message: Optional[str] = None
+    result_id: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class JobEvent(BaseModel):
+    job_id: str
+    status: JobStatus
+    progress: int
+    message: Optional[str] = None
+    result_id: Optional[str] = None
+    error: Optional[str] = None
@@ -1,8 +1,11 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
 
+from app.models.itinerary import ItineraryResponse
+from app.models.trip_features import PackingItemResponse, TodoResponse
+
 
 class TripStatus(str, Enum):
     DRAFT = "draft"
@@ -50,6 +53,48 @@ class TripResponse(TripBase):
         from_attributes = True
 
 
+class BudgetEstimateResponse(BaseModel):
+    id: str
+    trip_id: str
+    breakdown: dict
+    total_min: Optional[float]
+    total_max: Optional[float]
+    total_likely: Optional[float]
+    currency: str
+    updated_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class TripFullResponse(TripResponse):
+    itinerary: Optional[ItineraryResponse] = None
+    budget_estimate: Optional[BudgetEstimateResponse] = None
+    packing_items: Optional[List[PackingItemResponse]] = None
+    todos: Optional[List[TodoResponse]] = None
+
+
+class BudgetTier(str, Enum):
+    BUDGET = "budget"
+    MID_RANGE = "mid-range"
+    LUXURY = "luxury"
+
+
+class DailyBudget(BaseModel):
+    budget: float
+    mid_range: float
+    luxury: float
+
+
+class DestinationPreferences(BaseModel):
+    interests: List[str] = []
+    budget: Optional[BudgetTier] = None
+    climate: Optional[str] = None
+    month: Optional[int] = Field(None, ge=1, le=12)
+    country: Optional[str] = None
+    count: int = Field(5, ge=1, le=10)
+
+
 class DestinationRecommendation(BaseModel):
     id: str
     name: str
@@ -57,7 +102,7 @@ class DestinationRecommendation(BaseModel):
     match_score: int
     match_reasons: List[str]
     best_time_to_visit: str
-    daily_budget: dict
+    daily_budget: DailyBudget
     highlights: List[str]
     pros: List[str]
     cons: List[str]
@@ -0,0 +1,95 @@
+"""Request and response schemas for trip packing lists and todos."""
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+
+# Pydantic models for packing items
+class PackingItemCreate(BaseModel):
+    category: str
+    item: str
+    quantity: int = 1
+    notes: Optional[str] = None
+
+
+class PackingItemUpdate(BaseModel):
+    category: Optional[str] = None
+    item: Optional[str] = None
+    packed: Optional[bool] = None
+    quantity: Optional[int] = None
+    notes: Optional[str] = None
+
+
+class PackingItemBulkUpdate(PackingItemUpdate):
+    id: str
+
+
+class PackingItemBulkRequest(BaseModel):
+    create: List[PackingItemCreate] = []
+    update: List[PackingItemBulkUpdate] = []
+    delete: List[str] = []
+
+
+class PackingItemResponse(BaseModel):
+    id: str
+    trip_id: str
+    category: str
+    item: str
+    packed: bool
+    quantity: int
+    notes: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+
+# Pydantic models for todos
+class TodoCreate(BaseModel):
+    title: str
+    description: Optional[str] = None
+    due_date: Optional[str] = None
+    priority: int = 0
+
+
+class TodoUpdate(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    completed: Optional[bool] = None
+    due_date: Optional[str] = None
+    priority: Optional[int] = None
+
+
+class TodoBulkUpdate(TodoUpdate):
+    id: str
+
+
+class TodoBulkRequest(BaseModel):
+    create: List[TodoCreate] = []
+    update: List[TodoBulkUpdate] = []
+    delete: List[str] = []
+
+
+class TodoResponse(BaseModel):
+    id: str
+    trip_id: str
+    title: str
+    description: Optional[str]
+    completed: bool
+    due_date: Optional[str]
+    completed_at: Optional[datetime]
+    priority: int
+
+    class Config:
+        from_attributes = True
+
+
+class PackingItemBulkResponse(BaseModel):
+    created: List[PackingItemResponse]
+    updated: List[PackingItemResponse]
+    deleted: List[str]
+
+
+class TodoBulkResponse(BaseModel):
+    created: List[TodoResponse]
+    updated: List[TodoResponse]
+    deleted: List[str]
@@ -26,6 +26,18 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class AuthPrincipal(BaseModel):
+    """The authenticated user as seen by routes; cached, not an ORM object."""
+    id: str
+    email: str
+    name: Optional[str] = None
+    avatar_url: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -1,10 +1,18 @@
-from openai import AsyncOpenAI
 from app.config import get_settings
-from typing import List, Dict, Any, Optional
+from app.services.chat_history import HISTORY_LIMIT
+from app.services.completion_cache import completion_cache, make_cache_key
+from app.services.conversation_context import pack_messages
+from app.services.llm_gateway import LLMUnavailableError, llm_gateway
+from app.models.itinerary import Activity, ItineraryData, ItineraryDay
+from app.models.trip import DestinationPreferences, DestinationRecommendation
+from app.utils.json_schema import response_format_for
+from app.utils.json_stream import JSONArrayItemStream, repair_json
+from pydantic import BaseModel, ValidationError
+from typing import AsyncGenerator, List, Dict, Any, Optional, Tuple
 import json
+import uuid
 
 settings = get_settings()
-client = AsyncOpenAI(api_key=settings.openai_api_key)
 
 SYSTEM_PROMPT = """You are TripMate AI, an expert travel planning assistant. Your role is to help users plan their perfect trip by understanding their preferences and providing personalized recommendations.
 
@@ -51,27 +59,39 @@ When generating itineraries, format them as JSON with day-by-day activities."""
 
 class TravelAgent:
     def __init__(self):
-        self.client = client
+        self.llm = llm_gateway
         self.system_prompt = SYSTEM_PROMPT
+        self.model = "gpt-4o-mini"
+        self.temperature = 0.7
+        self.cache = completion_cache
 
-    async def process(self, message: str, history: List[Dict] = None) -> Dict[str, Any]:
+    async def process(
+        self,
+        message: str,
+        history: List[Dict] = None,
+        user_id: Optional[str] = None,
+        summary: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Process a message and return AI response"""
-        messages = [{"role": "system", "content": self.system_prompt}]
+        # Recent messages (plus the session summary) packed into the prompt token budget
+        messages = pack_messages(
+            self.system_prompt,
+            message,
+            history=(history or [])[-HISTORY_LIMIT:],
+            summary=summary
+        )
 
-        if history:
-            for msg in history[-10:]:  # Keep last 10 messages for context
-                messages.append({
-                    "role": msg.get("role", "user"),
-                    "content": msg.get("content", "")
-                })
-
-        messages.append({"role": "user", "content": message})
+        cache_key = make_cache_key(message, messages[1:-1], self.model, self.temperature)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached
 
         try:
-            response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",
+            response = await self.llm.chat_completion(
+                user_id=user_id,
+                model=self.model,
                 messages=messages,
-                temperature=0.7,
+                temperature=self.temperature,
                 max_tokens=2000
             )
 
@@ -88,11 +108,17 @@ class TravelAgent:
                 except (ValueError, json.JSONDecodeError):
                     pass
 
-            return {
+            result = {
                 "message": content,
                 "metadata": metadata
             }
+            # Only successful completions are cached; errors fall through below
+            await self.cache.set(cache_key, result)
+            return result
 
+        except LLMUnavailableError:
+            # Provider overload is surfaced as a 503 rather than apology text
+            raise
         except Exception as e:
             return {
                 "message": f"I apologize, but I encountered an error processing your request. Please try again. Error: {str(e)}",
@@ -100,86 +126,97 @@ class TravelAgent:
             }
 
 
+travel_agent = TravelAgent()
+
+
 async def process_chat_message(
     message: str,
     history: List[Dict] = None,
-    trip_context: Optional[Dict] = None
+    trip_context: Optional[Dict] = None,
+    user_id: Optional[str] = None,
+    summary: Optional[str] = None
 ) -> Dict[str, Any]:
     """Process a chat message with the travel agent"""
-    agent = TravelAgent()
-
     # Add trip context to message if provided
     if trip_context:
         context_str = f"\n\nCurrent trip context: {json.dumps(trip_context)}"
         message = message + context_str
 
-    return await agent.process(message, history)
-
-
-async def generate_itinerary_for_trip(trip, preferences: Optional[Dict] = None) -> Dict:
-    """Generate an itinerary for a trip using AI"""
-    agent = TravelAgent()
-
-    prompt = f"""Generate a detailed day-by-day itinerary for the following trip:
+    return await travel_agent.process(message, history, user_id=user_id, summary=summary)
 
-Destination: {trip.destination}
-Start Date: {trip.start_date}
-End Date: {trip.end_date}
-Number of Travelers: {trip.travelers}
-Budget: {trip.budget} {trip.currency}
-Notes: {trip.notes or 'None'}
 
-{"Additional preferences: " + json.dumps(preferences) if preferences else ""}
-
-Please provide a complete itinerary in JSON format with the following structure:
-{{
+ITINERARY_JSON_SHAPE = """{
   "destination": "destination name",
   "start_date": "YYYY-MM-DD",
   "end_date": "YYYY-MM-DD",
   "days": [
-    {{
+    {
       "day_number": 1,
       "date": "YYYY-MM-DD",
       "theme": "Day theme",
       "activities": [
-        {{
+        {
           "id": "act_1",
           "name": "Activity name",
           "type": "attraction|activity|transport|rest",
           "time_slot": "morning|afternoon|evening",
           "start_time": "HH:MM",
           "duration": 120,
-          "location": {{"name": "Location", "address": "Address"}},
+          "location": {"name": "Location", "address": "Address"},
           "cost": 0,
           "currency": "USD",
           "booking_required": false,
           "notes": "Optional notes"
-        }}
+        }
       ],
       "meals": [
-        {{
+        {
           "type": "breakfast|lunch|dinner",
           "suggestion": "Restaurant name",
           "cuisine": "Cuisine type",
           "price_range": "$|$$|$$$",
           "location": "Area/Address"
-        }}
+        }
       ],
       "daily_cost": 150
-    }}
+    }
   ],
   "total_estimated_cost": 1500,
   "notes": ["Tip 1", "Tip 2"]
-}}"""
+}"""
 
-    response = await agent.process(prompt)
 
-    # Parse the JSON from response
-    if response.get("metadata"):
-        return response["metadata"]
+def build_itinerary_prompt(trip, preferences: Optional[Dict] = None) -> str:
+    """Build the itinerary generation prompt for a trip"""
+    return f"""Generate a detailed day-by-day itinerary for the following trip:
 
-    # Try to parse from message content
-    content = response["message"]
+Destination: {trip.destination}
+Start Date: {trip.start_date}
+End Date: {trip.end_date}
+Number of Travelers: {trip.travelers}
+Budget: {trip.budget} {trip.currency}
+Notes: {trip.notes or 'None'}
+
+{"Additional preferences: " + json.dumps(preferences) if preferences else ""}
+
+Please provide a complete itinerary.
+{json_instructions(ITINERARY_JSON_SHAPE)}"""
+
+
+def empty_itinerary(trip) -> Dict:
+    """Default itinerary structure used when generation fails"""
+    return {
+        "destination": trip.destination,
+        "start_date": trip.start_date,
+        "end_date": trip.end_date,
+        "days": [],
+        "total_estimated_cost": 0,
+        "notes": ["Unable to generate itinerary automatically. Please try again."]
+    }
+
+
+def extract_json(content: str) -> Optional[Any]:
+    """JSON from a ```json block, or else the outermost braces, of a completion."""
     try:
         if "```json" in content:
             json_start = content.index("```json") + 7
@@ -191,13 +228,373 @@ Please provide a complete itinerary in JSON format with the following structure:
             return json.loads(content[start:end])
     except (ValueError, json.JSONDecodeError):
         pass
+    # Truncated or otherwise broken output: keep whatever was complete
+    return repair_json(content)
 
-    # Return a default structure if parsing fails
-    return {
-        "destination": trip.destination,
-        "start_date": trip.start_date,
-        "end_date": trip.end_date,
-        "days": [],
-        "total_estimated_cost": 0,
-        "notes": ["Unable to generate itinerary automatically. Please try again."]
-    }
+
+def json_instructions(template: str) -> str:
+    """Closing output instruction of a JSON prompt.
+
+    With structured outputs the schema travels in `response_format`, so the
+    prompt no longer spends tokens on a JSON template.
+    """
+    if settings.llm_structured_outputs:
+        return "Respond with JSON only."
+    return f"Respond with JSON only:\n{template}"
+
+
+def structured_format(model: type[BaseModel]) -> Dict[str, Any]:
+    """Completion kwargs constraining the output to `model`'s JSON schema."""
+    if not settings.llm_structured_outputs:
+        return {}
+    return {"response_format": response_format_for(model)}
+
+
+async def structured_completion(
+    prompt: str,
+    model: type[BaseModel],
+    max_tokens: int,
+    user_id: Optional[str] = None,
+    cache: bool = True
+) -> Optional[Any]:
+    """One completion constrained to `model`'s schema, parsed as JSON.
+
+    Output that is not plain JSON (a provider without schema support, a
+    truncated answer) goes through extract_json's fallbacks. Parsed objects
+    are cached like chat completions unless `cache` is off. Returns None when
+    the call fails or nothing parses; LLMUnavailableError propagates.
+    """
+    cache_key = make_cache_key(prompt, None, travel_agent.model, travel_agent.temperature)
+    if cache:
+        cached = await travel_agent.cache.get(cache_key)
+        if cached is not None:
+            return cached.get("json")
+
+    try:
+        response = await travel_agent.llm.chat_completion(
+            user_id=user_id,
+            model=travel_agent.model,
+            messages=[
+                {"role": "system", "content": travel_agent.system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=travel_agent.temperature,
+            max_tokens=max_tokens,
+            **structured_format(model)
+        )
+    except LLMUnavailableError:
+        raise
+    except Exception:
+        return None
+
+    parsed = extract_json(response.choices[0].message.content or "")
+    if cache and isinstance(parsed, dict):
+        await travel_agent.cache.set(cache_key, {"json": parsed})
+    return parsed
+
+
+async def generate_itinerary_for_trip(trip, preferences: Optional[Dict] = None, cache: bool = True) -> Dict:
+    """Generate an itinerary for a trip using AI"""
+    parsed = await structured_completion(
+        build_itinerary_prompt(trip, preferences),
+        ItineraryData,
+        max_tokens=2000,
+        user_id=getattr(trip, "user_id", None),
+        cache=cache
+    )
+    return validated_itinerary(trip, parsed)
+
+
+def validated_itinerary(trip, parsed: Any) -> Dict:
+    """`parsed` checked against ItineraryData, keeping only the days that validate.
+
+    Output repaired after truncation can end in incomplete days; those are
+    dropped instead of saved. Falls back to empty_itinerary() when no day is usable.
+    """
+    if not isinstance(parsed, dict):
+        return empty_itinerary(trip)
+    try:
+        return ItineraryData.model_validate(parsed).model_dump(mode="json")
+    except ValidationError:
+        pass
+
+    days = []
+    items = parsed.get("days")
+    for item in items if isinstance(items, list) else []:
+        try:
+            days.append(ItineraryDay.model_validate(item).model_dump(mode="json"))
+        except ValidationError:
+            continue
+    if not days:
+        return empty_itinerary(trip)
+    notes = parsed.get("notes")
+    return ItineraryData.model_validate({
+        "destination": trip.destination or "",
+        "start_date": str(trip.start_date or ""),
+        "end_date": str(trip.end_date or ""),
+        "days": days,
+        "total_estimated_cost": sum(day["daily_cost"] for day in days),
+        "notes": [str(note) for note in notes] if isinstance(notes, list) else [],
+    }).model_dump(mode="json")
+
+
+class DestinationRecommendationList(BaseModel):
+    recommendations: List[DestinationRecommendation]
+
+
+DESTINATION_JSON_SHAPE = """{"recommendations": [{"id": "", "name": "City Name", "country": "Country", "match_score": 85,
+ "match_reasons": ["reason1"], "best_time_to_visit": "March-May",
+ "daily_budget": {"budget": 50, "mid_range": 100, "luxury": 250},
+ "highlights": ["highlight1"], "pros": ["pro1"], "cons": ["con1"], "image_url": null}]}"""
+
+
+def build_recommendations_prompt(preferences: DestinationPreferences) -> str:
+    """Prompt asking for `preferences.count` destinations matching the preferences"""
+    criteria = preferences.model_dump(mode="json", exclude={"count"}, exclude_none=True, exclude_defaults=True)
+    return f"""Recommend {preferences.count} travel destinations for these preferences:
+{json.dumps(criteria) if criteria else "No particular preferences; suggest a varied mix."}
+
+Give every destination a match_score from 0 to 100, daily budgets per traveler in USD,
+and concrete reasons it matches. Use an empty string for "id" and null for "image_url".
+{json_instructions(DESTINATION_JSON_SHAPE)}"""
+
+
+async def generate_destination_recommendations(
+    preferences: DestinationPreferences,
+    user_id: Optional[str] = None
+) -> Optional[List[DestinationRecommendation]]:
+    """Destination recommendations from the model, best match first; None when generation failed."""
+    parsed = await structured_completion(
+        build_recommendations_prompt(preferences),
+        DestinationRecommendationList,
+        max_tokens=400 * preferences.count + 200,
+        user_id=user_id
+    )
+    if not isinstance(parsed, dict):
+        return None
+
+    recommendations = []
+    for item in parsed.get("recommendations") or []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            recommendations.append(DestinationRecommendation.model_validate(
+                {**item, "id": f"dest_{uuid.uuid4().hex[:8]}", "image_url": None}
+            ))
+        except ValidationError:
+            continue
+    recommendations.sort(key=lambda recommendation: recommendation.match_score, reverse=True)
+    return recommendations[:preferences.count]
+
+
+class MatchReasons(BaseModel):
+    id: str
+    reasons: List[str]
+
+
+class MatchReasonsList(BaseModel):
+    destinations: List[MatchReasons]
+
+
+async def phrase_match_reasons(
+    recommendations: List[DestinationRecommendation],
+    preferences: DestinationPreferences,
+    user_id: Optional[str] = None
+) -> List[DestinationRecommendation]:
+    """Rewrite the computed match reasons as natural sentences.
+
+    Only the wording comes from the model: it gets the facts behind each
+    recommendation and may not add new ones. Destinations it skips, or every
+    destination when the call fails, keep their original reasons.
+    """
+    criteria = preferences.model_dump(mode="json", exclude={"count"}, exclude_none=True, exclude_defaults=True)
+    facts = "\n".join(
+        f"- {recommendation.id}: {recommendation.name}, {recommendation.country}; "
+        f"best time {recommendation.best_time_to_visit}; {json.dumps(recommendation.match_reasons)}"
+        for recommendation in recommendations
+    )
+    prompt = f"""A traveler with these preferences: {json.dumps(criteria)}
+was matched with these destinations, with the reasons for each match:
+{facts}
+
+For every destination id, rewrite its reasons as 1-3 short, friendly sentences addressed to the traveler.
+Use only the facts given; do not add prices, dates or claims that are not listed.
+{json_instructions('{"destinations": [{"id": "dest_x", "reasons": ["Sentence."]}]}')}"""
+
+    try:
+        parsed = await structured_completion(prompt, MatchReasonsList, 80 * len(recommendations) + 100, user_id)
+    except LLMUnavailableError:
+        parsed = None
+    if not isinstance(parsed, dict):
+        return recommendations
+
+    phrased = {}
+    for item in parsed.get("destinations") or []:
+        if isinstance(item, dict) and isinstance(item.get("reasons"), list):
+            reasons = [str(reason) for reason in item["reasons"] if str(reason).strip()]
+            if reasons:
+                phrased[item.get("id")] = reasons
+    return [
+        recommendation.model_copy(update={"match_reasons": phrased[recommendation.id]})
+        if recommendation.id in phrased else recommendation
+        for recommendation in recommendations
+    ]
+
+
+ACTIVITY_JSON_SHAPE = """{"id": "act_1", "name": "Activity name", "type": "attraction|activity|transport|rest",
+ "time_slot": "morning|afternoon|evening", "start_time": "HH:MM", "duration": 120,
+ "location": {"name": "Location", "address": "Address"}, "cost": 0, "currency": "USD",
+ "booking_required": false, "notes": "Optional notes"}"""
+
+MEAL_JSON_SHAPE = """{"type": "breakfast|lunch|dinner", "suggestion": "Restaurant name", "cuisine": "Cuisine type",
+ "price_range": "$|$$|$$$", "location": "Area/Address"}"""
+
+
+def day_json_shape(day_number: Any, date: Any) -> str:
+    return f"""{{"day_number": {day_number}, "date": "{date}", "theme": "Day theme",
+ "activities": [{ACTIVITY_JSON_SHAPE}],
+ "meals": [{MEAL_JSON_SHAPE}],
+ "daily_cost": 150}}"""
+
+
+class ActivityList(BaseModel):
+    activities: List[Activity]
+
+
+def _day_outline(day: Dict) -> str:
+    activities = ", ".join(
+        f"{activity.get('name')} ({activity.get('time_slot')})" for activity in day.get("activities", [])
+    )
+    return f"Day {day.get('day_number')} ({day.get('date')}), theme: {day.get('theme') or '-'}; activities: {activities or 'none'}"
+
+
+def build_day_prompt(
+    trip,
+    itinerary: Dict,
+    day_index: int,
+    time_slot: Optional[str] = None,
+    preferences: Optional[Dict] = None
+) -> str:
+    """Prompt regenerating one day (or one time slot of it) with only its neighbours as context."""
+    days = itinerary.get("days", [])
+    day = days[day_index]
+    neighbours = [
+        f"{label}: {_day_outline(days[index])}"
+        for label, index in (("Previous day", day_index - 1), ("Next day", day_index + 1))
+        if 0 <= index < len(days)
+    ]
+    daily_budget = f"{trip.budget / max(len(days), 1):.0f} {trip.currency}" if trip.budget else "not set"
+    context = f"""Trip: {trip.destination}, {trip.start_date} to {trip.end_date}, {trip.travelers} traveler(s)
+Daily budget: {daily_budget}
+Notes: {trip.notes or 'None'}
+{"Additional preferences: " + json.dumps(preferences) if preferences else ""}
+{chr(10).join(neighbours)}
+Do not repeat activities from the neighbouring days."""
+
+    if time_slot:
+        kept = [activity for activity in day.get("activities", []) if activity.get("time_slot") != time_slot]
+        replaced = [activity.get("name") for activity in day.get("activities", []) if activity.get("time_slot") == time_slot]
+        return f"""Replace the {time_slot} of day {day.get('day_number')} ({day.get('date')}) of this itinerary.
+
+{context}
+Day theme: {day.get('theme') or '-'}
+Fixed activities that day (keep them, do not repeat): {json.dumps([a.get('name') for a in kept])}
+Current {time_slot} activities to replace with something different: {json.dumps(replaced)}
+
+{json_instructions('{"activities": [' + ACTIVITY_JSON_SHAPE + ']}')}
+Every activity must have "time_slot": "{time_slot}"."""
+
+    return f"""Plan day {day.get('day_number')} ({day.get('date')}) of this itinerary again, differently from the current plan.
+
+{context}
+Current plan for this day: {_day_outline(day)}
+
+{json_instructions(day_json_shape(day.get('day_number'), day.get('date')))}"""
+
+
+async def generate_itinerary_day(
+    trip,
+    itinerary: Dict,
+    day_index: int,
+    time_slot: Optional[str] = None,
+    preferences: Optional[Dict] = None
+) -> Optional[Any]:
+    """Regenerate one day of an itinerary, or only its `time_slot` activities.
+
+    Returns a validated ItineraryDay dict, or for a time slot the list of new
+    Activity dicts; None when the model's answer could not be used. Activities
+    get fresh ids so they never collide with the rest of the itinerary.
+    """
+    # Not cached: asking again is expected to give a different plan
+    parsed = await structured_completion(
+        build_day_prompt(trip, itinerary, day_index, time_slot, preferences),
+        ActivityList if time_slot else ItineraryDay,
+        max_tokens=settings.itinerary_day_max_tokens,
+        user_id=getattr(trip, "user_id", None),
+        cache=False
+    )
+    if not isinstance(parsed, dict):
+        return None
+
+    try:
+        if time_slot:
+            activities = [
+                Activity.model_validate({**item, "time_slot": time_slot}).model_dump(mode="json")
+                for item in parsed.get("activities", [])
+            ]
+        else:
+            original = itinerary["days"][day_index]
+            day = ItineraryDay.model_validate(
+                {**parsed, "day_number": original.get("day_number"), "date": original.get("date")}
+            ).model_dump(mode="json")
+            activities = day["activities"]
+    except (ValidationError, TypeError):
+        return None
+
+    for activity in activities:
+        activity["id"] = f"act_{uuid.uuid4().hex[:8]}"
+    return activities if time_slot else day
+
+
+async def stream_itinerary_for_trip(
+    trip,
+    preferences: Optional[Dict] = None
+) -> AsyncGenerator[Tuple[str, Dict], None]:
+    """Stream an itinerary for a trip, yielding each day as soon as it parses.
+
+    Yields ("day", day) for every ItineraryDay completed by the model, then a
+    single ("complete", itinerary) with the assembled document checked by
+    validated_itinerary(); it has no days when none of them were usable.
+    """
+    parser = JSONArrayItemStream("days")
+    days = []
+
+    stream = travel_agent.llm.stream_chat_completion(
+        user_id=getattr(trip, "user_id", None),
+        model=travel_agent.model,
+        messages=[
+            {"role": "system", "content": travel_agent.system_prompt},
+            {"role": "user", "content": build_itinerary_prompt(trip, preferences)}
+        ],
+        temperature=travel_agent.temperature,
+        max_tokens=2000,
+        **structured_format(ItineraryData)
+    )
+
+    async for chunk in stream:
+        if not (chunk.choices and chunk.choices[0].delta.content):
+            continue
+        for item in parser.feed(chunk.choices[0].delta.content):
+            try:
+                day = ItineraryDay.model_validate(item).model_dump(mode="json")
+            except ValidationError:
+                continue
+            days.append(day)
+            yield "day", day
+
+    # Truncated or malformed output: keep whatever days did parse
+    document = parser.document()
+    if not isinstance(document, dict):
+        document = {"notes": []}
+
+    yield "complete", validated_itinerary(trip, {**document, "days": days})
@@ -0,0 +1,136 @@
+"""AG-UI event encoding and the itinerary generation event stream.
+
+Events are server-sent `data:` lines in the AG-UI (Agent-User Interaction)
+protocol; routes wrap these generators in a StreamingResponse.
+"""
+from typing import AsyncGenerator, Dict, Optional
+import json
+import time
+
+from sqlalchemy import select
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import Itinerary
+from app.services.itinerary_planner import stream_itinerary
+from app.services.itinerary_service import save_itinerary_data
+from app.services.llm_gateway import LLMUnavailableError
+
+
+def create_event(event_type: str, **kwargs) -> str:
+    """Create an AG-UI formatted event."""
+    event = {
+        "type": event_type,
+        "timestamp": int(time.time() * 1000),
+        **kwargs
+    }
+    return f"data: {json.dumps(event)}\n\n"
+
+
+async def stream_itinerary_events(
+    trip,
+    preferences: Optional[Dict],
+    thread_id: str,
+    run_id: str
+) -> AsyncGenerator[str, None]:
+    """Stream itinerary generation as AG-UI state events, one day at a time.
+
+    The client receives a STATE_SNAPSHOT with an empty itinerary, then a
+    STATE_DELTA (JSON Patch) appending each day as soon as the model finishes
+    it. Trips long enough for the chunked planner instead get their placeholder
+    days from the skeleton and one STATE_DELTA per finished chunk. The
+    validated itinerary is persisted and sent whole before RUN_FINISHED; when
+    no day was usable nothing is saved and the run ends in RUN_ERROR.
+    """
+    yield create_event(
+        "RUN_STARTED",
+        thread_id=thread_id,
+        run_id=run_id
+    )
+
+    yield create_event(
+        "STATE_SNAPSHOT",
+        snapshot={
+            "itinerary": {
+                "destination": trip.destination,
+                "start_date": trip.start_date,
+                "end_date": trip.end_date,
+                "days": [],
+                "total_estimated_cost": 0,
+                "notes": []
+            }
+        }
+    )
+
+    try:
+        async for kind, payload in stream_itinerary(trip, preferences):
+            if kind == "day":
+                yield create_event(
+                    "STATE_DELTA",
+                    delta=[{"op": "add", "path": "/itinerary/days/-", "value": payload}]
+                )
+                continue
+            if kind == "skeleton":
+                yield create_event(
+                    "STATE_DELTA",
+                    delta=[{"op": "replace", "path": "/itinerary/days", "value": payload}]
+                )
+                continue
+            if kind == "chunk":
+                yield create_event(
+                    "STATE_DELTA",
+                    delta=[
+                        {"op": "replace", "path": f"/itinerary/days/{day['day_number'] - 1}", "value": day}
+                        for day in payload
+                    ]
+                )
+                continue
+
+            if not payload["days"]:
+                # Nothing usable came back; keep the saved itinerary as it is
+                yield create_event(
+                    "RUN_ERROR",
+                    message="Could not generate the itinerary, please retry",
+                    code="ITINERARY_INVALID"
+                )
+                return
+
+            async with AsyncSessionLocal() as session:
+                itinerary_id = await save_itinerary_data(session, trip.id, payload, trip.user_id)
+                await session.commit()
+                result = await session.execute(
+                    select(Itinerary.version).where(Itinerary.id == itinerary_id)
+                )
+                version = result.scalar_one()
+
+            yield create_event(
+                "STATE_DELTA",
+                delta=[
+                    {"op": "replace", "path": "/itinerary/days", "value": payload["days"]},
+                    {"op": "replace", "path": "/itinerary/total_estimated_cost",
+                     "value": payload["total_estimated_cost"]},
+                    {"op": "replace", "path": "/itinerary/notes", "value": payload["notes"]},
+                    {"op": "add", "path": "/itinerary/id", "value": itinerary_id},
+                    {"op": "add", "path": "/itinerary/version", "value": version},
+                ]
+            )
+
+        yield create_event(
+            "RUN_FINISHED",
+            thread_id=thread_id,
+            run_id=run_id
+        )
+
+    except LLMUnavailableError as e:
+        yield create_event(
+            "RUN_ERROR",
+            message=str(e),
+            code="RATE_LIMITED",
+            retry_after=e.retry_after
+        )
+
+    except Exception as e:
+        yield create_event(
+            "RUN_ERROR",
+            message=str(e),
+            code="ITINERARY_ERROR"
+        )
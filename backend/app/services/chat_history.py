@@ -0,0 +1,149 @@
+"""Windowed chat history for building model context.
+
+Only the messages the session summary does not cover yet are sent to the
+model, at most `HISTORY_LIMIT` of them, so only those are read: one keyset
+query on (session_id, created_at, id) starting after the last summarized
+message, regardless of how long the session is. An optional in-process cache
+keeps the rolling window per session so a turn does not need to read history
+at all. Enable the cache only when a session's turns are served by a single
+process; otherwise windows can miss turns handled elsewhere.
+"""
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.db.models import ChatMessage
+
+settings = get_settings()
+
+# The summary trails the history window by up to summary_refresh_every
+# messages; those are read as well so no message is left out of both
+HISTORY_LIMIT = settings.chat_history_window + settings.summary_refresh_every
+
+# Position of a message in its session: (created_at, id)
+MessageKey = Tuple[datetime, str]
+HistoryEntry = Tuple[MessageKey, Dict]
+
+
+def message_key(created_at: datetime, message_id: str) -> MessageKey:
+    # SQLite hands back naive datetimes; every timestamp is stored in UTC
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at, message_id
+
+
+def after_message(key: Optional[MessageKey]):
+    """Keyset predicate for messages ordered after `key` (all messages when None)."""
+    if key is None:
+        return true()
+    created_at, message_id = key
+    return or_(
+        ChatMessage.created_at > created_at,
+        and_(ChatMessage.created_at == created_at, ChatMessage.id > message_id),
+    )
+
+
+def turn_history(turn: dict) -> List[HistoryEntry]:
+    """History entries for the messages of a chat turn record (see chat_outbox.build_turn)."""
+    return [
+        (
+            message_key(datetime.fromisoformat(message["created_at"]), message["id"]),
+            {"role": message["role"], "content": message["content"]},
+        )
+        for message in turn["messages"]
+    ]
+
+
+class HistoryWindowCache:
+    """LRU of per-session rolling windows of the most recent messages.
+
+    Messages are kept with their keys, so the part already covered by the
+    summary can be skipped.
+    """
+
+    def __init__(self, window: int, max_sessions: int):
+        self.window = window
+        self.max_sessions = max_sessions
+        self._windows: "OrderedDict[str, Deque[HistoryEntry]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_sessions > 0
+
+    def get(self, session_id: str, after: Optional[MessageKey] = None) -> Optional[List[Dict]]:
+        """Cached messages ordered after `after`, oldest first."""
+        window = self._windows.get(session_id)
+        if window is None:
+            return None
+        self._windows.move_to_end(session_id)
+        return [message for key, message in window if after is None or key > after]
+
+    def set(self, session_id: str, entries: List[HistoryEntry]) -> None:
+        if not self.enabled:
+            return
+        self._windows[session_id] = deque(entries[-self.window:], maxlen=self.window)
+        self._windows.move_to_end(session_id)
+        while len(self._windows) > self.max_sessions:
+            self._windows.popitem(last=False)
+
+    def extend(self, session_id: str, entries: List[HistoryEntry]) -> None:
+        """Append new turns to a cached window; uncached sessions are left alone."""
+        window = self._windows.get(session_id)
+        if window is not None:
+            window.extend(entries)
+
+    def invalidate(self, session_id: str) -> None:
+        self._windows.pop(session_id, None)
+
+
+history_cache = HistoryWindowCache(
+    window=HISTORY_LIMIT,
+    max_sessions=settings.chat_history_cache_sessions,
+)
+
+
+async def load_recent_entries(
+    db: AsyncSession,
+    session_id: str,
+    limit: int,
+    after: Optional[MessageKey] = None
+) -> List[HistoryEntry]:
+    """The last `limit` messages of a session ordered after `after`, oldest first, with their keys."""
+    result = await db.execute(
+        select(ChatMessage.created_at, ChatMessage.id, ChatMessage.role, ChatMessage.content)
+        .where(ChatMessage.session_id == session_id, after_message(after))
+        .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+        .limit(limit)
+    )
+    return [
+        (message_key(created_at, message_id), {"role": role, "content": content})
+        for created_at, message_id, role, content in reversed(result.all())
+    ]
+
+
+async def load_recent_history(
+    db: AsyncSession,
+    session_id: str,
+    limit: int,
+    after: Optional[MessageKey] = None
+) -> List[Dict]:
+    """Read the last `limit` messages of a session ordered after `after`, oldest first."""
+    return [message for _, message in await load_recent_entries(db, session_id, limit, after)]
+
+
+async def get_recent_history(db: AsyncSession, session_id: str, after: Optional[MessageKey] = None) -> List[Dict]:
+    """Messages the summary does not cover yet (newest HISTORY_LIMIT), from cache when available.
+
+    `after` is the key of the last message the session summary covers.
+    """
+    cached = history_cache.get(session_id, after)
+    if cached is not None:
+        return cached
+
+    entries = await load_recent_entries(db, session_id, HISTORY_LIMIT, after)
+    history_cache.set(session_id, entries)
+    return [message for _, message in entries]
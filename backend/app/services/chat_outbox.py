@@ -0,0 +1,239 @@
+"""Single-transaction persistence of chat turns, with an outbox fallback.
+
+A chat turn (optional new session, the user message and the assistant reply)
+is written in one transaction after the model has answered. If that write
+fails the turn is appended to a local JSONL outbox and replayed in the
+background until it is stored, so the user still gets their answer and the
+conversation is not lost while the database is locked or unavailable.
+Message ids are assigned up front, which makes replays idempotent.
+
+Every process spools to its own file (`chat_outbox.<pid>.jsonl`) so workers
+never overwrite each other, and adopts the files of processes that are gone
+at startup. Turns that can never be stored (an integrity error, or
+`chat_outbox_max_attempts` failed replays) are moved to
+`chat_outbox.dead.jsonl` instead of being retried forever.
+"""
+from datetime import datetime
+from typing import List, Optional
+import asyncio
+import glob
+import json
+import logging
+import os
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import ChatMessage, ChatSession, generate_uuid
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def build_turn(
+    session_id: str,
+    user_id: str,
+    new_session: bool,
+    user_content: str,
+    user_created_at: datetime,
+    assistant_content: str,
+    assistant_created_at: datetime,
+    metadata: Optional[dict] = None
+) -> dict:
+    """JSON-serializable record of one chat turn."""
+    return {
+        "session_id": session_id,
+        "user_id": user_id,
+        "new_session": new_session,
+        "messages": [
+            {
+                "id": generate_uuid(),
+                "role": "user",
+                "content": user_content,
+                "metadata": None,
+                "created_at": user_created_at.isoformat(),
+            },
+            {
+                "id": generate_uuid(),
+                "role": "assistant",
+                "content": assistant_content,
+                "metadata": metadata,
+                "created_at": assistant_created_at.isoformat(),
+            },
+        ],
+    }
+
+
+async def write_turn(db: AsyncSession, turn: dict) -> None:
+    """Stage a turn on `db`; the caller commits. Already-stored rows are skipped."""
+    if turn["new_session"] and await db.get(ChatSession, turn["session_id"]) is None:
+        db.add(ChatSession(id=turn["session_id"], user_id=turn["user_id"]))
+    for message in turn["messages"]:
+        if await db.get(ChatMessage, message["id"]) is not None:
+            continue
+        db.add(ChatMessage(
+            id=message["id"],
+            session_id=turn["session_id"],
+            role=message["role"],
+            content=message["content"],
+            message_metadata=message["metadata"],
+            created_at=datetime.fromisoformat(message["created_at"]),
+        ))
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ChatOutbox:
+    def __init__(self, path: str, retry_seconds: float, max_attempts: int = 20):
+        self.base_path = path
+        self.retry_seconds = retry_seconds
+        self.max_attempts = max_attempts
+        self._pending: List[dict] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def path(self) -> str:
+        """This process's spool file; resolved late so forked workers get their own."""
+        root, ext = os.path.splitext(self.base_path)
+        return f"{root}.{os.getpid()}{ext}"
+
+    @property
+    def dead_letter_path(self) -> str:
+        root, ext = os.path.splitext(self.base_path)
+        return f"{root}.dead{ext}"
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def save(self, turn: dict) -> bool:
+        """Write a turn in one transaction; on failure queue it in the outbox.
+
+        Returns True when the turn was stored directly.
+        """
+        try:
+            async with AsyncSessionLocal() as db:
+                await write_turn(db, turn)
+                await db.commit()
+            return True
+        except Exception:
+            logger.exception("Storing chat turn for session %s failed; queued in outbox", turn["session_id"])
+            await self.add(turn)
+            return False
+
+    async def add(self, turn: dict) -> None:
+        async with self._lock:
+            self._pending.append(turn)
+            self._persist()
+        self._ensure_draining()
+
+    async def start(self) -> None:
+        """Adopt turns left over by processes that are gone and start replaying them."""
+        async with self._lock:
+            for path in [self.path] + self._orphaned_paths():
+                # Claim by renaming so two starting workers never adopt the same file
+                claimed = f"{self.path}.adopt"
+                try:
+                    os.replace(path, claimed)
+                except FileNotFoundError:
+                    continue
+                with open(claimed) as f:
+                    self._pending.extend(json.loads(line) for line in f if line.strip())
+                self._persist()
+                os.remove(claimed)
+        self._ensure_draining()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def drain(self) -> int:
+        """Try to store every pending turn; returns how many are still pending.
+
+        The lock is not held during the writes, so `add()` never waits on the database.
+        """
+        async with self._lock:
+            batch = list(self._pending)
+        finished, dead = [], []
+        for turn in batch:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await write_turn(db, turn)
+                    await db.commit()
+            except IntegrityError as e:
+                # A deleted session or a conflicting row: retrying cannot help
+                logger.error("Outbox turn for session %s cannot be stored: %s", turn["session_id"], e)
+                dead.append(turn)
+            except Exception as e:
+                turn["attempts"] = turn.get("attempts", 0) + 1
+                if turn["attempts"] < self.max_attempts:
+                    logger.warning("Outbox replay for session %s failed: %s", turn["session_id"], e)
+                    continue
+                logger.error(
+                    "Outbox turn for session %s failed %d times, giving up: %s",
+                    turn["session_id"], turn["attempts"], e
+                )
+                dead.append(turn)
+            finished.append(turn)
+
+        async with self._lock:
+            done = {id(turn) for turn in finished}
+            self._pending = [turn for turn in self._pending if id(turn) not in done]
+            if dead:
+                with open(self.dead_letter_path, "a") as f:
+                    for turn in dead:
+                        f.write(json.dumps(turn) + "\n")
+            self._persist()
+            return len(self._pending)
+
+    def _orphaned_paths(self) -> List[str]:
+        """Spool files of processes that no longer run, plus the pre-per-process file."""
+        root, ext = os.path.splitext(self.base_path)
+        paths = [self.base_path]
+        for path in glob.glob(f"{glob.escape(root)}.*{ext}"):
+            pid = path[len(root) + 1:len(path) - len(ext)]
+            if pid.isdigit() and int(pid) != os.getpid() and not pid_alive(int(pid)):
+                paths.append(path)
+        return paths
+
+    def _persist(self) -> None:
+        if not self._pending:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            for turn in self._pending:
+                f.write(json.dumps(turn) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def _ensure_draining(self) -> None:
+        if self._pending and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._drain_loop())
+
+    async def _drain_loop(self) -> None:
+        delay = self.retry_seconds
+        while self._pending:
+            await asyncio.sleep(delay)
+            if await self.drain():
+                delay = min(delay * 2, 60.0)
+
+
+chat_outbox = ChatOutbox(
+    path=settings.chat_outbox_path,
+    retry_seconds=settings.chat_outbox_retry_seconds,
+    max_attempts=settings.chat_outbox_max_attempts,
+)
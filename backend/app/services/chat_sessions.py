@@ -0,0 +1,78 @@
+"""Session listings and message pages that never load message collections.
+
+The session list carries per-session aggregates (message count, a preview of
+the last message, last activity) as correlated subqueries on the
+(session_id, created_at) index, so it is one statement whose cost follows the
+page size, not the length of the conversations. Message bodies are read
+separately, one page at a time.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import ChatMessage, ChatSession
+
+PREVIEW_CHARS = 120
+
+
+def session_summary_columns() -> Dict[str, Any]:
+    """Selectable expressions for ChatSessionSummary fields, keyed by field name."""
+    in_session = ChatMessage.session_id == ChatSession.id
+    last_message = (
+        select(func.substr(ChatMessage.content, 1, PREVIEW_CHARS))
+        .where(in_session)
+        .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    return {
+        "id": ChatSession.id,
+        "user_id": ChatSession.user_id,
+        "trip_id": ChatSession.trip_id,
+        "created_at": ChatSession.created_at,
+        "message_count": select(func.count()).where(in_session).scalar_subquery(),
+        "last_message_preview": last_message,
+        "last_activity_at": func.coalesce(
+            select(func.max(ChatMessage.created_at)).where(in_session).scalar_subquery(),
+            ChatSession.created_at
+        ),
+    }
+
+
+def message_dict(message: ChatMessage) -> Dict[str, Any]:
+    return {
+        "id": message.id,
+        "session_id": message.session_id,
+        "role": message.role,
+        "content": message.content,
+        "metadata": message.message_metadata,
+        "created_at": message.created_at,
+    }
+
+
+async def session_messages(
+    db: AsyncSession,
+    session_id: str,
+    user_id: str,
+    *criteria,
+    order_by: Sequence = (),
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Messages of an owned session, with the ownership check in the same query.
+
+    Raises 404 when the session does not exist or belongs to someone else.
+    """
+    result = await db.execute(
+        select(ChatSession.id, ChatMessage)
+        .select_from(ChatSession)
+        .outerjoin(ChatMessage, and_(ChatMessage.session_id == ChatSession.id, *criteria))
+        .where(ChatSession.id == session_id, ChatSession.user_id == user_id)
+        .order_by(*order_by)
+        .limit(limit)
+    )
+    rows = result.all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return [message_dict(message) for _, message in rows if message is not None]
@@ -0,0 +1,251 @@
+"""Completion cache for TravelAgent responses.
+
+Identical prompts (e.g. "3 days in Tokyo" from many presales users) are served
+from cache instead of calling the model again. Entries are keyed on the
+normalized prompt, the truncated history, the model and the temperature.
+
+Two tiers are available:
+- an in-process LRU tier bounded by entry count and approximate byte size
+- an optional database tier (the app's SQLite/Postgres engine) shared by all
+  workers and surviving restarts
+"""
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import copy
+import hashlib
+import json
+import re
+import time
+
+from sqlalchemy import delete, select
+
+from app.config import get_settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import CompletionCacheEntry
+
+settings = get_settings()
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(text: str) -> str:
+    """Normalize a prompt so trivial differences still hit the cache."""
+    return _WHITESPACE_RE.sub(" ", (text or "").strip().lower())
+
+
+def make_cache_key(
+    message: str,
+    history: Optional[List[Dict]],
+    model: str,
+    temperature: float
+) -> str:
+    """Build a stable cache key for a completion request."""
+    payload = {
+        "message": normalize_prompt(message),
+        "history": [
+            [msg.get("role", "user"), normalize_prompt(msg.get("content", ""))]
+            for msg in (history or [])
+        ],
+        "model": model,
+        "temperature": round(float(temperature), 3),
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class LRUCacheTier:
+    """In-process LRU with TTL, entry-count and byte-size limits."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._size = 0
+        # key -> (expires_at, size, value)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+        self._size += size
+
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._size > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+
+class DatabaseCacheTier:
+    """Table-backed tier shared between workers."""
+
+    # Expired rows are pruned every N writes rather than on every write
+    PRUNE_EVERY = 100
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._writes = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(CompletionCacheEntry.value, CompletionCacheEntry.expires_at)
+                .where(CompletionCacheEntry.key == key)
+            )
+            row = result.first()
+
+        if row is None or _as_utc(row.expires_at) <= datetime.now(timezone.utc):
+            return None
+        return row.value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        async with AsyncSessionLocal() as session:
+            await session.merge(CompletionCacheEntry(key=key, value=value, expires_at=expires_at))
+            await session.commit()
+
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            await self.prune()
+
+    async def prune(self) -> None:
+        """Drop expired rows and trim the table to max_entries."""
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                delete(CompletionCacheEntry)
+                .where(CompletionCacheEntry.expires_at <= datetime.now(timezone.utc))
+            )
+            overflow = (
+                select(CompletionCacheEntry.key)
+                .order_by(CompletionCacheEntry.expires_at.desc())
+                .offset(self.max_entries)
+            )
+            await session.execute(
+                delete(CompletionCacheEntry)
+                .where(CompletionCacheEntry.key.in_(overflow.scalar_subquery()))
+            )
+            await session.commit()
+
+
+class CompletionCache:
+    """Two-tier completion cache with hit/miss counters."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        ttl_seconds: int = 3600,
+        max_entries: int = 1000,
+        max_bytes: int = 16 * 1024 * 1024,
+        persistent: bool = False
+    ):
+        self.enabled = enabled
+        self.memory = LRUCacheTier(max_entries, max_bytes, ttl_seconds)
+        self.database = DatabaseCacheTier(ttl_seconds, max_entries * 10) if persistent else None
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+
+        value = self.memory.get(key)
+        if value is None and self.database is not None:
+            try:
+                value = await self.database.get(key)
+            except Exception:
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        # Callers own the returned dict, so never hand out the cached instance
+        return copy.deepcopy(value)
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+
+        value = copy.deepcopy(value)
+        self.memory.set(key, value)
+        if self.database is not None:
+            try:
+                await self.database.set(key, value)
+            except Exception:
+                # The database tier is best-effort; the memory tier still holds the entry
+                pass
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.memory),
+            "size_bytes": self.memory.size_bytes,
+            "evictions": self.memory.evictions,
+            "persistent": self.database is not None,
+        }
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes even for timezone-aware columns
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+completion_cache = CompletionCache(
+    enabled=settings.completion_cache_enabled,
+    ttl_seconds=settings.completion_cache_ttl_seconds,
+    max_entries=settings.completion_cache_max_entries,
+    max_bytes=settings.completion_cache_max_bytes,
+    persistent=settings.completion_cache_persistent,
+)
@@ -0,0 +1,206 @@
+"""Token-budgeted conversation context with a rolling per-session summary.
+
+The prompt for a turn is packed as: system prompt, the session summary (if
+any), then as many of the most recent turns as fit in `context_token_budget`,
+then the new message. Turns that have slid out of the history window are
+folded into a persisted summary by a background task, so long-range context
+survives without resending whole itineraries every turn.
+"""
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import ChatMessage, ChatSummary
+from app.services.chat_history import MessageKey, after_message, message_key
+from app.services.llm_gateway import llm_gateway
+from app.utils.tokens import MESSAGE_OVERHEAD_TOKENS, count_message_tokens, count_tokens, truncate_to_tokens
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """You maintain a running summary of a travel planning conversation.
+Update the summary with the new messages below. Keep every fact that matters for
+planning: destinations discussed, dates, budget, travelers, preferences, decisions
+made and open questions. Drop pleasantries and full itinerary text. Be concise."""
+
+# Never cut an individual message below this many tokens when truncating
+MIN_MESSAGE_TOKENS = 50
+
+
+def pack_messages(
+    system_prompt: str,
+    message: str,
+    history: Optional[List[Dict]] = None,
+    summary: Optional[str] = None,
+    budget: Optional[int] = None
+) -> List[Dict]:
+    """Fit system prompt, summary, recent history and the new message into a token budget.
+
+    The system prompt and the new message are always kept. The summary and the
+    newest turns are added while they fit; an oversized turn is truncated
+    rather than dropped when it is the most recent one.
+    """
+    budget = budget or settings.context_token_budget
+    head = [{"role": "system", "content": system_prompt}]
+    if summary:
+        head.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+    tail = [{"role": "user", "content": message}]
+
+    remaining = budget - count_message_tokens(head) - count_message_tokens(tail)
+    if remaining < 0 and summary:
+        # The summary is the first thing to give up when the message itself is huge
+        head = head[:1]
+        remaining = budget - count_message_tokens(head) - count_message_tokens(tail)
+
+    recent: List[Dict] = []
+    for msg in reversed(history or []):
+        content = msg.get("content") or ""
+        cost = count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        if cost > remaining:
+            if not recent and remaining > MIN_MESSAGE_TOKENS:
+                recent.append({
+                    "role": msg.get("role", "user"),
+                    "content": truncate_to_tokens(content, remaining - MESSAGE_OVERHEAD_TOKENS)
+                })
+            break
+        recent.append({"role": msg.get("role", "user"), "content": content})
+        remaining -= cost
+
+    return head + list(reversed(recent)) + tail
+
+
+def transcript_chunk(messages: List[Tuple[Any, ...]], budget: int) -> Tuple[str, int]:
+    """Transcript of the leading messages that fit in `budget` tokens, and how many it holds.
+
+    A single message larger than the budget is truncated so every chunk makes progress.
+    """
+    lines: List[str] = []
+    used = 0
+    for role, content, *_ in messages:
+        line = f"{role}: {content}"
+        cost = count_tokens(line) + 1
+        if lines and used + cost > budget:
+            break
+        lines.append(line if lines else truncate_to_tokens(line, budget))
+        used += cost
+    return "\n".join(lines), len(lines)
+
+
+def covered_key(summary: Optional[ChatSummary]) -> Optional[MessageKey]:
+    if summary is None or summary.covered_until is None:
+        return None
+    return message_key(summary.covered_until, summary.covered_message_id)
+
+
+async def load_summary(db: AsyncSession, session_id: str) -> Tuple[Optional[str], Optional[MessageKey]]:
+    """The session summary and the key of the last message it covers."""
+    result = await db.execute(select(ChatSummary).where(ChatSummary.session_id == session_id))
+    row = result.scalar_one_or_none()
+    if row is None:
+        return None, None
+    return row.summary, covered_key(row)
+
+
+class SummaryRefresher:
+    """Refreshes session summaries in the background, at most one task per session."""
+
+    def __init__(self, window: int, refresh_every: int, max_tokens: int):
+        self.window = window
+        self.refresh_every = refresh_every
+        self.max_tokens = max_tokens
+        self._running: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def schedule(self, session_id: str, user_id: Optional[str] = None) -> None:
+        if session_id in self._running:
+            return
+        self._running.add(session_id)
+        task = asyncio.create_task(self._refresh(session_id, user_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, session_id: str, user_id: Optional[str]) -> None:
+        try:
+            await self.refresh(session_id, user_id)
+        except Exception:
+            logger.exception("Summary refresh failed for session %s", session_id)
+        finally:
+            self._running.discard(session_id)
+
+    async def refresh(self, session_id: str, user_id: Optional[str] = None) -> bool:
+        """Fold messages that left the history window into the summary.
+
+        Messages are summarized in chunks that fit `context_token_budget`, and
+        the covered key only advances past messages that were actually sent.
+        Only messages after the covered key are read, never the summarized prefix.
+        Returns True when the summary was updated.
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(ChatSummary).where(ChatSummary.session_id == session_id))
+            current = result.scalar_one_or_none()
+            after = covered_key(current)
+            unsummarized = ChatMessage.session_id == session_id, after_message(after)
+            result = await db.execute(select(func.count()).select_from(ChatMessage).where(*unsummarized))
+
+            # Everything outside the history window should end up in the summary
+            pending = result.scalar_one() - self.window
+            if pending < self.refresh_every:
+                return False
+
+            result = await db.execute(
+                select(ChatMessage.role, ChatMessage.content, ChatMessage.created_at, ChatMessage.id)
+                .where(*unsummarized)
+                .order_by(ChatMessage.created_at, ChatMessage.id)
+                .limit(pending)
+            )
+            new_messages = [tuple(row) for row in result.all()]
+
+        summary = current.summary if current else None
+        covered = (current.message_count or 0) if current else 0
+        while new_messages:
+            transcript, count = transcript_chunk(new_messages, settings.context_token_budget)
+            summary = await self._summarize(summary, transcript, user_id)
+            _, _, last_created_at, last_id = new_messages[count - 1]
+            new_messages = new_messages[count:]
+            covered += count
+
+            # Saved per chunk so a failure later on keeps the progress made
+            async with AsyncSessionLocal() as db:
+                row = await db.get(ChatSummary, session_id)
+                if row is None:
+                    row = ChatSummary(session_id=session_id)
+                    db.add(row)
+                row.summary = summary
+                row.message_count = covered
+                row.covered_until, row.covered_message_id = last_created_at, last_id
+                row.token_count = count_tokens(summary)
+                await db.commit()
+        return True
+
+    async def _summarize(self, summary: Optional[str], transcript: str, user_id: Optional[str]) -> str:
+        response = await llm_gateway.chat_completion(
+            user_id=user_id,
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": (
+                    f"Current summary:\n{summary or '(none)'}\n\n"
+                    f"New messages:\n{transcript}"
+                )}
+            ],
+            temperature=0.2,
+            max_tokens=self.max_tokens
+        )
+        return response.choices[0].message.content.strip()
+
+
+summary_refresher = SummaryRefresher(
+    window=settings.chat_history_window,
+    refresh_every=settings.summary_refresh_every,
+    max_tokens=settings.summary_max_tokens,
+)
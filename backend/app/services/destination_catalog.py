@@ -0,0 +1,344 @@
+"""Bundled destination catalog with an in-memory index and deterministic scoring.
+
+Best time to visit, daily budgets and highlights barely change, so instead of
+asking the model for them on every request they come from a curated file
+(app/data/destinations.json, one destination per line) built offline:
+
+    python -m app.services.destination_catalog build source.json
+    python -m app.services.destination_catalog check
+
+At startup the file is loaded into tuples plus bitmask indexes by country,
+climate, budget tier, best month and interest tag (bit i = destination i).
+Filtering is a few integer ANDs and scoring is a pass over the surviving
+bits, so a recommendation costs microseconds and the same preferences always
+give the same ranking. The model is only used afterwards to phrase reasons.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import json
+import re
+import sys
+
+from pydantic import BaseModel, Field, field_validator
+
+from app.config import get_settings
+from app.models.trip import BudgetTier, DailyBudget, DestinationPreferences, DestinationRecommendation
+
+settings = get_settings()
+
+BUNDLED_CATALOG = Path(__file__).resolve().parent.parent / "data" / "destinations.json"
+
+CLIMATES = ("tropical", "subtropical", "arid", "mediterranean", "temperate", "continental", "cold")
+TIERS = (BudgetTier.BUDGET, BudgetTier.MID_RANGE, BudgetTier.LUXURY)
+# Upper bound of the mid-range daily budget (USD) for each tier
+TIER_LIMITS = (90, 180)
+TIER_LABELS = {BudgetTier.BUDGET: "a tight", BudgetTier.MID_RANGE: "a mid-range", BudgetTier.LUXURY: "a luxury"}
+MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# Score weights; a score is the share of the weights of the given criteria earned
+WEIGHTS = {"interests": 40, "budget": 25, "month": 20, "climate": 15}
+NEAR_MATCH = 0.4  # adjacent budget tier or month
+
+
+class CatalogDestination(BaseModel):
+    """One destination as stored in the catalog file."""
+    name: str
+    country: str
+    region: str
+    climate: str
+    best_months: List[int] = Field(min_length=1)
+    daily_budget: DailyBudget
+    tags: List[str]
+    highlights: List[str]
+    pros: List[str]
+    cons: List[str]
+
+    @field_validator("climate")
+    @classmethod
+    def known_climate(cls, value: str) -> str:
+        value = value.strip().lower()
+        if value not in CLIMATES:
+            raise ValueError(f"climate must be one of {', '.join(CLIMATES)}")
+        return value
+
+    @field_validator("best_months")
+    @classmethod
+    def valid_months(cls, value: List[int]) -> List[int]:
+        if any(month < 1 or month > 12 for month in value):
+            raise ValueError("best_months must be 1-12")
+        return sorted(set(value))
+
+    @field_validator("tags")
+    @classmethod
+    def normal_tags(cls, value: List[str]) -> List[str]:
+        return list(dict.fromkeys(tag.strip().lower() for tag in value if tag.strip()))
+
+
+def tag_key(text: str) -> str:
+    """Lowercase singular form, so "Beaches" matches "beach" and "museums" matches "museum"."""
+    word = " ".join(text.lower().split())
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("es") and word[:-2].endswith(("s", "sh", "ch", "x")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def budget_tier(daily_budget: DailyBudget) -> BudgetTier:
+    for tier, limit in zip(TIERS, TIER_LIMITS):
+        if daily_budget.mid_range < limit:
+            return tier
+    return TIERS[-1]
+
+
+def month_ranges(months: Iterable[int]) -> str:
+    """[3, 4, 5, 9, 10] -> "Mar-May, Sep-Oct"; runs wrap over the new year."""
+    chosen = set(months)
+    if len(chosen) == 12:
+        return "Year-round"
+    # Start every run at a chosen month whose predecessor is not chosen
+    starts = sorted(month for month in chosen if (month - 2) % 12 + 1 not in chosen)
+    ranges = []
+    for start in starts:
+        end = start
+        while end % 12 + 1 in chosen:
+            end = end % 12 + 1
+        ranges.append(MONTHS[start - 1] if end == start else f"{MONTHS[start - 1]}-{MONTHS[end - 1]}")
+    return ", ".join(ranges)
+
+
+@dataclass(frozen=True)
+class Entry:
+    id: str
+    name: str
+    country: str
+    climate: str
+    tier: BudgetTier
+    tags: Tuple[str, ...]
+    best_time_to_visit: str
+    daily_budget: DailyBudget
+    highlights: Tuple[str, ...]
+    pros: Tuple[str, ...]
+    cons: Tuple[str, ...]
+
+
+class DestinationCatalog:
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else BUNDLED_CATALOG
+        self.entries: List[Entry] = []
+        self.all = 0
+        self.by_country: Dict[str, int] = {}
+        self.by_climate: Dict[str, int] = {}
+        self.by_tier: Dict[BudgetTier, int] = {}
+        self.by_month: Dict[int, int] = {}
+        self.by_tag: Dict[str, int] = {}
+        self.loaded = False
+
+    def load(self) -> "DestinationCatalog":
+        """(Re)build the index from the catalog file."""
+        records = [CatalogDestination.model_validate(item) for item in read_catalog(self.path)]
+        self.index(records)
+        return self
+
+    def index(self, records: List[CatalogDestination]) -> None:
+        entries: List[Entry] = []
+        by_country: Dict[str, int] = {}
+        by_climate: Dict[str, int] = {}
+        by_tier: Dict[BudgetTier, int] = {}
+        by_month: Dict[int, int] = {}
+        by_tag: Dict[str, int] = {}
+
+        for position, record in enumerate(records):
+            bit = 1 << position
+            tier = budget_tier(record.daily_budget)
+            entries.append(Entry(
+                id=f"dest_{slug(record.name)}-{slug(record.country)}",
+                name=record.name,
+                country=record.country,
+                climate=record.climate,
+                tier=tier,
+                tags=tuple(record.tags),
+                best_time_to_visit=month_ranges(record.best_months),
+                daily_budget=record.daily_budget,
+                highlights=tuple(record.highlights),
+                pros=tuple(record.pros),
+                cons=tuple(record.cons),
+            ))
+            by_country[record.country.lower()] = by_country.get(record.country.lower(), 0) | bit
+            by_climate[record.climate] = by_climate.get(record.climate, 0) | bit
+            by_tier[tier] = by_tier.get(tier, 0) | bit
+            for month in record.best_months:
+                by_month[month] = by_month.get(month, 0) | bit
+            for tag in record.tags:
+                by_tag[tag_key(tag)] = by_tag.get(tag_key(tag), 0) | bit
+
+        self.entries = entries
+        self.all = (1 << len(entries)) - 1
+        self.by_country, self.by_climate, self.by_tier = by_country, by_climate, by_tier
+        self.by_month, self.by_tag = by_month, by_tag
+        self.loaded = True
+
+    def _ensure_loaded(self) -> None:
+        if not self.loaded:
+            self.load()
+
+    def recommend(self, preferences: DestinationPreferences) -> List[DestinationRecommendation]:
+        """Best `preferences.count` catalog destinations, highest score first.
+
+        Country is a hard filter; interests, budget tier, month and climate
+        add to the score. Ties keep catalog order. Empty when no destination
+        is in the requested country.
+        """
+        self._ensure_loaded()
+        candidates = self.all
+        if preferences.country:
+            candidates &= self.by_country.get(preferences.country.strip().lower(), 0)
+        if not candidates:
+            return []
+
+        # One entry per distinct tag, reported back in the user's own words
+        interests = {tag_key(interest): interest.strip() for interest in reversed(preferences.interests) if interest.strip()}
+        interest_masks = [(interest, self.by_tag.get(key, 0)) for key, interest in reversed(interests.items())]
+
+        tier_masks: List[Tuple[int, float]] = []
+        if preferences.budget:
+            wanted = TIERS.index(preferences.budget)
+            tier_masks = [
+                (self.by_tier.get(tier, 0), 1.0 if index == wanted else NEAR_MATCH)
+                for index, tier in enumerate(TIERS) if abs(index - wanted) <= 1
+            ]
+
+        month_masks: List[Tuple[int, float]] = []
+        if preferences.month:
+            month = preferences.month
+            month_masks = [(self.by_month.get(month, 0), 1.0)] + [
+                (self.by_month.get(near, 0), NEAR_MATCH)
+                for near in ((month - 2) % 12 + 1, month % 12 + 1)
+            ]
+
+        climate_mask = self.by_climate.get(preferences.climate.strip().lower(), 0) if preferences.climate else None
+
+        possible = (
+            (WEIGHTS["interests"] if interests else 0)
+            + (WEIGHTS["budget"] if preferences.budget else 0)
+            + (WEIGHTS["month"] if preferences.month else 0)
+            + (WEIGHTS["climate"] if preferences.climate else 0)
+        )
+
+        scored = []
+        remaining = candidates
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            position = bit.bit_length() - 1
+
+            matched = [interest for interest, mask in interest_masks if mask & bit]
+            earned = WEIGHTS["interests"] * len(matched) / len(interests) if interests else 0.0
+            tier_share = max((share for mask, share in tier_masks if mask & bit), default=0.0)
+            month_share = max((share for mask, share in month_masks if mask & bit), default=0.0)
+            earned += WEIGHTS["budget"] * tier_share + WEIGHTS["month"] * month_share
+            climate_matched = climate_mask is not None and bool(climate_mask & bit)
+            earned += WEIGHTS["climate"] if climate_matched else 0
+
+            score = round(100 * earned / possible) if possible else 50
+            scored.append((-score, position, matched, tier_share, month_share, climate_matched))
+
+        scored.sort(key=lambda item: (item[0], item[1]))
+        return [
+            self._recommendation(self.entries[position], -negative, matched, tier_share, month_share, climate_matched, preferences)
+            for negative, position, matched, tier_share, month_share, climate_matched in scored[:preferences.count]
+        ]
+
+    def _recommendation(
+        self,
+        entry: Entry,
+        score: int,
+        matched: List[str],
+        tier_share: float,
+        month_share: float,
+        climate_matched: bool,
+        preferences: DestinationPreferences
+    ) -> DestinationRecommendation:
+        reasons = []
+        if matched:
+            reasons.append(f"Great for {', '.join(matched)}")
+        if tier_share == 1.0:
+            reasons.append(f"Fits {TIER_LABELS[entry.tier]} budget (about {entry.daily_budget.mid_range:.0f} USD a day mid-range)")
+        if month_share == 1.0:
+            reasons.append(f"{MONTHS[preferences.month - 1]} is one of the best months to visit")
+        elif month_share:
+            reasons.append(f"{MONTHS[preferences.month - 1]} is just outside the best season ({entry.best_time_to_visit})")
+        if climate_matched:
+            reasons.append(f"{entry.climate.capitalize()} climate")
+        if not reasons:
+            reasons.append(f"Popular {entry.climate} destination in {entry.country}")
+
+        return DestinationRecommendation(
+            id=entry.id,
+            name=entry.name,
+            country=entry.country,
+            match_score=score,
+            match_reasons=reasons,
+            best_time_to_visit=entry.best_time_to_visit,
+            daily_budget=entry.daily_budget,
+            highlights=list(entry.highlights),
+            pros=list(entry.pros),
+            cons=list(entry.cons),
+        )
+
+
+def read_catalog(path: Path) -> List[dict]:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def build_catalog(records: List[dict]) -> List[dict]:
+    """Validate and normalize source records; later duplicates (same name and country) win."""
+    destinations: Dict[Tuple[str, str], dict] = {}
+    for item in records:
+        record = CatalogDestination.model_validate(item)
+        key = (record.name.lower(), record.country.lower())
+        destinations.pop(key, None)
+        destinations[key] = record.model_dump(mode="json")
+    return list(destinations.values())
+
+
+def write_catalog(records: List[dict], path: Path) -> None:
+    """One destination per line: compact, but diffs stay readable."""
+    lines = ",\n".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) for record in records)
+    path.write_text(f"[\n{lines}\n]\n", encoding="utf-8")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or check the bundled destination catalog")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Validate a source JSON list and write the catalog")
+    build.add_argument("source", type=Path)
+    build.add_argument("-o", "--output", type=Path, default=BUNDLED_CATALOG)
+    check = commands.add_parser("check", help="Validate a catalog file")
+    check.add_argument("path", type=Path, nargs="?", default=BUNDLED_CATALOG)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        records = build_catalog(read_catalog(args.source))
+        write_catalog(records, args.output)
+        print(f"Wrote {len(records)} destinations to {args.output}")
+    else:
+        catalog = DestinationCatalog(args.path).load()
+        print(f"{len(catalog.entries)} destinations, {len(catalog.by_country)} countries, {len(catalog.by_tag)} tags")
+    return 0
+
+
+destination_catalog = DestinationCatalog(settings.destination_catalog_path or None)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Partial itinerary edits.
+
+Shortcut operations (move_activity, edit_activity, add_day) are expanded to
+RFC 6902 JSON Patch against the document as it stands at that point of the
+request, so history only ever stores plain JSON Patch. After applying, only
+the days an edit touched are validated against ItineraryDay; operations on
+anything outside /days/<n>/... validate the whole document.
+"""
+from typing import Any, Dict, List, Tuple
+import copy
+
+from app.models.itinerary import (
+    Activity,
+    AddDay,
+    EditActivity,
+    ItineraryData,
+    ItineraryDay,
+    JsonPatchOperation,
+    MoveActivity,
+    TimeSlot,
+)
+from app.utils.json_patch import JsonPatchError, apply_patch, parse_pointer
+
+
+def _find_activity(data: Dict, activity_id: str) -> Tuple[int, int]:
+    for day_index, day in enumerate(data.get("days", [])):
+        for activity_index, activity in enumerate(day.get("activities", [])):
+            if activity.get("id") == activity_id:
+                return day_index, activity_index
+    raise JsonPatchError(f"Activity not found: {activity_id}")
+
+
+def _find_day(data: Dict, day_number: int) -> int:
+    for day_index, day in enumerate(data.get("days", [])):
+        if day.get("day_number") == day_number:
+            return day_index
+    raise JsonPatchError(f"Day not found: {day_number}")
+
+
+def expand_operation(data: Dict, operation) -> List[Dict[str, Any]]:
+    """JSON Patch for one request operation against the current document."""
+    if isinstance(operation, JsonPatchOperation):
+        return [operation.model_dump(by_alias=True, exclude_unset=True)]
+
+    if isinstance(operation, MoveActivity):
+        day_index, activity_index = _find_activity(data, operation.activity_id)
+        target_day = _find_day(data, operation.to_day)
+        remaining = len(data["days"][target_day]["activities"]) - (target_day == day_index)
+        position = remaining if operation.to_index is None else operation.to_index
+        if not 0 <= position <= remaining:
+            raise JsonPatchError(f"to_index out of range: {operation.to_index}")
+        target = f"/days/{target_day}/activities/{position}"
+        patch = [{"op": "move", "from": f"/days/{day_index}/activities/{activity_index}", "path": target}]
+        if operation.time_slot is not None:
+            patch.append({"op": "replace", "path": f"{target}/time_slot", "value": operation.time_slot.value})
+        return patch
+
+    if isinstance(operation, EditActivity):
+        unknown = set(operation.changes) - (set(Activity.model_fields) - {"id"})
+        if unknown:
+            raise JsonPatchError(f"Cannot edit activity fields: {', '.join(sorted(unknown))}")
+        day_index, activity_index = _find_activity(data, operation.activity_id)
+        activity = data["days"][day_index]["activities"][activity_index]
+        path = f"/days/{day_index}/activities/{activity_index}"
+        return [
+            {"op": "replace" if field in activity else "add", "path": f"{path}/{field}", "value": value}
+            for field, value in operation.changes.items()
+        ]
+
+    if isinstance(operation, AddDay):
+        if any(day.get("day_number") == operation.day.day_number for day in data.get("days", [])):
+            raise JsonPatchError(f"Day {operation.day.day_number} already exists")
+        return [{"op": "add", "path": "/days/-", "value": operation.day.model_dump(mode="json")}]
+
+    raise JsonPatchError(f"Unsupported operation: {operation.op}")
+
+
+def validate_patched(data: Dict, patch: List[Dict[str, Any]]) -> None:
+    """Validate what `patch` touched; raises pydantic.ValidationError."""
+    touched, whole = set(), False
+    for operation in patch:
+        if operation["op"] == "test":
+            continue
+        for pointer in (operation["path"], operation.get("from")):
+            if pointer is None:
+                continue
+            tokens = parse_pointer(pointer)
+            if len(tokens) >= 3 and tokens[0] == "days" and tokens[1].isdigit():
+                touched.add(int(tokens[1]))
+            else:
+                whole = True
+
+    if whole:
+        ItineraryData.model_validate(data)
+        return
+    for day_index in sorted(touched):
+        ItineraryDay.model_validate(data["days"][day_index])
+
+
+def apply_operations(data: Dict, operations) -> Tuple[Dict, List[Dict[str, Any]]]:
+    """Apply request operations; returns the new document and the equivalent JSON Patch.
+
+    Raises JsonPatchError (JsonPatchTestFailed for a failed `test`) or
+    pydantic.ValidationError; `data` itself is never modified.
+    """
+    data = copy.deepcopy(data)
+    patch: List[Dict[str, Any]] = []
+    for operation in operations:
+        expanded = expand_operation(data, operation)
+        data = apply_patch(data, expanded, in_place=True)
+        patch.extend(expanded)
+    validate_patched(data, patch)
+    return data, patch
+
+
+SLOT_ORDER = {slot.value: index for index, slot in enumerate(TimeSlot)}
+
+
+def _activities_cost(activities: List[Dict]) -> float:
+    return sum(activity.get("cost") or 0 for activity in activities)
+
+
+def replace_day(data: Dict, day_index: int, day: Dict) -> Dict:
+    """Copy of `data` with one day replaced and the total cost adjusted."""
+    data = copy.deepcopy(data)
+    previous = data["days"][day_index]
+    data["days"][day_index] = day
+    data["total_estimated_cost"] = (
+        (data.get("total_estimated_cost") or 0) - (previous.get("daily_cost") or 0) + day["daily_cost"]
+    )
+    return data
+
+
+def replace_time_slot(data: Dict, day_index: int, time_slot: str, activities: List[Dict]) -> Dict:
+    """Copy of `data` with one time slot of a day replaced and the costs adjusted."""
+    data = copy.deepcopy(data)
+    day = data["days"][day_index]
+    removed = [activity for activity in day.get("activities", []) if activity.get("time_slot") == time_slot]
+    kept = [activity for activity in day.get("activities", []) if activity.get("time_slot") != time_slot]
+    day["activities"] = sorted(kept + activities, key=lambda activity: SLOT_ORDER.get(activity.get("time_slot"), 0))
+
+    delta = _activities_cost(activities) - _activities_cost(removed)
+    day["daily_cost"] = (day.get("daily_cost") or 0) + delta
+    data["total_estimated_cost"] = (data.get("total_estimated_cost") or 0) + delta
+    return data
@@ -0,0 +1,179 @@
+"""Itinerary version history.
+
+Every write appends an itinerary_versions row holding the JSON Patch from the
+previous version, and every `itinerary_snapshot_every` versions the row also
+carries the full document. A version is rebuilt from the nearest snapshot at
+or below it plus the patches after it, so full history costs a few documents
+plus the edits instead of one copy per version. Itineraries written before
+history existed get a baseline snapshot of their document on the next write.
+
+Compaction runs when a snapshot is written: once more than
+`itinerary_history_max_versions` versions exist, the oldest kept version is
+made a snapshot and everything before it is deleted.
+"""
+from typing import Any, Dict, List, Optional
+import copy
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.db.models import Itinerary, ItineraryVersion
+from app.utils.json_patch import JsonPatchError, apply_patch, diff_documents
+
+settings = get_settings()
+
+
+def record_created(db: AsyncSession, itinerary_id: str, data: Dict, user_id: Optional[str] = None) -> None:
+    """History for a new itinerary: a snapshot of version 1."""
+    db.add(ItineraryVersion(itinerary_id=itinerary_id, version=1, snapshot=data, user_id=user_id))
+
+
+async def record_write(
+    db: AsyncSession,
+    itinerary_id: str,
+    version: int,
+    previous: Dict,
+    data: Dict,
+    patch: Optional[List[Dict[str, Any]]] = None,
+    user_id: Optional[str] = None
+) -> None:
+    """Record the write that took the itinerary from `version` (`previous`) to version + 1.
+
+    `patch` defaults to a diff of the two documents.
+    """
+    has_previous = await db.scalar(
+        select(ItineraryVersion.id).where(
+            ItineraryVersion.itinerary_id == itinerary_id,
+            ItineraryVersion.version == version
+        )
+    )
+    if has_previous is None:
+        db.add(ItineraryVersion(itinerary_id=itinerary_id, version=version, snapshot=previous))
+
+    new_version = version + 1
+    every = settings.itinerary_snapshot_every
+    snapshot = data if every > 0 and new_version % every == 0 else None
+    db.add(ItineraryVersion(
+        itinerary_id=itinerary_id,
+        version=new_version,
+        patch=diff_documents(previous, data) if patch is None else patch,
+        snapshot=snapshot,
+        user_id=user_id
+    ))
+    if snapshot is not None and settings.itinerary_history_max_versions > 0:
+        await compact_history(db, itinerary_id, settings.itinerary_history_max_versions)
+
+
+async def save_itinerary_version(
+    db: AsyncSession,
+    itinerary: Itinerary,
+    data: Dict,
+    user_id: Optional[str] = None,
+    patch: Optional[List[Dict[str, Any]]] = None
+) -> bool:
+    """Write `data` as the next version if the itinerary is still at the version it was read at.
+
+    Records the write in history. Returns False when another write got there
+    first. The caller is responsible for committing.
+    """
+    expected, previous = itinerary.version, itinerary.data
+    result = await db.execute(
+        update(Itinerary)
+        .where(Itinerary.id == itinerary.id, Itinerary.version == expected)
+        .values(data=data, version=Itinerary.version + 1)
+    )
+    if result.rowcount == 0:
+        return False
+    await record_write(db, itinerary.id, expected, previous, data, patch=patch, user_id=user_id)
+    return True
+
+
+async def load_version(db: AsyncSession, itinerary_id: str, version: int) -> Dict:
+    """Rebuild the document at `version` from the nearest snapshot and the patches after it."""
+    result = await db.execute(
+        select(ItineraryVersion.version, ItineraryVersion.snapshot)
+        .where(
+            ItineraryVersion.itinerary_id == itinerary_id,
+            ItineraryVersion.version <= version,
+            ItineraryVersion.snapshot.is_not(None)
+        )
+        .order_by(ItineraryVersion.version.desc())
+        .limit(1)
+    )
+    base = result.one_or_none()
+    if base is None:
+        raise HTTPException(status_code=404, detail="Version not found")
+
+    result = await db.execute(
+        select(ItineraryVersion.patch)
+        .where(
+            ItineraryVersion.itinerary_id == itinerary_id,
+            ItineraryVersion.version > base.version,
+            ItineraryVersion.version <= version
+        )
+        .order_by(ItineraryVersion.version)
+    )
+    patches = result.scalars().all()
+    if len(patches) != version - base.version:
+        raise HTTPException(status_code=404, detail="Version not found")
+
+    data = copy.deepcopy(base.snapshot)
+    try:
+        for patch in patches:
+            data = apply_patch(data, patch, in_place=True)
+    except JsonPatchError:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return data
+
+
+async def document_at(db: AsyncSession, itinerary: Itinerary, version: int) -> Dict:
+    if version == itinerary.version:
+        return itinerary.data
+    if not 1 <= version < itinerary.version:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return await load_version(db, itinerary.id, version)
+
+
+async def list_versions(db: AsyncSession, itinerary_id: str) -> List[Any]:
+    result = await db.execute(
+        select(
+            ItineraryVersion.version,
+            ItineraryVersion.user_id,
+            ItineraryVersion.created_at,
+            ItineraryVersion.snapshot.is_not(None).label("snapshot")
+        )
+        .where(ItineraryVersion.itinerary_id == itinerary_id)
+        .order_by(ItineraryVersion.version.desc())
+    )
+    return result.all()
+
+
+async def compact_history(db: AsyncSession, itinerary_id: str, keep: int) -> None:
+    """Keep the newest `keep` versions; the oldest kept one becomes a snapshot."""
+    floor = await db.scalar(
+        select(ItineraryVersion.version)
+        .where(ItineraryVersion.itinerary_id == itinerary_id)
+        .order_by(ItineraryVersion.version.desc())
+        .offset(keep - 1)
+        .limit(1)
+    )
+    if floor is None:
+        return
+    oldest = await db.scalar(
+        select(func.min(ItineraryVersion.version)).where(ItineraryVersion.itinerary_id == itinerary_id)
+    )
+    if oldest >= floor:
+        return
+
+    data = await load_version(db, itinerary_id, floor)
+    await db.execute(
+        update(ItineraryVersion)
+        .where(ItineraryVersion.itinerary_id == itinerary_id, ItineraryVersion.version == floor)
+        .values(snapshot=data)
+    )
+    await db.execute(
+        delete(ItineraryVersion)
+        .where(ItineraryVersion.itinerary_id == itinerary_id, ItineraryVersion.version < floor)
+    )
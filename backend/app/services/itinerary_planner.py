@@ -0,0 +1,251 @@
+"""Itinerary generation planned as a skeleton plus concurrent day chunks.
+
+A single completion capped at max_tokens truncates itineraries longer than
+about five days. Trips longer than `itinerary_chunk_days` are planned in two
+steps instead: one cheap call for a per-day theme skeleton and trip notes,
+then one call per chunk of days, run concurrently under
+`itinerary_fanout_concurrency`. Every chunk sees the whole skeleton so days
+do not repeat each other, and its token cap scales with its length. Dates
+come from the trip, not the model. A chunk that fails twice becomes empty
+days plus a note instead of sinking the whole itinerary.
+
+Completions are cached like chat completions, so an identical request is
+answered from the cache; `cache=False` (regeneration) always asks the model.
+Chunk retries never read the cache.
+"""
+from datetime import date, timedelta
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+import asyncio
+import json
+
+from pydantic import BaseModel, ValidationError
+
+from app.config import get_settings
+from app.models.itinerary import ItineraryData, ItineraryDay
+from app.services.agent_service import (
+    day_json_shape,
+    generate_itinerary_for_trip,
+    json_instructions,
+    stream_itinerary_for_trip,
+    structured_completion,
+)
+
+settings = get_settings()
+
+CHUNK_ATTEMPTS = 2
+SKELETON_TOKENS_PER_DAY = 40
+
+
+def trip_dates(trip) -> Optional[List[str]]:
+    """ISO dates of every day of the trip, or None when the dates don't parse."""
+    try:
+        start, end = date.fromisoformat(str(trip.start_date)), date.fromisoformat(str(trip.end_date))
+    except ValueError:
+        return None
+    if end < start:
+        return None
+    return [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+
+
+def _trip_context(trip, preferences: Optional[Dict]) -> str:
+    return f"""Destination: {trip.destination}
+Dates: {trip.start_date} to {trip.end_date}
+Number of Travelers: {trip.travelers}
+Budget: {trip.budget} {trip.currency}
+Notes: {trip.notes or 'None'}
+{"Additional preferences: " + json.dumps(preferences) if preferences else ""}"""
+
+
+class DayTheme(BaseModel):
+    day_number: int
+    theme: str
+
+
+class ItinerarySkeleton(BaseModel):
+    days: List[DayTheme]
+    notes: List[str]
+
+
+class ItineraryChunk(BaseModel):
+    days: List[ItineraryDay]
+
+
+async def plan_skeleton(
+    trip,
+    dates: List[str],
+    preferences: Optional[Dict] = None,
+    cache: bool = True
+) -> Dict[str, Any]:
+    """Per-day themes and trip notes; empty themes when the call fails."""
+    prompt = f"""Outline a {len(dates)}-day itinerary. Give each day a short, distinct theme.
+
+{_trip_context(trip, preferences)}
+
+{json_instructions('{"days": [{"day_number": 1, "theme": "Day theme"}], "notes": ["Tip 1", "Tip 2"]}')}"""
+    parsed = await structured_completion(
+        prompt, ItinerarySkeleton, SKELETON_TOKENS_PER_DAY * len(dates) + 200,
+        getattr(trip, "user_id", None), cache=cache
+    )
+
+    themes: Dict[int, str] = {}
+    notes: List[str] = []
+    if isinstance(parsed, dict):
+        for item in parsed.get("days") or []:
+            if isinstance(item, dict) and isinstance(item.get("day_number"), int):
+                themes[item["day_number"]] = str(item.get("theme") or "")
+        notes = [str(note) for note in parsed.get("notes") or []]
+    return {
+        "days": [
+            {"day_number": number, "date": day, "theme": themes.get(number)}
+            for number, day in enumerate(dates, start=1)
+        ],
+        "notes": notes,
+    }
+
+
+def _placeholder_day(outline: Dict) -> Dict:
+    return {**outline, "activities": [], "meals": [], "daily_cost": 0}
+
+
+async def generate_chunk(
+    trip,
+    skeleton: Dict[str, Any],
+    chunk: List[Dict],
+    preferences: Optional[Dict] = None,
+    cache: bool = True
+) -> List[Dict]:
+    """Days of one chunk, validated and in order; days still missing after retries are placeholders."""
+    first, last = chunk[0]["day_number"], chunk[-1]["day_number"]
+    outline = "\n".join(
+        f"Day {day['day_number']} ({day['date']}): {day['theme'] or 'open'}" for day in skeleton["days"]
+    )
+    prompt = f"""Plan days {first} to {last} of a {len(skeleton['days'])}-day trip in detail.
+
+{_trip_context(trip, preferences)}
+
+Outline of the whole trip (plan only days {first}-{last}, follow their themes, do not repeat other days):
+{outline}
+
+{json_instructions('{"days": [' + day_json_shape(first, chunk[0]['date']) + ']}')}"""
+
+    days: Dict[int, Dict] = {}
+    for attempt in range(CHUNK_ATTEMPTS):
+        parsed = await structured_completion(
+            prompt, ItineraryChunk, settings.itinerary_day_max_tokens * len(chunk),
+            getattr(trip, "user_id", None), cache=cache and attempt == 0
+        )
+        items = parsed.get("days") if isinstance(parsed, dict) else None
+        wanted = {day["day_number"]: day for day in chunk}
+        for position, item in enumerate(items or []):
+            if not isinstance(item, dict):
+                continue
+            # Match by day_number; fall back to position when the model left it out
+            number = item.get("day_number")
+            if not isinstance(number, int) and position < len(chunk):
+                number = chunk[position]["day_number"]
+            if number not in wanted or number in days:
+                continue
+            expected = wanted[number]
+            try:
+                day = ItineraryDay.model_validate({
+                    **item,
+                    "day_number": expected["day_number"],
+                    "date": expected["date"],
+                    "theme": item.get("theme") or expected["theme"],
+                }).model_dump(mode="json")
+            except ValidationError:
+                continue
+            days[day["day_number"]] = day
+        if len(days) == len(chunk):
+            break
+    return [days.get(outline["day_number"]) or _placeholder_day(outline) for outline in chunk]
+
+
+def merge_itinerary(trip, days: List[Dict], notes: List[str]) -> Dict:
+    """Assemble and validate the full itinerary with unique activity ids."""
+    for day in days:
+        for index, activity in enumerate(day["activities"], start=1):
+            activity["id"] = f"act_{day['day_number']}_{index}"
+    missing = [day["day_number"] for day in days if not day["activities"] and not day["meals"]]
+    if missing:
+        notes = notes + [
+            f"{'Day' if len(missing) == 1 else 'Days'} {', '.join(map(str, missing))} could not be planned "
+            "automatically; regenerate them to try again."
+        ]
+    # Trips may be planned before their destination is set
+    return ItineraryData.model_validate({
+        "destination": trip.destination or "",
+        "start_date": str(trip.start_date or ""),
+        "end_date": str(trip.end_date or ""),
+        "days": days,
+        "total_estimated_cost": sum(day["daily_cost"] for day in days),
+        "notes": notes,
+    }).model_dump(mode="json")
+
+
+async def _plan_chunks(trip, dates: List[str], preferences: Optional[Dict], cache: bool):
+    """The skeleton, its days split into chunks, and a runner generating one chunk under the fan-out limit."""
+    chunk_days = max(settings.itinerary_chunk_days, 1)
+    if len(dates) <= chunk_days:
+        skeleton = {
+            "days": [{"day_number": number, "date": day, "theme": None} for number, day in enumerate(dates, start=1)],
+            "notes": [],
+        }
+    else:
+        skeleton = await plan_skeleton(trip, dates, preferences, cache=cache)
+
+    chunks = [skeleton["days"][index:index + chunk_days] for index in range(0, len(dates), chunk_days)]
+    semaphore = asyncio.Semaphore(max(settings.itinerary_fanout_concurrency, 1))
+
+    async def run(chunk: List[Dict]) -> List[Dict]:
+        async with semaphore:
+            return await generate_chunk(trip, skeleton, chunk, preferences, cache=cache)
+
+    return skeleton, chunks, run
+
+
+async def generate_itinerary(trip, preferences: Optional[Dict] = None, cache: bool = True) -> Dict:
+    """Generate a full itinerary: one call for short trips, skeleton + fan-out otherwise."""
+    dates = trip_dates(trip)
+    if not dates:
+        return await generate_itinerary_for_trip(trip, preferences, cache=cache)
+
+    skeleton, chunks, run = await _plan_chunks(trip, dates, preferences, cache)
+    results = await asyncio.gather(*(run(chunk) for chunk in chunks))
+    return merge_itinerary(trip, [day for days in results for day in days], skeleton["notes"])
+
+
+async def stream_itinerary(
+    trip,
+    preferences: Optional[Dict] = None
+) -> AsyncGenerator[Tuple[str, Any], None]:
+    """Stream an itinerary, planning trips longer than one chunk with the fan-out.
+
+    Short or undated trips stream from a single call: ("day", day) per day,
+    then ("complete", itinerary). Longer trips yield ("skeleton", days) with
+    placeholder days once the outline is planned, ("chunk", days) as each
+    chunk finishes (in completion order, not day order), then ("complete", itinerary).
+    """
+    dates = trip_dates(trip)
+    if not dates or len(dates) <= max(settings.itinerary_chunk_days, 1):
+        async for event in stream_itinerary_for_trip(trip, preferences):
+            yield event
+        return
+
+    skeleton, chunks, run = await _plan_chunks(trip, dates, preferences, cache=True)
+    days = [_placeholder_day(outline) for outline in skeleton["days"]]
+    yield "skeleton", list(days)
+
+    tasks = [asyncio.ensure_future(run(chunk)) for chunk in chunks]
+    try:
+        for task in asyncio.as_completed(tasks):
+            generated = await task
+            for day in generated:
+                days[day["day_number"] - 1] = day
+            yield "chunk", generated
+    finally:
+        # The client may disconnect mid-stream
+        for task in tasks:
+            task.cancel()
+
+    yield "complete", merge_itinerary(trip, days, skeleton["notes"])
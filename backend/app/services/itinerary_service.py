@@ -0,0 +1,94 @@
+"""Itinerary generation and persistence shared by the itinerary routes."""
+from types import SimpleNamespace
+from typing import Dict, Optional
+import hashlib
+import json
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import Itinerary
+from app.services.itinerary_history import record_created, save_itinerary_version
+from app.services.itinerary_planner import generate_itinerary
+from app.services.single_flight import SingleFlight
+
+# Trip fields that feed the generation prompt
+TRIP_PROMPT_FIELDS = (
+    "id", "destination", "start_date", "end_date",
+    "travelers", "budget", "currency", "notes",
+)
+
+itinerary_flights = SingleFlight()
+
+
+def _digest(value) -> str:
+    raw = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def snapshot_trip(trip) -> SimpleNamespace:
+    """Copy the prompt fields off a Trip so generation does not touch the ORM session."""
+    fields = {field: getattr(trip, field) for field in TRIP_PROMPT_FIELDS}
+    return SimpleNamespace(user_id=getattr(trip, "user_id", None), **fields)
+
+
+def itinerary_generation_key(trip, preferences: Optional[Dict] = None, regenerate: bool = False) -> str:
+    """Key identifying an itinerary generation: (trip_id, trip fields, preferences, regenerate)."""
+    fields = {field: getattr(trip, field) for field in TRIP_PROMPT_FIELDS}
+    return f"{trip.id}:{_digest(fields)}:{_digest(preferences or {})}:{int(regenerate)}"
+
+
+async def save_itinerary_data(
+    db: AsyncSession,
+    trip_id: str,
+    data: Dict,
+    user_id: Optional[str] = None
+) -> str:
+    """Create or overwrite a trip's itinerary as its next version, recording history.
+
+    Returns the itinerary id. The caller is responsible for committing.
+    """
+    for _ in range(3):
+        result = await db.execute(
+            select(Itinerary)
+            .where(Itinerary.trip_id == trip_id)
+            .execution_options(populate_existing=True)
+        )
+        itinerary = result.scalar_one_or_none()
+
+        if itinerary is None:
+            itinerary = Itinerary(trip_id=trip_id, data=data, version=1)
+            db.add(itinerary)
+            await db.flush()
+            record_created(db, itinerary.id, data, user_id)
+            return itinerary.id
+
+        # Lost a race with another write: re-read and go again
+        if await save_itinerary_version(db, itinerary, data, user_id):
+            return itinerary.id
+    raise RuntimeError(f"Itinerary for trip {trip_id} kept changing while saving")
+
+
+async def generate_and_save_itinerary(
+    trip,
+    preferences: Optional[Dict] = None,
+    regenerate: bool = False
+) -> str:
+    """Generate and persist an itinerary, deduplicating concurrent identical requests.
+
+    Callers that arrive while an identical generation is in flight await that
+    run instead of starting their own, so only one LLM call and one version
+    bump happen. `regenerate` bypasses the completion cache so the user gets
+    a new plan rather than the cached one. Returns the itinerary id.
+    """
+    snapshot = snapshot_trip(trip)
+
+    async def run() -> str:
+        itinerary_data = await generate_itinerary(snapshot, preferences, cache=not regenerate)
+        async with AsyncSessionLocal() as session:
+            itinerary_id = await save_itinerary_data(session, snapshot.id, itinerary_data, snapshot.user_id)
+            await session.commit()
+        return itinerary_id
+
+    return await itinerary_flights.do(itinerary_generation_key(snapshot, preferences, regenerate), run)
@@ -0,0 +1,277 @@
+"""In-process background job queue.
+
+Long-running work (itinerary generation) is recorded in the jobs table and
+executed by a bounded pool of asyncio workers, so HTTP handlers can return
+202 Accepted immediately instead of holding a request and a DB session open
+for the whole LLM call. Progress is persisted on every transition and fanned
+out to SSE subscribers in this process.
+
+Every process has its own queue, so each job row records the worker that
+owns it, and that worker refreshes `heartbeat_at` on its unfinished jobs.
+Only jobs whose heartbeat went stale (their process died) are failed at
+startup and on every heartbeat; live jobs of other workers are left alone.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from sqlalchemy import or_, select, update
+
+from app.config import get_settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import GenerationJob, Trip
+from app.models.job import JobEvent, JobStatus
+from app.services.itinerary_service import generate_and_save_itinerary
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED}
+
+# A handler receives the job row and a progress callback and returns a result id
+JobHandler = Callable[[GenerationJob, Callable[..., Awaitable[None]]], Awaitable[Optional[str]]]
+
+
+class JobQueue:
+    def __init__(
+        self,
+        workers: int,
+        max_size: int,
+        heartbeat_seconds: float = 15.0,
+        stale_seconds: float = 60.0
+    ):
+        self.workers = workers
+        self.max_size = max_size
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        # Slots held by submits that are still inserting their row
+        self._reserved = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self.handlers[kind] = handler
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        await self._fail_stale_jobs()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._heartbeat_loop(), name="job-heartbeat"))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(
+        self,
+        kind: str,
+        user_id: str,
+        trip_id: Optional[str] = None,
+        params: Optional[dict] = None
+    ) -> GenerationJob:
+        """Record a job and queue it. Raises asyncio.QueueFull when saturated."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._queue is None or (self.max_size > 0 and self._queue.qsize() + self._reserved >= self.max_size):
+            raise asyncio.QueueFull()
+
+        # Hold the slot across the awaited insert so concurrent submits cannot
+        # overfill the queue and leave a committed row that is never queued
+        self._reserved += 1
+        try:
+            async with AsyncSessionLocal() as session:
+                job = GenerationJob(
+                    user_id=user_id,
+                    trip_id=trip_id,
+                    kind=kind,
+                    status=JobStatus.QUEUED.value,
+                    progress=0,
+                    message="Queued",
+                    params=params,
+                    worker_id=self.worker_id,
+                    heartbeat_at=datetime.now(timezone.utc),
+                )
+                session.add(job)
+                await session.commit()
+                await session.refresh(job)
+        finally:
+            self._reserved -= 1
+
+        self._queue.put_nowait(job.id)
+        return job
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[job_id]
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception("Job %s crashed", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(GenerationJob).where(GenerationJob.id == job_id))
+            job = result.scalar_one_or_none()
+        if job is None:
+            return
+
+        async def report(progress: int, message: str) -> None:
+            await self._update(job_id, status=JobStatus.RUNNING.value, progress=progress, message=message)
+
+        await report(5, "Started")
+        try:
+            result_id = await self.handlers[job.kind](job, report)
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            await self._update(
+                job_id,
+                status=JobStatus.FAILED.value,
+                message="Failed",
+                error=str(e),
+                finished_at=datetime.now(timezone.utc),
+            )
+            return
+
+        await self._update(
+            job_id,
+            status=JobStatus.SUCCEEDED.value,
+            progress=100,
+            message="Completed",
+            result_id=result_id,
+            finished_at=datetime.now(timezone.utc),
+        )
+
+    async def _update(self, job_id: str, **values) -> None:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(GenerationJob)
+                .where(GenerationJob.id == job_id)
+                .values(heartbeat_at=datetime.now(timezone.utc), **values)
+            )
+            await session.commit()
+            result = await session.execute(select(GenerationJob).where(GenerationJob.id == job_id))
+            job = result.scalar_one()
+
+        self._publish(job_event(job))
+
+    def _publish(self, event: JobEvent) -> None:
+        for queue in self._subscribers.get(event.job_id, ()):
+            queue.put_nowait(event)
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                await self._touch_jobs()
+                await self._fail_stale_jobs()
+            except Exception:
+                logger.exception("Job heartbeat failed")
+
+    async def _touch_jobs(self) -> None:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(GenerationJob)
+                .where(
+                    GenerationJob.worker_id == self.worker_id,
+                    GenerationJob.status.notin_([status.value for status in TERMINAL_STATUSES]),
+                )
+                .values(heartbeat_at=datetime.now(timezone.utc))
+            )
+            await session.commit()
+
+    async def _fail_stale_jobs(self) -> None:
+        """Fail unfinished jobs of other workers that stopped sending heartbeats.
+
+        Work queued in memory does not survive its process, but jobs owned by
+        live workers (other uvicorn processes) keep running.
+        """
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(GenerationJob)
+                .where(
+                    GenerationJob.status.notin_([status.value for status in TERMINAL_STATUSES]),
+                    or_(GenerationJob.worker_id.is_(None), GenerationJob.worker_id != self.worker_id),
+                    or_(
+                        GenerationJob.heartbeat_at.is_(None),
+                        GenerationJob.heartbeat_at < now - timedelta(seconds=self.stale_seconds),
+                    ),
+                )
+                .values(
+                    status=JobStatus.FAILED.value,
+                    message="Failed",
+                    error="Interrupted: the worker running it stopped",
+                    finished_at=now,
+                )
+            )
+            await session.commit()
+
+
+def job_event(job: GenerationJob) -> JobEvent:
+    return JobEvent(
+        job_id=job.id,
+        status=job.status,
+        progress=job.progress or 0,
+        message=job.message,
+        result_id=job.result_id,
+        error=job.error,
+    )
+
+
+async def run_itinerary_job(job: GenerationJob, report) -> str:
+    """Generate an itinerary for job.trip_id and persist it into Itinerary."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(Trip).where(Trip.id == job.trip_id, Trip.user_id == job.user_id)
+        )
+        trip = result.scalar_one_or_none()
+    if trip is None:
+        raise ValueError("Trip not found")
+
+    params = job.params or {}
+    await report(20, "Generating itinerary")
+    return await generate_and_save_itinerary(
+        trip, params.get("preferences"), regenerate=bool(params.get("regenerate"))
+    )
+
+
+job_queue = JobQueue(
+    workers=settings.job_workers,
+    max_size=settings.job_queue_max_size,
+    heartbeat_seconds=settings.job_heartbeat_seconds,
+    stale_seconds=settings.job_stale_seconds,
+)
+job_queue.register("itinerary", run_itinerary_job)
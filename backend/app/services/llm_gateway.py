@@ -0,0 +1,266 @@
+"""Shared gateway for all OpenAI chat completion calls.
+
+Every route talks to the model through one pooled AsyncOpenAI client so that
+connections are reused and load is shaped in one place:
+- a tuned httpx connection pool
+- a global and a per-user concurrency limit
+- token-bucket rate limiting against the provider's RPM/TPM quota
+- jittered exponential retry on 429/5xx/connection errors, bounded by a deadline
+
+When the provider stays unavailable past the deadline an LLMUnavailableError
+is raised; the app turns it into a 503 with Retry-After.
+"""
+from typing import Any, AsyncGenerator, Dict, List, Optional
+import asyncio
+import random
+import time
+
+import httpx
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    RateLimitError,
+)
+
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class LLMUnavailableError(Exception):
+    """The model provider could not serve the request before the retry deadline."""
+
+    def __init__(self, message: str, retry_after: float = 5.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], max_tokens: Optional[int]) -> int:
+    """Rough token cost of a request (prompt at ~4 chars/token plus the completion budget)."""
+    prompt_chars = sum(len(str(msg.get("content") or "")) for msg in messages)
+    return prompt_chars // 4 + (max_tokens or 0)
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (RateLimitError, APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        timeout_seconds: float = 60.0,
+        max_concurrency: int = 32,
+        per_user_concurrency: int = 2,
+        rpm_limit: int = 0,
+        tpm_limit: int = 0,
+        max_retries: int = 5,
+        retry_base_seconds: float = 0.5,
+        retry_max_seconds: float = 8.0,
+        retry_deadline_seconds: float = 30.0
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.timeout_seconds = timeout_seconds
+        self.per_user_concurrency = per_user_concurrency
+        self.max_retries = max_retries
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.retry_deadline_seconds = retry_deadline_seconds
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._user_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._user_waiters: Dict[str, int] = {}
+        self._request_bucket = TokenBucket(rpm_limit) if rpm_limit else None
+        self._token_bucket = TokenBucket(tpm_limit) if tpm_limit else None
+        self._client: Optional[AsyncOpenAI] = None
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        # Built lazily so importing the app does not require an API key
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0,  # retries are handled here, with a deadline
+                timeout=self.timeout_seconds,
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_keepalive_connections,
+                        keepalive_expiry=30
+                    )
+                ),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def chat_completion(self, user_id: Optional[str] = None, **kwargs) -> Any:
+        """Non-streaming chat completion with limits and retries applied."""
+        async with self._limits(user_id, kwargs):
+            return await self._with_retry(lambda: self.client.chat.completions.create(**kwargs))
+
+    async def stream_chat_completion(
+        self,
+        user_id: Optional[str] = None,
+        **kwargs
+    ) -> AsyncGenerator[Any, None]:
+        """Streaming chat completion; retries only apply before the first chunk."""
+        async with self._limits(user_id, kwargs):
+            stream = await self._with_retry(
+                lambda: self.client.chat.completions.create(stream=True, **kwargs)
+            )
+            async for chunk in stream:
+                yield chunk
+
+    def _limits(self, user_id: Optional[str], request: Dict[str, Any]) -> "_RequestSlot":
+        return _RequestSlot(self, user_id, request)
+
+    async def _with_retry(self, call):
+        deadline = time.monotonic() + self.retry_deadline_seconds
+        attempt = 0
+        while True:
+            try:
+                return await call()
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                attempt += 1
+                # Full jitter, but never wait less than the provider asked for
+                delay = random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * 2 ** attempt))
+                delay = max(delay, retry_after_seconds(e) or 0)
+                if attempt > self.max_retries or time.monotonic() + delay > deadline:
+                    raise LLMUnavailableError(
+                        "The AI service is busy, please try again shortly",
+                        retry_after=max(delay, 1.0)
+                    ) from e
+                await asyncio.sleep(delay)
+
+    def _user_semaphore(self, user_id: str) -> asyncio.Semaphore:
+        semaphore = self._user_semaphores.get(user_id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_user_concurrency)
+            self._user_semaphores[user_id] = semaphore
+        return semaphore
+
+
+class _RequestSlot:
+    """Holds the per-user and global concurrency slots plus rate-limit tokens for one call."""
+
+    def __init__(self, gateway: LLMGateway, user_id: Optional[str], request: Dict[str, Any]):
+        self.gateway = gateway
+        self.user_id = user_id
+        self.request = request
+
+    async def __aenter__(self):
+        gateway = self.gateway
+        if self.user_id:
+            gateway._user_waiters[self.user_id] = gateway._user_waiters.get(self.user_id, 0) + 1
+            try:
+                await gateway._user_semaphore(self.user_id).acquire()
+            except BaseException:
+                self._release_user_ref()
+                raise
+        try:
+            await gateway._semaphore.acquire()
+        except BaseException:
+            self._release_user()
+            raise
+
+        try:
+            if gateway._request_bucket is not None:
+                await gateway._request_bucket.acquire(1)
+            if gateway._token_bucket is not None:
+                await gateway._token_bucket.acquire(
+                    estimate_tokens(self.request.get("messages", []), self.request.get("max_tokens"))
+                )
+        except BaseException:
+            await self.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.gateway._semaphore.release()
+        self._release_user()
+        return False
+
+    def _release_user(self) -> None:
+        if not self.user_id:
+            return
+        self.gateway._user_semaphores[self.user_id].release()
+        self._release_user_ref()
+
+    def _release_user_ref(self) -> None:
+        # Drop idle per-user semaphores so the map does not grow without bound
+        gateway = self.gateway
+        remaining = gateway._user_waiters.get(self.user_id, 1) - 1
+        if remaining <= 0:
+            gateway._user_waiters.pop(self.user_id, None)
+            gateway._user_semaphores.pop(self.user_id, None)
+        else:
+            gateway._user_waiters[self.user_id] = remaining
+
+
+llm_gateway = LLMGateway(
+    api_key=settings.openai_api_key,
+    base_url=settings.openai_base_url or None,
+    max_connections=settings.llm_max_connections,
+    max_keepalive_connections=settings.llm_max_keepalive_connections,
+    timeout_seconds=settings.llm_timeout_seconds,
+    max_concurrency=settings.llm_max_concurrency,
+    per_user_concurrency=settings.llm_per_user_concurrency,
+    rpm_limit=settings.llm_rpm_limit,
+    tpm_limit=settings.llm_tpm_limit,
+    max_retries=settings.llm_max_retries,
+    retry_deadline_seconds=settings.llm_retry_deadline_seconds,
+)
@@ -0,0 +1,97 @@
+"""Ownership-checked access to a trip and its child rows.
+
+Child rows (itinerary, packing items, todos) are fetched with the ownership
+check folded into the same statement: the owned trip is LEFT JOINed to the
+children, so "no row" means the trip is missing or belongs to someone else
+(404) while a single row of NULL children means the trip exists but has no
+matching children. Every sub-resource route costs one query instead of two.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import and_, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Trip, generate_uuid
+
+
+async def get_trip_for_user(trip_id: str, user_id: str, db: AsyncSession) -> Trip:
+    result = await db.execute(
+        select(Trip).where(Trip.id == trip_id, Trip.user_id == user_id)
+    )
+    trip = result.scalar_one_or_none()
+    if not trip:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    return trip
+
+
+async def owned_children(
+    db: AsyncSession,
+    model,
+    trip_id: str,
+    user_id: str,
+    *criteria,
+    columns: Optional[Sequence] = None,
+    order_by: Sequence = (),
+    limit: Optional[int] = None
+) -> List[Any]:
+    """Children of an owned trip matching `criteria`, in one query.
+
+    Returns ORM objects, or rows of `columns` when given. Raises 404 when the
+    trip does not exist or is not owned by the user.
+    """
+    selected = columns if columns is not None else (model,)
+    result = await db.execute(
+        select(Trip.id, model.id, *selected)
+        .select_from(Trip)
+        .outerjoin(model, and_(model.trip_id == Trip.id, *criteria))
+        .where(Trip.id == trip_id, Trip.user_id == user_id)
+        .order_by(*order_by)
+        .limit(limit)
+    )
+    rows = result.all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    if columns is None:
+        return [row[2] for row in rows if row[1] is not None]
+    return [row[2:] for row in rows if row[1] is not None]
+
+
+async def owned_child(
+    db: AsyncSession,
+    model,
+    trip_id: str,
+    user_id: str,
+    *criteria,
+    detail: str = "Not found"
+) -> Any:
+    """A single child of an owned trip; 404 for a missing trip or child."""
+    children = await owned_children(db, model, trip_id, user_id, *criteria)
+    if not children:
+        raise HTTPException(status_code=404, detail=detail)
+    return children[0]
+
+
+async def insert_for_owned_trip(
+    db: AsyncSession,
+    model,
+    trip_id: str,
+    user_id: str,
+    values: Dict[str, Any]
+) -> Any:
+    """INSERT ... SELECT guarded by trip ownership, returning the new row.
+
+    Raises 404 when nothing was inserted because the trip is not the user's.
+    """
+    values = {"id": generate_uuid(), "trip_id": trip_id, **values}
+    table = model.__table__
+    source = select(*(literal(value, table.c[key].type) for key, value in values.items())).where(
+        select(Trip.id).where(Trip.id == trip_id, Trip.user_id == user_id).exists()
+    )
+    result = await db.scalars(
+        insert(model).from_select(list(values), source).returning(model)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    return row
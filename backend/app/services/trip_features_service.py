@@ -0,0 +1,126 @@
+"""Set-based writes for packing items and todos.
+
+Each operation touches the database a constant number of times regardless of
+how many rows are involved: one ownership-checked query for the rows that
+already exist, one multi-row INSERT ... ON CONFLICT DO NOTHING ... RETURNING,
+one UPDATE (executemany) per distinct set of changed fields and one DELETE.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import engine
+from app.db.models import PackingItem, TripTodo, generate_uuid
+from app.services.trip_access import owned_children
+
+
+def insert_ignoring_conflicts(model):
+    """INSERT that skips rows violating a unique constraint, where the dialect supports it."""
+    dialect = engine.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing()
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing()
+    return insert(model)
+
+
+async def _insert_new(db: AsyncSession, model, rows: List[Dict[str, Any]]) -> List[Any]:
+    if not rows:
+        return []
+    for row in rows:
+        row.setdefault("id", generate_uuid())
+    result = await db.scalars(
+        insert_ignoring_conflicts(model).values(rows).returning(model)
+    )
+    inserted = {obj.id: obj for obj in result.all()}
+    # RETURNING order is not guaranteed; keep the caller's order
+    return [inserted[row["id"]] for row in rows if row["id"] in inserted]
+
+
+async def insert_packing_items(
+    db: AsyncSession,
+    trip_id: str,
+    user_id: str,
+    items: Iterable[Dict[str, Any]]
+) -> List[PackingItem]:
+    """Insert packing items, skipping (category, item) pairs the trip already has.
+
+    Raises 404 when the trip is not the user's.
+    """
+    pending: Dict[tuple, Dict[str, Any]] = {}
+    for item in items:
+        pending.setdefault((item["category"], item["item"]), {**item, "trip_id": trip_id})
+
+    existing = await owned_children(
+        db, PackingItem, trip_id, user_id,
+        PackingItem.item.in_({item for _, item in pending}),
+        columns=(PackingItem.category, PackingItem.item)
+    )
+    for pair in existing:
+        pending.pop(tuple(pair), None)
+
+    return await _insert_new(db, PackingItem, list(pending.values()))
+
+
+async def insert_todos(
+    db: AsyncSession,
+    trip_id: str,
+    user_id: str,
+    todos: Iterable[Dict[str, Any]]
+) -> List[TripTodo]:
+    """Insert todos, skipping titles the trip already has.
+
+    Raises 404 when the trip is not the user's.
+    """
+    pending: Dict[str, Dict[str, Any]] = {}
+    for todo in todos:
+        pending.setdefault(todo["title"], {**todo, "trip_id": trip_id})
+
+    existing = await owned_children(
+        db, TripTodo, trip_id, user_id,
+        TripTodo.title.in_(pending),
+        columns=(TripTodo.title,)
+    )
+    for (title,) in existing:
+        pending.pop(title, None)
+
+    return await _insert_new(db, TripTodo, list(pending.values()))
+
+
+async def apply_updates(db: AsyncSession, model, updates: List[Dict[str, Any]]) -> None:
+    """Apply per-row changes keyed by "id" with one UPDATE per distinct set of fields."""
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for change in updates:
+        fields = tuple(sorted(key for key in change if key != "id"))
+        if fields:
+            groups.setdefault(fields, []).append(change)
+    for rows in groups.values():
+        # ORM bulk UPDATE by primary key: a single executemany per group
+        await db.execute(update(model), rows)
+
+
+def todo_completion_updates(
+    updates: List[Dict[str, Any]],
+    completed: Dict[str, bool]
+) -> List[Dict[str, Any]]:
+    """Stamp or clear completed_at for todo updates that change `completed`."""
+    now = datetime.utcnow()
+    stamped = []
+    for change in updates:
+        change = dict(change)
+        if "completed" in change:
+            if change["completed"] and not completed.get(change["id"]):
+                change["completed_at"] = now
+            elif not change["completed"]:
+                change["completed_at"] = None
+        stamped.append(change)
+    return stamped
+
+
+async def delete_rows(db: AsyncSession, model, trip_id: str, ids: Iterable[str]) -> None:
+    ids = set(ids)
+    if ids:
+        await db.execute(delete(model).where(model.trip_id == trip_id, model.id.in_(ids)))
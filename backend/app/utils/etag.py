@@ -0,0 +1,31 @@
+"""ETag helpers for conditional GETs."""
+from typing import Any, Optional
+import hashlib
+import json
+
+
+def etag_for(payload: Any) -> str:
+    """Strong ETag over the JSON representation of `payload`."""
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return f'"{hashlib.sha256(raw.encode()).hexdigest()[:32]}"'
+
+
+def version_etag(resource_id: str, version: int) -> str:
+    """Strong ETag for a row whose version column is bumped on every write."""
+    return f'"{resource_id}.{version}"'
+
+
+def etag_matches(header: Optional[str], etag: str, weak: bool = True) -> bool:
+    """Whether an If-None-Match / If-Match header value matches `etag`.
+
+    If-None-Match uses weak comparison (W/"x" matches "x"); If-Match must pass
+    `weak=False`, where weak tags never match (RFC 9110, section 8.8.3.2).
+    """
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    if "*" in candidates:
+        return True
+    if weak:
+        return etag.removeprefix("W/") in {value.removeprefix("W/") for value in candidates}
+    return not etag.startswith("W/") and etag in candidates
@@ -0,0 +1,154 @@
+"""RFC 6902 JSON Patch for plain JSON documents (dicts, lists, scalars)."""
+from typing import Any, Dict, List
+import copy
+
+
+class JsonPatchError(ValueError):
+    """The patch is malformed or does not apply to the document."""
+
+
+class JsonPatchTestFailed(JsonPatchError):
+    """A `test` operation did not match."""
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """RFC 6901 JSON Pointer to its reference tokens."""
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {token}")
+    return index
+
+
+def _resolve(document: Any, tokens: List[str]) -> Any:
+    target = document
+    for token in tokens:
+        if isinstance(target, dict):
+            if token not in target:
+                raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+            target = target[token]
+        elif isinstance(target, list):
+            target = target[_index(target, token)]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    return target
+
+
+def _add(document: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve(document, tokens[:-1])
+    if isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(parent, tokens[-1], allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to a scalar at /{'/'.join(tokens[:-1])}")
+    return document
+
+
+def _remove(document: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise JsonPatchError("Cannot remove the whole document")
+    parent = _resolve(document, tokens[:-1])
+    if isinstance(parent, dict):
+        if tokens[-1] not in parent:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+        return parent.pop(tokens[-1])
+    if isinstance(parent, list):
+        return parent.pop(_index(parent, tokens[-1]))
+    raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+def apply_patch(document: Any, patch: List[Dict[str, Any]], in_place: bool = False) -> Any:
+    """Apply `patch` to a copy of `document` and return the result.
+
+    Operations apply in order and the patch is atomic: on any error the
+    original document is left untouched and JsonPatchError is raised. With
+    `in_place` the document is modified directly and may be left half-patched.
+    """
+    result = document if in_place else copy.deepcopy(document)
+    for operation in patch:
+        op = operation.get("op")
+        if "path" not in operation:
+            raise JsonPatchError(f"Operation {op!r} is missing 'path'")
+        path = parse_pointer(operation["path"])
+
+        if op in ("add", "replace", "test") and "value" not in operation:
+            raise JsonPatchError(f"Operation {op!r} is missing 'value'")
+        if op in ("move", "copy") and "from" not in operation:
+            raise JsonPatchError(f"Operation {op!r} is missing 'from'")
+
+        if op == "add":
+            result = _add(result, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(result, path)
+        elif op == "replace":
+            _resolve(result, path)
+            if not path:
+                result = copy.deepcopy(operation["value"])
+            else:
+                _remove(result, path)
+                result = _add(result, path, copy.deepcopy(operation["value"]))
+        elif op == "move":
+            source = parse_pointer(operation["from"])
+            if path[:len(source)] == source and path != source:
+                raise JsonPatchError("Cannot move a value into one of its children")
+            value = _remove(result, source)
+            result = _add(result, path, value)
+        elif op == "copy":
+            value = copy.deepcopy(_resolve(result, parse_pointer(operation["from"])))
+            result = _add(result, path, value)
+        elif op == "test":
+            if _resolve(result, path) != operation["value"]:
+                raise JsonPatchTestFailed(f"Test failed at {operation['path']}")
+        else:
+            raise JsonPatchError(f"Unknown operation: {op!r}")
+    return result
+
+
+def _pointer_token(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def diff_documents(source: Any, target: Any, path: str = "") -> List[Dict[str, Any]]:
+    """JSON Patch turning `source` into `target`.
+
+    Objects are diffed per key and arrays per index (surplus items removed
+    from the end, new ones appended), so small edits give small patches.
+    """
+    if source == target:
+        return []
+    if isinstance(source, dict) and isinstance(target, dict):
+        patch: List[Dict[str, Any]] = []
+        for key in source:
+            if key not in target:
+                patch.append({"op": "remove", "path": f"{path}/{_pointer_token(key)}"})
+        for key, value in target.items():
+            child = f"{path}/{_pointer_token(key)}"
+            if key not in source:
+                patch.append({"op": "add", "path": child, "value": copy.deepcopy(value)})
+            else:
+                patch.extend(diff_documents(source[key], value, child))
+        return patch
+    if isinstance(source, list) and isinstance(target, list):
+        patch = []
+        for index in range(min(len(source), len(target))):
+            patch.extend(diff_documents(source[index], target[index], f"{path}/{index}"))
+        for index in range(len(source) - 1, len(target) - 1, -1):
+            patch.append({"op": "remove", "path": f"{path}/{index}"})
+        for value in target[len(source):]:
+            patch.append({"op": "add", "path": f"{path}/-", "value": copy.deepcopy(value)})
+        return patch
+    return [{"op": "replace", "path": path, "value": copy.deepcopy(target)}]
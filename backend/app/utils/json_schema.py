@@ -0,0 +1,68 @@
+"""OpenAI structured-output (`response_format=json_schema`) schemas from Pydantic models."""
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+import copy
+
+from pydantic import BaseModel
+
+# Annotations strict mode rejects or that only cost prompt tokens
+DROPPED_KEYWORDS = ("title", "default")
+
+
+def _free_form(node: Dict[str, Any]) -> bool:
+    """A `dict`-typed field: an object without declared properties (possibly nullable)."""
+    if "anyOf" in node:
+        return any(_free_form(option) for option in node["anyOf"])
+    return node.get("type") == "object" and "properties" not in node
+
+
+def _strictify(node: Any, state: Dict[str, bool]) -> Any:
+    if isinstance(node, list):
+        return [_strictify(item, state) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    node = {key: value for key, value in node.items() if key not in DROPPED_KEYWORDS}
+    if "properties" in node:
+        required = set(node.get("required", ()))
+        properties = {}
+        for name, schema in node["properties"].items():
+            if _free_form(schema):
+                if name not in required:
+                    # Optional free-form fields are simply not generated
+                    continue
+                state["strict"] = False
+            properties[name] = _strictify(schema, state)
+        node["properties"] = properties
+        node["required"] = list(properties)
+        node["additionalProperties"] = False
+    for key in ("items", "anyOf", "$defs"):
+        if key in node:
+            value = node[key]
+            node[key] = (
+                {name: _strictify(schema, state) for name, schema in value.items()}
+                if key == "$defs" else _strictify(value, state)
+            )
+    return node
+
+
+def strict_json_schema(model: type[BaseModel]) -> Tuple[Dict[str, Any], bool]:
+    """JSON schema of `model` shaped for strict structured outputs.
+
+    Every object lists all its properties as required (optional ones stay
+    nullable) and forbids extra keys. Returns the schema and whether it is strict-compatible: a required free-form `dict`
+    field cannot be described strictly.
+    """
+    schema = copy.deepcopy(model.model_json_schema())
+    state = {"strict": True}
+    return _strictify(schema, state), state["strict"]
+
+
+@lru_cache(maxsize=None)
+def response_format_for(model: type[BaseModel]) -> Dict[str, Any]:
+    """`response_format` argument constraining a completion to `model` (cached; do not mutate)."""
+    schema, strict = strict_json_schema(model)
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": model.__name__, "schema": schema, "strict": strict},
+    }
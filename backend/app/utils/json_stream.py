@@ -0,0 +1,156 @@
+"""Incremental JSON parsing for streamed model output."""
+from typing import Any, List, Optional
+import json
+
+CLOSERS = {"{": "}", "[": "]"}
+
+
+def repair_json(text: str) -> Optional[Any]:
+    """Parse the root object of possibly truncated model output.
+
+    Scans from the first ``{`` and remembers the last point where every value
+    so far was complete (just before a comma, or just after an opening or
+    closing bracket). If the document does not parse as-is it is cut back to
+    that point and its open containers are closed, so a completion that ran
+    out of tokens still yields everything before the value it was writing.
+    Returns None when nothing parseable is left.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+
+    stack: List[str] = []
+    in_string = escape = False
+    cut: Optional[tuple] = None
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+            cut = (i + 1, "".join(stack))
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                try:
+                    return json.loads(text[start:i + 1])
+                except json.JSONDecodeError:
+                    return None
+            cut = (i + 1, "".join(stack))
+        elif ch == ",":
+            cut = (i, "".join(stack))
+
+    if cut is None:
+        return None
+    end, open_containers = cut
+    closers = "".join(CLOSERS[opener] for opener in reversed(open_containers))
+    try:
+        return json.loads(text[start:end] + closers)
+    except json.JSONDecodeError:
+        return None
+
+
+class JSONArrayItemStream:
+    """Pull complete items out of one array of a JSON document as it streams in.
+
+    Feed text chunks with ``feed()``; each call returns the items of the array
+    stored under ``key`` in the root object that became complete with that
+    chunk. Text before the root object (such as a ```json fence) and after it
+    is ignored. Once the stream ends, ``document()`` parses the whole root
+    object if it is valid JSON.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._buffer = ""
+        self._pos = 0
+        self._root_start: Optional[int] = None
+        self._root_end: Optional[int] = None
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        return self._buffer
+
+    def feed(self, chunk: str) -> List[Any]:
+        self._buffer += chunk
+        buffer = self._buffer
+
+        items = []
+        while self._pos < len(buffer):
+            i = self._pos
+            self._pos += 1
+            ch = buffer[i]
+
+            if self._root_end is not None:
+                break
+            if self._root_start is None:
+                if ch == "{":
+                    self._root_start = i
+                    self._stack.append(ch)
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_string = buffer[self._string_start + 1:i]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":" and len(self._stack) == 1:
+                self._current_key = self._last_string
+            elif ch == "," and len(self._stack) == 1:
+                self._current_key = None
+            elif ch in "{[":
+                if ch == "[" and len(self._stack) == 1 and self._current_key == self.key:
+                    self._array_depth = 2
+                elif ch == "{" and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._item_start = i
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                depth = len(self._stack)
+                if self._item_start is not None and depth == self._array_depth:
+                    try:
+                        items.append(json.loads(buffer[self._item_start:i + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self._item_start = None
+                elif ch == "]" and self._array_depth is not None and depth == 1:
+                    self._array_depth = None
+                if depth == 0:
+                    self._root_end = i + 1
+        return items
+
+    def document(self) -> Optional[Any]:
+        """Parse the complete root object, or None if it is missing or invalid."""
+        if self._root_start is None or self._root_end is None:
+            return None
+        try:
+            return json.loads(self._buffer[self._root_start:self._root_end])
+        except json.JSONDecodeError:
+            return None
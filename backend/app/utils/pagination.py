@@ -0,0 +1,111 @@
+"""Keyset pagination and sparse fieldsets for list endpoints.
+
+Pages are ordered by a timestamp plus the primary key as tie-breaker. The
+cursor is the (timestamp, id) of the last row of the previous page; the next
+page compares against the timestamp as stored for that id (so differing
+datetime text formats in SQLite cannot break ties) and falls back to the
+encoded value once the row has been deleted, which on SQLite may repeat rows
+sharing that second but never skips any.
+"""
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, func, literal, or_, select
+
+from app.config import get_settings
+
+settings = get_settings()
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(value: datetime, row_id: str) -> str:
+    raw = json.dumps([value.isoformat() if value else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        return (datetime.fromisoformat(value) if value else None), str(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_size(limit: Optional[int], cursor: Optional[str], always: bool = False) -> Optional[int]:
+    """Rows per page, or None for the unpaginated list (unless `always`)."""
+    if limit is None and cursor is None and not always:
+        return None
+    return min(limit or settings.list_page_size, settings.list_page_max)
+
+
+def after_cursor(model, sort_column, cursor: str, descending: bool = False):
+    """WHERE clause selecting the rows that follow `cursor` in (sort_column, id) order."""
+    value, row_id = decode_cursor(cursor)
+    anchor_row = model.__table__.alias()
+    anchor = func.coalesce(
+        select(anchor_row.c[sort_column.key]).where(anchor_row.c.id == row_id).scalar_subquery(),
+        literal(value, sort_column.type)
+    )
+    if descending:
+        return or_(sort_column < anchor, and_(sort_column == anchor, model.id < row_id))
+    return or_(sort_column > anchor, and_(sort_column == anchor, model.id > row_id))
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """Validated `?fields=` list (always including id), or None for full rows."""
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested - set(allowed))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field: {', '.join(unknown)}")
+    return [name for name in allowed if name == "id" or name in requested]
+
+
+def column_fields(model, response_model) -> List[str]:
+    """Response fields backed by a column of `model` (the ones `fields=` may select)."""
+    columns = model.__table__.columns.keys()
+    return [name for name in response_model.model_fields if name in columns]
+
+
+def columns_for(model, fields: Sequence[str], sort_column) -> list:
+    names = dict.fromkeys(["id", sort_column.key, *fields])
+    return [getattr(model, name) for name in names]
+
+
+def _value(row: Any, name: str) -> Any:
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def page_response(
+    rows: Sequence[Any],
+    size: Optional[int],
+    sort_key: str,
+    response_model,
+    fields: Optional[List[str]] = None
+):
+    """List response for `rows` (fetched with limit size + 1).
+
+    Rows are ORM objects, result rows or dicts. Full rows are validated through
+    `response_model`; with `fields` only those keys are returned. When another page exists its cursor is sent in the
+    X-Next-Cursor header.
+    """
+    rows = list(rows)
+    headers = {}
+    if size is not None and len(rows) > size:
+        rows = rows[:size]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(_value(rows[-1], sort_key), _value(rows[-1], "id"))
+
+    if fields is not None:
+        content = [{name: _value(row, name) for name in fields} for row in rows]
+    else:
+        content = [response_model.model_validate(row) for row in rows]
+    return JSONResponse(content=jsonable_encoder(content), headers=headers)
@@ -0,0 +1,89 @@
+"""Token counting for prompt budgeting.
+
+Uses tiktoken when it is installed and its encoding has been loaded;
+otherwise falls back to ~4 characters per token, which is close enough for
+budgeting English prompts. Loading may download the BPE file, so it never
+happens on the request path: `preload_encoding()` runs it in a thread at
+startup, and a failed load is retried in the background, not cached.
+"""
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import threading
+import time
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+ENCODING_NAME = "o200k_base"
+CHARS_PER_TOKEN = 4
+# Role/formatting overhead the chat API adds per message
+MESSAGE_OVERHEAD_TOKENS = 4
+# Seconds before a failed encoding load is attempted again
+LOAD_RETRY_SECONDS = 300
+
+_loaded = None
+_failed_at: Optional[float] = None
+_load_lock = threading.Lock()
+
+
+def load_encoding():
+    """Load the tiktoken encoding (blocking); returns None when it is unavailable."""
+    global _loaded, _failed_at
+    if tiktoken is None:
+        return None
+    with _load_lock:
+        if _loaded is None:
+            try:
+                _loaded = tiktoken.get_encoding(ENCODING_NAME)
+                _failed_at = None
+            except Exception as e:
+                logger.warning("Loading tiktoken encoding %s failed, estimating tokens: %s", ENCODING_NAME, e)
+                _failed_at = time.monotonic()
+    return _loaded
+
+
+async def preload_encoding(timeout: float = 10.0) -> None:
+    """Load the encoding in a worker thread; a slow download finishes in the background."""
+    try:
+        await asyncio.wait_for(asyncio.to_thread(load_encoding), timeout)
+    except asyncio.TimeoutError:
+        logger.warning("tiktoken encoding not loaded after %ss, estimating tokens until it is", timeout)
+
+
+def _encoding():
+    global _failed_at
+    if _loaded is None and _failed_at is not None and time.monotonic() - _failed_at > LOAD_RETRY_SECONDS:
+        _failed_at = time.monotonic()  # one retry per interval
+        threading.Thread(target=load_encoding, name="tiktoken-load", daemon=True).start()
+    return _loaded
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(messages: List[Dict]) -> int:
+    return sum(count_tokens(msg.get("content") or "") + MESSAGE_OVERHEAD_TOKENS for msg in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the beginning of `text`, cut to at most `max_tokens` tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,242 @@
+"""Deterministic OpenAI-compatible stand-in for load testing.
+
+Serves POST /v1/chat/completions (streaming and non-streaming) with canned
+itinerary / recommendation / chat replies, configurable latency, token rate
+and error injection. Point the backend at it with:
+
+    OPENAI_BASE_URL=http://localhost:9000/v1 OPENAI_API_KEY=fake \\
+        uvicorn app.main:app --port 8000
+
+and start it with:
+
+    python -m benchmarks.fake_llm --port 9000 --latency-ms 300 --tokens-per-second 80
+"""
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import AsyncGenerator, List
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import uuid
+
+
+class FakeLLMConfig:
+    def __init__(
+        self,
+        latency_ms: float = 300,
+        tokens_per_second: float = 80,
+        error_rate_429: float = 0.0,
+        error_rate_500: float = 0.0,
+        seed: int = 42
+    ):
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.error_rate_429 = error_rate_429
+        self.error_rate_500 = error_rate_500
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMConfig":
+        return cls(
+            latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", 300)),
+            tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", 80)),
+            error_rate_429=float(os.getenv("FAKE_LLM_ERROR_RATE_429", 0)),
+            error_rate_500=float(os.getenv("FAKE_LLM_ERROR_RATE_500", 0)),
+            seed=int(os.getenv("FAKE_LLM_SEED", 42)),
+        )
+
+
+def canned_itinerary(days: int = 3) -> dict:
+    return {
+        "destination": "Tokyo, Japan",
+        "start_date": "2026-04-01",
+        "end_date": f"2026-04-{days:02d}",
+        "days": [
+            {
+                "day_number": n,
+                "date": f"2026-04-{n:02d}",
+                "theme": f"Day {n} highlights",
+                "activities": [
+                    {
+                        "id": f"act_{n}_{slot}",
+                        "name": f"{slot.title()} visit",
+                        "type": "attraction",
+                        "time_slot": slot,
+                        "start_time": start,
+                        "duration": 120,
+                        "location": {"name": "Shibuya", "address": "Shibuya City, Tokyo"},
+                        "cost": 20,
+                        "currency": "USD",
+                        "booking_required": False,
+                        "notes": None
+                    }
+                    for slot, start in (("morning", "09:00"), ("afternoon", "14:00"), ("evening", "19:00"))
+                ],
+                "meals": [
+                    {"type": "lunch", "suggestion": "Ichiran Ramen", "cuisine": "Japanese",
+                     "price_range": "$", "location": "Shibuya"},
+                    {"type": "dinner", "suggestion": "Gonpachi", "cuisine": "Izakaya",
+                     "price_range": "$$", "location": "Nishi-Azabu"}
+                ],
+                "daily_cost": 150
+            }
+            for n in range(1, days + 1)
+        ],
+        "total_estimated_cost": 150 * days,
+        "notes": ["Get a Suica card for trains", "Carry some cash"]
+    }
+
+
+def canned_recommendations() -> dict:
+    return {
+        "recommendations": [
+            {
+                "name": name,
+                "country": country,
+                "match_score": score,
+                "match_reasons": ["Great food scene", "Easy public transport"],
+                "best_time_to_visit": season,
+                "daily_budget": {"budget": 50, "mid_range": 120, "luxury": 300},
+                "highlights": ["Old town", "Street food"],
+                "pros": ["Safe", "Walkable"],
+                "cons": ["Crowded in peak season"]
+            }
+            for name, country, score, season in (
+                ("Kyoto", "Japan", 92, "March-May"),
+                ("Lisbon", "Portugal", 88, "April-June"),
+                ("Hanoi", "Vietnam", 84, "October-December"),
+            )
+        ]
+    }
+
+
+def canned_reply(messages: List[dict]) -> str:
+    prompt = " ".join(str(m.get("content") or "") for m in messages if m.get("role") == "user").lower()
+    if "itinerary" in prompt:
+        match = re.search(r"(\d+)\s*days?", prompt)
+        days = min(int(match.group(1)), 14) if match else 3
+        return "Here is your itinerary:\n```json\n" + json.dumps(canned_itinerary(days), indent=2) + "\n```"
+    if "recommend" in prompt or "where should" in prompt:
+        return "Here are some ideas:\n```json\n" + json.dumps(canned_recommendations(), indent=2) + "\n```"
+    return (
+        "Great question! To plan the perfect trip I need a few details: your travel dates, "
+        "budget, number of travelers and the kind of experiences you enjoy."
+    )
+
+
+def tokenize(text: str) -> List[str]:
+    # Roughly one token per word/punctuation run; good enough to pace a stream
+    return re.findall(r"\s*\S+", text)
+
+
+def create_app(config: FakeLLMConfig) -> FastAPI:
+    app = FastAPI(title="Fake LLM")
+
+    def injected_error():
+        roll = config.rng.random()
+        if roll < config.error_rate_429:
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                headers={"retry-after": "1"},
+            )
+        if roll < config.error_rate_429 + config.error_rate_500:
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "Internal error", "type": "server_error"}},
+            )
+        return None
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        error = injected_error()
+        if error is not None:
+            return error
+
+        model = body.get("model", "gpt-4o-mini")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        tokens = tokenize(canned_reply(body.get("messages", [])))
+        max_tokens = body.get("max_tokens")
+        if max_tokens:
+            tokens = tokens[:max_tokens]
+        delay_per_token = 1 / config.tokens_per_second if config.tokens_per_second else 0
+
+        await asyncio.sleep(config.latency_ms / 1000)
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay_per_token * len(tokens))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)}
+            }
+
+        async def stream() -> AsyncGenerator[str, None]:
+            def chunk(delta: dict, finish_reason=None) -> str:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+
+            yield chunk({"role": "assistant", "content": ""})
+            for token in tokens:
+                await asyncio.sleep(delay_per_token)
+                yield chunk({"content": token})
+            yield chunk({}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model", "owned_by": "fake"}]}
+
+    return app
+
+
+app = create_app(FakeLLMConfig.from_env())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic OpenAI-compatible fake server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-second", type=float, default=80)
+    parser.add_argument("--error-rate-429", type=float, default=0.0)
+    parser.add_argument("--error-rate-500", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FakeLLMConfig(
+        latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        error_rate_429=args.error_rate_429,
+        error_rate_500=args.error_rate_500,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
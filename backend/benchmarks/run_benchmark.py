@@ -0,0 +1,251 @@
+"""Pure-asyncio load driver for the chat endpoints.
+
+Measures latency percentiles, time-to-first-token and throughput for
+/api/chat, /api/agent and /api/copilotkit against a running backend
+(normally pointed at benchmarks/fake_llm.py):
+
+    python -m benchmarks.run_benchmark --requests 200 --concurrency 20
+    python -m benchmarks.run_benchmark --save baseline.json
+    python -m benchmarks.run_benchmark --compare baseline.json
+"""
+from typing import Awaitable, Callable, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+import httpx
+
+ENDPOINTS = ("chat", "agent", "copilotkit")
+
+PROMPTS = [
+    "Plan a 3 days itinerary in Tokyo",
+    "Recommend destinations for a beach holiday in March",
+    "What should I pack for Iceland in winter?",
+    "Plan a 5 days itinerary in Lisbon for a family",
+]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Result:
+    def __init__(self, ok: bool, latency: float, ttft: Optional[float] = None, error: Optional[str] = None):
+        self.ok = ok
+        self.latency = latency
+        self.ttft = ttft
+        self.error = error
+
+
+def prompt_for(i: int, unique: bool) -> str:
+    prompt = PROMPTS[i % len(PROMPTS)]
+    # Unique prompts defeat the completion cache so the model path is measured
+    return f"{prompt} (request {uuid.uuid4().hex[:6]})" if unique else prompt
+
+
+async def register(client: httpx.AsyncClient) -> str:
+    response = await client.post("/api/auth/register", json={
+        "email": f"bench_{uuid.uuid4().hex[:10]}@example.com",
+        "password": "benchmark-password",
+        "name": "Benchmark"
+    })
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def call_chat(client: httpx.AsyncClient, token: str, prompt: str) -> Result:
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/chat",
+        json={"message": prompt},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    latency = time.perf_counter() - started
+    if response.status_code != 200:
+        return Result(False, latency, error=str(response.status_code))
+    # Non-streaming: the first token arrives with the full response
+    return Result(True, latency, ttft=latency)
+
+
+async def call_stream(
+    client: httpx.AsyncClient,
+    path: str,
+    body: dict,
+    first_token_marker: str,
+    error_marker: str
+) -> Result:
+    started = time.perf_counter()
+    ttft = None
+    error = None
+    async with client.stream("POST", path, json=body) as response:
+        if response.status_code != 200:
+            return Result(False, time.perf_counter() - started, error=str(response.status_code))
+        async for line in response.aiter_lines():
+            if ttft is None and first_token_marker in line:
+                ttft = time.perf_counter() - started
+            if error_marker in line:
+                error = line[:120]
+    latency = time.perf_counter() - started
+    return Result(error is None, latency, ttft=ttft, error=error)
+
+
+async def call_agent(client: httpx.AsyncClient, token: str, prompt: str) -> Result:
+    return await call_stream(
+        client,
+        "/api/agent",
+        {"messages": [{"role": "user", "content": prompt}]},
+        '"TEXT_MESSAGE_CONTENT"',
+        '"RUN_ERROR"'
+    )
+
+
+async def call_copilotkit(client: httpx.AsyncClient, token: str, prompt: str) -> Result:
+    return await call_stream(
+        client,
+        "/api/copilotkit",
+        {"messages": [{"role": "user", "content": prompt}]},
+        '"textMessageContent"',
+        '"type": "error"'
+    )
+
+
+CALLERS: Dict[str, Callable[[httpx.AsyncClient, str, str], Awaitable[Result]]] = {
+    "chat": call_chat,
+    "agent": call_agent,
+    "copilotkit": call_copilotkit,
+}
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    token: str,
+    endpoint: str,
+    requests: int,
+    concurrency: int,
+    unique_prompts: bool
+) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    caller = CALLERS[endpoint]
+
+    async def one(i: int) -> Result:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                return await caller(client, token, prompt_for(i, unique_prompts))
+            except httpx.HTTPError as e:
+                return Result(False, time.perf_counter() - started, error=type(e).__name__)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    ok = [r for r in results if r.ok]
+    latencies = [r.latency * 1000 for r in ok]
+    ttfts = [r.ttft * 1000 for r in ok if r.ttft is not None]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if not r.ok:
+            errors[r.error] = errors.get(r.error, 0) + 1
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "ok": len(ok),
+        "errors": errors,
+        "rps": round(len(ok) / elapsed, 2) if elapsed else 0,
+        "latency_ms": summarize(latencies),
+        "ttft_ms": summarize(ttfts),
+    }
+
+
+def summarize(values: List[float]) -> dict:
+    if not values:
+        return {}
+    return {
+        "mean": round(statistics.fmean(values), 1),
+        "p50": round(percentile(values, 50), 1),
+        "p95": round(percentile(values, 95), 1),
+        "p99": round(percentile(values, 99), 1),
+    }
+
+
+def print_report(report: dict, baseline: Optional[dict] = None) -> None:
+    header = f"{'endpoint':<12}{'ok':>6}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'ttft50':>9}{'ttft95':>9}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, stats in report.items():
+        latency = stats["latency_ms"]
+        ttft = stats["ttft_ms"]
+        print(
+            f"{endpoint:<12}{stats['ok']:>6}{sum(stats['errors'].values()):>6}{stats['rps']:>9}"
+            f"{latency.get('p50', '-'):>9}{latency.get('p95', '-'):>9}{latency.get('p99', '-'):>9}"
+            f"{ttft.get('p50', '-'):>9}{ttft.get('p95', '-'):>9}"
+        )
+        if baseline and endpoint in baseline and latency and baseline[endpoint]["latency_ms"]:
+            before = baseline[endpoint]
+            print(
+                f"{'  vs base':<12}{'':>12}"
+                f"{delta(before['rps'], stats['rps']):>9}"
+                f"{delta(before['latency_ms']['p50'], latency['p50']):>9}"
+                f"{delta(before['latency_ms']['p95'], latency['p95']):>9}"
+                f"{delta(before['latency_ms']['p99'], latency['p99']):>9}"
+            )
+        if stats["errors"]:
+            print(f"{'  errors':<12}{json.dumps(stats['errors'])}")
+
+
+def delta(before: float, after: float) -> str:
+    if not before:
+        return "-"
+    return f"{(after - before) / before * 100:+.0f}%"
+
+
+async def main_async(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        token = await register(client)
+        report = {}
+        for endpoint in args.endpoints:
+            if args.warmup:
+                await run_endpoint(client, token, endpoint, args.warmup, args.concurrency, args.unique_prompts)
+            report[endpoint] = await run_endpoint(
+                client, token, endpoint, args.requests, args.concurrency, args.unique_prompts
+            )
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TripMate AI chat endpoints")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--unique-prompts", action="store_true", help="bypass the completion cache")
+    parser.add_argument("--save", help="write the report as JSON (e.g. a baseline)")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Shared fixtures: a throwaway SQLite database per test, and an API client on it."""
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.database import Base
+from app.db.models import Trip, User
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Engine on a fresh database holding user u1 and their trip t1."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as db:
+            db.add(User(id="u1", email="u1@example.com", name="U"))
+            db.add(Trip(id="t1", user_id="u1", name="Trip"))
+            await db.commit()
+
+    asyncio.run(setup())
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def sessionmaker(engine):
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+def client(sessionmaker, monkeypatch):
+    """Factory for an API client on the test database, signed in as u1.
+
+    Use as `async with client() as api:` inside the test's event loop.
+    """
+    from app.api import deps
+    from app.api.routes import jobs
+    from app.db import database
+    from app.main import app
+    from app.models.user import AuthPrincipal
+    from app.services import (
+        agui_events,
+        chat_outbox,
+        completion_cache,
+        conversation_context,
+        itinerary_service,
+        job_queue,
+    )
+
+    for module in (agui_events, jobs, chat_outbox, completion_cache, conversation_context, itinerary_service, job_queue):
+        monkeypatch.setattr(module, "AsyncSessionLocal", sessionmaker)
+
+    async def get_test_db():
+        async with sessionmaker() as session:
+            yield session
+
+    app.dependency_overrides[database.get_db] = get_test_db
+    app.dependency_overrides[deps.get_current_user] = lambda: AuthPrincipal(id="u1", email="u1@example.com")
+
+    def make_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    yield make_client
+    app.dependency_overrides.clear()
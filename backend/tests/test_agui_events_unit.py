@@ -0,0 +1,65 @@
+"""Unit tests for the AG-UI itinerary event stream."""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from app.db.models import Itinerary
+from app.services import agui_events
+from app.services.agent_service import empty_itinerary
+
+TRIP = SimpleNamespace(id="t1", user_id="u1", destination="Lisbon", start_date="2026-03-01", end_date="2026-03-02")
+
+
+def day(number, cost=10):
+    return {"day_number": number, "date": f"2026-03-0{number}", "activities": [], "meals": [], "daily_cost": cost}
+
+
+def run_stream(sessionmaker, monkeypatch, events):
+    async def stream_itinerary(trip, preferences=None):
+        for event in events:
+            yield event
+
+    monkeypatch.setattr(agui_events, "AsyncSessionLocal", sessionmaker)
+    monkeypatch.setattr(agui_events, "stream_itinerary", stream_itinerary)
+
+    async def run():
+        lines = [line async for line in agui_events.stream_itinerary_events(TRIP, None, "th1", "r1")]
+        async with sessionmaker() as db:
+            saved = (await db.execute(select(Itinerary))).scalars().all()
+        return [json.loads(line[len("data: "):]) for line in lines], saved
+
+    return asyncio.run(run())
+
+
+def test_chunks_replace_their_placeholder_days_and_the_result_is_saved(sessionmaker, monkeypatch):
+    itinerary = {**empty_itinerary(TRIP), "days": [day(1), day(2)], "total_estimated_cost": 20, "notes": []}
+    events, saved = run_stream(sessionmaker, monkeypatch, [
+        ("skeleton", [day(1, 0), day(2, 0)]),
+        ("chunk", [day(2)]),
+        ("chunk", [day(1)]),
+        ("complete", itinerary),
+    ])
+
+    assert [event["type"] for event in events] == [
+        "RUN_STARTED", "STATE_SNAPSHOT", "STATE_DELTA", "STATE_DELTA", "STATE_DELTA", "STATE_DELTA", "RUN_FINISHED",
+    ]
+    assert events[2]["delta"] == [{"op": "replace", "path": "/itinerary/days", "value": [day(1, 0), day(2, 0)]}]
+    assert events[3]["delta"] == [{"op": "replace", "path": "/itinerary/days/1", "value": day(2)}]
+    final = {op["path"]: op["value"] for op in events[5]["delta"]}
+    assert final["/itinerary/days"] == [day(1), day(2)] and final["/itinerary/version"] == 1
+    assert [row.id for row in saved] == [final["/itinerary/id"]]
+
+
+def test_itinerary_without_usable_days_is_a_run_error_and_not_saved(sessionmaker, monkeypatch):
+    events, saved = run_stream(sessionmaker, monkeypatch, [("complete", empty_itinerary(TRIP))])
+
+    assert [event["type"] for event in events] == ["RUN_STARTED", "STATE_SNAPSHOT", "RUN_ERROR"]
+    assert events[-1]["code"] == "ITINERARY_INVALID"
+    assert saved == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,154 @@
+"""Unit tests for windowed chat history and its per-session cache."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.config import Settings
+from app.db.models import ChatMessage, ChatSession
+from app.services import chat_history
+from app.services.chat_history import (
+    HistoryWindowCache,
+    get_recent_history,
+    load_recent_history,
+    message_key,
+    turn_history,
+)
+from app.services.chat_outbox import build_turn
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def key(index):
+    return message_key(START + timedelta(seconds=index), f"id{index:02d}")
+
+
+def entry(index, role="user"):
+    return key(index), {"role": role, "content": f"m{index}"}
+
+
+@pytest.fixture
+def seeded(sessionmaker):
+    """Session s1 with messages m0..m11, inserted newest first to rule out insertion order."""
+    async def seed():
+        async with sessionmaker() as db:
+            db.add(ChatSession(id="s1", user_id="u1"))
+            for index in reversed(range(12)):
+                created_at, message_id = key(index)
+                db.add(ChatMessage(
+                    id=message_id, session_id="s1", role="user" if index % 2 == 0 else "assistant",
+                    content=f"m{index}", created_at=created_at,
+                ))
+            await db.commit()
+
+    asyncio.run(seed())
+    return sessionmaker
+
+
+def contents(messages):
+    return [message["content"] for message in messages]
+
+
+class TestLoadRecentHistory:
+    def test_returns_the_newest_messages_oldest_first(self, seeded):
+        async def run():
+            async with seeded() as db:
+                return await load_recent_history(db, "s1", 4)
+
+        history = asyncio.run(run())
+        assert contents(history) == ["m8", "m9", "m10", "m11"]
+        assert history[0] == {"role": "user", "content": "m8"}
+
+    def test_reads_only_messages_after_the_covered_key(self, seeded, engine):
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement.upper()))
+
+        async def run():
+            async with seeded() as db:
+                return await load_recent_history(db, "s1", 20, after=key(8)), await load_recent_history(db, "s1", 20, after=key(11))
+
+        tail, nothing = asyncio.run(run())
+        assert contents(tail) == ["m9", "m10", "m11"]
+        assert nothing == []
+        # A keyset predicate instead of skipping (or counting) the summarized prefix
+        assert all("CHAT_MESSAGES.CREATED_AT >" in statement for statement in statements)
+        assert not any("COUNT(" in statement for statement in statements)
+
+    def test_messages_with_equal_timestamps_are_ordered_by_id(self, seeded):
+        async def run():
+            async with seeded() as db:
+                db.add(ChatMessage(id="id11b", session_id="s1", role="user", content="tie", created_at=key(11)[0]))
+                await db.commit()
+                return await load_recent_history(db, "s1", 20, after=key(11))
+
+        assert contents(asyncio.run(run())) == ["tie"]
+
+
+class TestHistoryWindowCache:
+    def test_disabled_by_default(self):
+        assert Settings.model_fields["chat_history_cache_sessions"].default == 0
+        cache = HistoryWindowCache(window=4, max_sessions=0)
+        cache.set("s1", [entry(0)])
+        cache.extend("s1", [entry(1)])
+        assert not cache.enabled
+        assert cache.get("s1") is None
+
+    def test_keeps_only_the_newest_window(self):
+        cache = HistoryWindowCache(window=3, max_sessions=2)
+        cache.set("s1", [entry(index) for index in range(5)])
+        assert contents(cache.get("s1")) == ["m2", "m3", "m4"]
+
+    def test_extend_rolls_the_window_and_ignores_uncached_sessions(self):
+        cache = HistoryWindowCache(window=3, max_sessions=2)
+        cache.set("s1", [entry(0), entry(1)])
+        cache.extend("s1", [entry(2), entry(3, "assistant")])
+        cache.extend("s2", [entry(4)])
+        assert contents(cache.get("s1")) == ["m1", "m2", "m3"]
+        assert cache.get("s2") is None
+
+    def test_get_skips_the_summarized_part(self):
+        cache = HistoryWindowCache(window=3, max_sessions=2)
+        cache.set("s1", [entry(7), entry(8), entry(9)])
+        assert contents(cache.get("s1", after=key(7))) == ["m8", "m9"]
+        assert contents(cache.get("s1", after=key(2))) == ["m7", "m8", "m9"]
+        assert cache.get("s1", after=key(9)) == []
+
+    def test_evicts_the_least_recently_used_session(self):
+        cache = HistoryWindowCache(window=3, max_sessions=2)
+        cache.set("s1", [entry(0)])
+        cache.set("s2", [entry(1)])
+        cache.get("s1")
+        cache.set("s3", [entry(2)])
+        assert cache.get("s2") is None
+        assert contents(cache.get("s1")) == ["m0"] and contents(cache.get("s3")) == ["m2"]
+
+    def test_invalidate(self):
+        cache = HistoryWindowCache(window=3, max_sessions=2)
+        cache.set("s1", [entry(0)])
+        cache.invalidate("s1")
+        assert cache.get("s1") is None
+
+
+def test_get_recent_history_fills_and_reuses_the_cache(seeded, monkeypatch):
+    cache = HistoryWindowCache(window=5, max_sessions=4)
+    monkeypatch.setattr(chat_history, "history_cache", cache)
+    monkeypatch.setattr(chat_history, "HISTORY_LIMIT", 5)
+    turn = build_turn("s1", "u1", False, "m12", START + timedelta(seconds=12), "m13", START + timedelta(seconds=13))
+
+    async def run():
+        async with seeded() as db:
+            first = await get_recent_history(db, "s1")
+        cache.extend("s1", turn_history(turn))
+        # The cached window answers without the database
+        second = await get_recent_history(None, "s1", after=key(10))
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert contents(first) == ["m7", "m8", "m9", "m10", "m11"]
+    assert contents(second) == ["m11", "m12", "m13"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
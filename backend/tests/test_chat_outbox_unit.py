@@ -0,0 +1,153 @@
+"""Unit tests for single-transaction chat turn writes and the outbox fallback."""
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.db.models import ChatMessage, ChatSession
+from app.services import chat_outbox as outbox_module
+from app.services.chat_outbox import ChatOutbox, build_turn
+
+
+@pytest.fixture
+def sessionmaker(sessionmaker, monkeypatch):
+    monkeypatch.setattr(outbox_module, "AsyncSessionLocal", sessionmaker)
+    return sessionmaker
+
+
+def make_turn(session_id="s1", new_session=True):
+    now = datetime.now(timezone.utc)
+    return build_turn(session_id, "u1", new_session, "Hi", now, "Hello!", now, {"k": 1})
+
+
+async def count(maker, model):
+    async with maker() as db:
+        return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+class TestChatOutbox:
+    def test_save_writes_session_and_both_messages(self, sessionmaker, tmp_path):
+        outbox = ChatOutbox(str(tmp_path / "outbox.jsonl"), retry_seconds=60)
+
+        async def run():
+            assert await outbox.save(make_turn()) is True
+            assert await count(sessionmaker, ChatSession) == 1
+            assert await count(sessionmaker, ChatMessage) == 2
+
+        asyncio.run(run())
+        assert outbox.pending == 0
+
+    def test_failed_write_is_spooled_and_replayed_once(self, sessionmaker, tmp_path, monkeypatch):
+        outbox = ChatOutbox(str(tmp_path / "outbox.jsonl"), retry_seconds=60)
+        path = tmp_path / f"outbox.{os.getpid()}.jsonl"
+        turn = make_turn()
+
+        def broken():
+            raise RuntimeError("database is locked")
+
+        async def run():
+            monkeypatch.setattr(outbox_module, "AsyncSessionLocal", broken)
+            assert await outbox.save(turn) is False
+            assert outbox.pending == 1
+            assert json.loads(path.read_text())["session_id"] == "s1"
+
+            monkeypatch.setattr(outbox_module, "AsyncSessionLocal", sessionmaker)
+            assert await outbox.drain() == 0
+            # Replaying a turn that is already stored is a no-op
+            await outbox.add(turn)
+            assert await outbox.drain() == 0
+            await outbox.stop()
+            assert await count(sessionmaker, ChatMessage) == 2
+
+        asyncio.run(run())
+        assert not path.exists()
+
+    def test_start_loads_leftover_turns(self, sessionmaker, tmp_path):
+        path = tmp_path / "outbox.jsonl"
+        path.write_text(json.dumps(make_turn()) + "\n")
+        outbox = ChatOutbox(str(path), retry_seconds=60)
+
+        async def run():
+            await outbox.start()
+            assert outbox.pending == 1
+            assert await outbox.drain() == 0
+            await outbox.stop()
+
+        asyncio.run(run())
+
+    def test_start_adopts_files_of_dead_processes_only(self, sessionmaker, tmp_path, monkeypatch):
+        monkeypatch.setattr(outbox_module, "pid_alive", lambda pid: pid == 222)
+        (tmp_path / "outbox.111.jsonl").write_text(json.dumps(make_turn("s1")) + "\n")
+        (tmp_path / "outbox.222.jsonl").write_text(json.dumps(make_turn("s2")) + "\n")
+        outbox = ChatOutbox(str(tmp_path / "outbox.jsonl"), retry_seconds=60)
+
+        async def run():
+            await outbox.start()
+            await outbox.stop()
+
+        asyncio.run(run())
+        assert [turn["session_id"] for turn in outbox._pending] == ["s1"]
+        assert not (tmp_path / "outbox.111.jsonl").exists()
+        assert (tmp_path / "outbox.222.jsonl").exists()
+        assert (tmp_path / f"outbox.{os.getpid()}.jsonl").exists()
+
+    def test_integrity_error_moves_turn_to_dead_letters(self, sessionmaker, tmp_path, monkeypatch):
+        outbox = ChatOutbox(str(tmp_path / "outbox.jsonl"), retry_seconds=60)
+
+        async def write_turn(db, turn):
+            raise IntegrityError("INSERT", {}, Exception("FOREIGN KEY constraint failed"))
+
+        async def run():
+            await outbox.add(make_turn())
+            await outbox.stop()
+            monkeypatch.setattr(outbox_module, "write_turn", write_turn)
+            return await outbox.drain()
+
+        assert asyncio.run(run()) == 0
+        assert json.loads((tmp_path / "outbox.dead.jsonl").read_text())["session_id"] == "s1"
+
+    def test_turn_is_dead_lettered_after_max_attempts(self, sessionmaker, tmp_path, monkeypatch):
+        outbox = ChatOutbox(str(tmp_path / "outbox.jsonl"), retry_seconds=60, max_attempts=2)
+
+        def broken():
+            raise RuntimeError("database is locked")
+
+        async def run():
+            await outbox.add(make_turn())
+            await outbox.stop()
+            monkeypatch.setattr(outbox_module, "AsyncSessionLocal", broken)
+            return [await outbox.drain(), await outbox.drain()]
+
+        assert asyncio.run(run()) == [1, 0]
+        assert json.loads((tmp_path / "outbox.dead.jsonl").read_text())["attempts"] == 2
+
+    def test_add_does_not_wait_for_a_slow_replay(self, sessionmaker, tmp_path, monkeypatch):
+        outbox = ChatOutbox(str(tmp_path / "outbox.jsonl"), retry_seconds=60)
+
+        async def run():
+            release = asyncio.Event()
+
+            async def write_turn(db, turn):
+                await release.wait()
+
+            await outbox.add(make_turn("s1"))
+            await outbox.stop()
+            monkeypatch.setattr(outbox_module, "write_turn", write_turn)
+            draining = asyncio.create_task(outbox.drain())
+            await asyncio.sleep(0)
+            await asyncio.wait_for(outbox.add(make_turn("s2")), timeout=1)
+            await outbox.stop()
+            release.set()
+            return await draining
+
+        # s1 was stored by the slow replay; s2 arrived meanwhile and stays pending
+        assert asyncio.run(run()) == 1
+        assert [turn["session_id"] for turn in outbox._pending] == ["s2"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,74 @@
+"""Unit tests for chat session summaries and message pages."""
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import ChatMessage, ChatSession
+from app.services.chat_sessions import PREVIEW_CHARS, session_messages, session_summary_columns
+
+
+@pytest.fixture
+def engine(engine):
+    async def setup():
+        async with AsyncSession(engine) as db:
+            db.add(ChatSession(id="s1", user_id="u1", created_at=datetime(2026, 1, 1)))
+            db.add(ChatSession(id="s2", user_id="u1", created_at=datetime(2026, 1, 2)))
+            for i in range(3):
+                db.add(ChatMessage(
+                    id=f"m{i}", session_id="s1", role="user", content=f"message {i} " + "x" * 200,
+                    created_at=datetime(2026, 1, 1, 10, i)
+                ))
+            await db.commit()
+
+    asyncio.run(setup())
+    return engine
+
+
+class TestSessionSummaries:
+    def test_aggregates_in_one_statement(self, engine):
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        columns = session_summary_columns()
+
+        async def run():
+            async with AsyncSession(engine) as db:
+                result = await db.execute(
+                    select(*(column.label(name) for name, column in columns.items()))
+                    .order_by(ChatSession.created_at.desc())
+                )
+                return result.all()
+
+        empty, busy = asyncio.run(run())
+        assert len(statements) == 1
+        assert (empty.id, empty.message_count, empty.last_message_preview) == ("s2", 0, None)
+        assert empty.last_activity_at == datetime(2026, 1, 2)
+        assert busy.message_count == 3
+        assert busy.last_message_preview.startswith("message 2")
+        assert len(busy.last_message_preview) == PREVIEW_CHARS
+        assert busy.last_activity_at == datetime(2026, 1, 1, 10, 2)
+
+
+class TestSessionMessages:
+    def test_pages_and_ownership(self, engine):
+        async def run():
+            async with AsyncSession(engine) as db:
+                page = await session_messages(db, "s1", "u1", order_by=(ChatMessage.created_at,), limit=2)
+                empty = await session_messages(db, "s2", "u1")
+                with pytest.raises(HTTPException) as exc:
+                    await session_messages(db, "s1", "someone-else")
+                return page, empty, exc.value.status_code
+
+        page, empty, status = asyncio.run(run())
+        assert [message["id"] for message in page] == ["m0", "m1"]
+        assert page[0]["metadata"] is None
+        assert empty == []
+        assert status == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
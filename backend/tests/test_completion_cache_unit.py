@@ -0,0 +1,97 @@
+"""Unit tests for the TravelAgent completion cache."""
+import asyncio
+
+import pytest
+
+from app.services.completion_cache import (
+    CompletionCache,
+    LRUCacheTier,
+    make_cache_key,
+    normalize_prompt,
+)
+
+
+class TestCacheKey:
+    def test_normalize_prompt_collapses_whitespace_and_case(self):
+        assert normalize_prompt("  3 Days in\n Tokyo ") == "3 days in tokyo"
+
+    def test_equivalent_prompts_share_key(self):
+        a = make_cache_key("3 days in Tokyo", [], "gpt-4o-mini", 0.7)
+        b = make_cache_key("3  days in tokyo ", None, "gpt-4o-mini", 0.7)
+        assert a == b
+
+    def test_key_depends_on_model_temperature_and_history(self):
+        base = make_cache_key("3 days in Tokyo", [], "gpt-4o-mini", 0.7)
+        assert base != make_cache_key("3 days in Tokyo", [], "gpt-4o", 0.7)
+        assert base != make_cache_key("3 days in Tokyo", [], "gpt-4o-mini", 0.2)
+        history = [{"role": "user", "content": "Hi"}]
+        assert base != make_cache_key("3 days in Tokyo", history, "gpt-4o-mini", 0.7)
+
+
+class TestLRUCacheTier:
+    def test_evicts_least_recently_used(self):
+        tier = LRUCacheTier(max_entries=2, max_bytes=10_000, ttl_seconds=60)
+        tier.set("a", {"message": "a"})
+        tier.set("b", {"message": "b"})
+        tier.get("a")
+        tier.set("c", {"message": "c"})
+
+        assert tier.get("a") is not None
+        assert tier.get("b") is None
+        assert tier.evictions == 1
+
+    def test_evicts_by_size(self):
+        tier = LRUCacheTier(max_entries=100, max_bytes=60, ttl_seconds=60)
+        tier.set("a", {"message": "x" * 30})
+        tier.set("b", {"message": "y" * 30})
+
+        assert len(tier) == 1
+        assert tier.get("b") is not None
+        assert tier.size_bytes <= 60
+
+    def test_expired_entries_are_dropped(self):
+        tier = LRUCacheTier(max_entries=10, max_bytes=10_000, ttl_seconds=0)
+        tier.set("a", {"message": "a"})
+        assert tier.get("a") is None
+        assert len(tier) == 0
+
+
+class TestCompletionCache:
+    def test_hit_and_miss_counters(self):
+        cache = CompletionCache(max_entries=10)
+
+        async def run():
+            assert await cache.get("k") is None
+            await cache.set("k", {"message": "hello", "metadata": None})
+            return await cache.get("k")
+
+        assert asyncio.run(run()) == {"message": "hello", "metadata": None}
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+
+    def test_returned_values_are_copies(self):
+        cache = CompletionCache(max_entries=10)
+
+        async def run():
+            await cache.set("k", {"metadata": {"days": []}})
+            first = await cache.get("k")
+            first["metadata"]["days"].append(1)
+            return await cache.get("k")
+
+        assert asyncio.run(run()) == {"metadata": {"days": []}}
+
+    def test_disabled_cache_never_hits(self):
+        cache = CompletionCache(enabled=False)
+
+        async def run():
+            await cache.set("k", {"message": "hello"})
+            return await cache.get("k")
+
+        assert asyncio.run(run()) is None
+        assert cache.stats()["hits"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,143 @@
+"""Unit tests for token-budgeted conversation packing."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.db.models import ChatMessage, ChatSession, ChatSummary
+from app.services.chat_history import get_recent_history
+from app.services import conversation_context
+from app.services.conversation_context import SummaryRefresher, load_summary, pack_messages
+from app.utils import tokens
+from app.utils.tokens import count_message_tokens, truncate_to_tokens, count_tokens
+
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def turn(role, words, word="word"):
+    return {"role": role, "content": " ".join([word] * words)}
+
+
+class TestPackMessages:
+    def test_keeps_system_prompt_summary_and_new_message(self):
+        packed = pack_messages("You are helpful", "Hi", history=[], summary="User likes Japan", budget=500)
+        assert packed[0] == {"role": "system", "content": "You are helpful"}
+        assert "User likes Japan" in packed[1]["content"]
+        assert packed[-1] == {"role": "user", "content": "Hi"}
+
+    def test_drops_oldest_turns_beyond_budget(self):
+        history = [turn("user", 100, "old"), turn("assistant", 100), {"role": "user", "content": "latest turn"}]
+        packed = pack_messages("sys", "new", history=history, budget=150)
+        contents = [m["content"] for m in packed]
+        assert "latest turn" in contents
+        assert history[0]["content"] not in contents
+        assert count_message_tokens(packed) <= 150
+
+    def test_truncates_an_oversized_latest_turn(self):
+        history = [turn("assistant", 2000)]
+        packed = pack_messages("sys", "new", history=history, budget=300)
+        assert len(packed) == 3
+        assert 0 < count_tokens(packed[1]["content"]) < count_tokens(history[0]["content"])
+        assert count_message_tokens(packed) <= 300
+
+    def test_summary_is_dropped_before_the_new_message(self):
+        packed = pack_messages("sys", "x " * 400, summary="long summary " * 50, budget=300)
+        assert [m["role"] for m in packed] == ["system", "user"]
+
+
+def test_truncate_to_tokens_is_noop_for_short_text():
+    assert truncate_to_tokens("short", 100) == "short"
+
+
+def test_failed_encoding_load_is_not_cached(monkeypatch):
+    attempts = []
+
+    class FlakyTiktoken:
+        @staticmethod
+        def get_encoding(name):
+            attempts.append(name)
+            if len(attempts) == 1:
+                raise OSError("download timed out")
+            return "encoding"
+
+    monkeypatch.setattr(tokens, "tiktoken", FlakyTiktoken)
+    monkeypatch.setattr(tokens, "_loaded", None)
+    monkeypatch.setattr(tokens, "_failed_at", None)
+
+    assert tokens.load_encoding() is None
+    assert tokens._encoding() is None  # no reload on the request path within the retry interval
+    assert tokens.load_encoding() == "encoding"
+    assert len(attempts) == 2
+
+
+def test_context_includes_messages_the_summary_does_not_cover_yet(sessionmaker):
+    """Messages between the summary and the window are neither dropped nor repeated."""
+    async def run():
+        async with sessionmaker() as db:
+            db.add(ChatSession(id="s1", user_id="u1"))
+            for index in range(20):
+                db.add(ChatMessage(
+                    id=f"id{index:02d}", session_id="s1", role="user", content=f"m{index}",
+                    created_at=START + timedelta(minutes=index),
+                ))
+            # Covers m0..m7; the refresher waits until 6 more messages leave a 10-message window
+            db.add(ChatSummary(
+                session_id="s1", summary="Earlier", message_count=8,
+                covered_until=START + timedelta(minutes=7), covered_message_id="id07",
+            ))
+            await db.commit()
+
+        async with sessionmaker() as db:
+            summary, covered = await load_summary(db, "s1")
+            history = await get_recent_history(db, "s1", after=covered)
+        return summary, covered, history
+
+    summary, covered, history = asyncio.run(run())
+    assert (summary, covered) == ("Earlier", (START + timedelta(minutes=7), "id07"))
+    assert [msg["content"] for msg in history] == [f"m{index}" for index in range(8, 20)]
+
+
+def test_refresh_summarizes_a_transcript_larger_than_the_budget_in_chunks(sessionmaker, monkeypatch):
+    monkeypatch.setattr(conversation_context, "AsyncSessionLocal", sessionmaker)
+    monkeypatch.setattr(conversation_context.settings, "context_token_budget", 300)
+    prompts = []
+
+    class FakeGateway:
+        async def chat_completion(self, **kwargs):
+            prompts.append(kwargs["messages"][1]["content"])
+            message = SimpleNamespace(content=f"summary {len(prompts)}")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    monkeypatch.setattr(conversation_context, "llm_gateway", FakeGateway())
+
+    async def run():
+        async with sessionmaker() as db:
+            db.add(ChatSession(id="s1", user_id="u1"))
+            for index in range(12):
+                # Long itinerary-sized replies: together far over the 300-token budget
+                db.add(ChatMessage(
+                    id=f"id{index:02d}", session_id="s1", role="assistant", content=f"reply{index} " + "word " * 100,
+                    created_at=START + timedelta(minutes=index),
+                ))
+            await db.commit()
+
+        refresher = SummaryRefresher(window=4, refresh_every=6, max_tokens=100)
+        assert await refresher.refresh("s1")
+        async with sessionmaker() as db:
+            return await load_summary(db, "s1")
+
+    summary, covered = asyncio.run(run())
+    assert covered == (START + timedelta(minutes=7), "id07")
+    assert len(prompts) > 1
+    # Every message that is marked covered was sent to the summarizer
+    sent = "\n".join(prompts)
+    assert all(f"reply{index} " in sent for index in range(8))
+    assert "reply8 " not in sent
+    assert summary == f"summary {len(prompts)}"
+    assert f"Current summary:\nsummary {len(prompts) - 1}" in prompts[-1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
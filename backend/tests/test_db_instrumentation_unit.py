@@ -0,0 +1,155 @@
+"""Unit tests for database engine profiles, query instrumentation and schema upgrades."""
+import asyncio
+
+import pytest
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import Settings
+from app.db.database import Base, create_engines, engine_options, session_factory, upgrade_schema
+from app.db.instrumentation import QueryStats, instrument_engine, pool_status
+
+
+class TestEngineOptions:
+    def test_sqlite_wal_profile_has_single_writer(self):
+        settings = Settings(database_url="sqlite+aiosqlite:///./x.db", sqlite_read_pool_size=4)
+        writer = engine_options(settings)
+        reader = engine_options(settings, read_only=True)
+        assert (writer["pool_size"], writer["max_overflow"]) == (1, 0)
+        assert reader["pool_size"] == 4
+        assert writer["echo"] is False
+
+    def test_sqlite_memory_gets_no_pool_tuning(self):
+        options = engine_options(Settings(database_url="sqlite+aiosqlite://"))
+        assert "pool_size" not in options
+
+    def test_asyncpg_profile(self):
+        options = engine_options(Settings(
+            database_url="postgresql+asyncpg://u:p@db/app",
+            db_pool_size=5,
+            db_statement_cache_size=0,
+            db_statement_timeout_ms=1500,
+        ))
+        assert options["pool_size"] == 5
+        assert options["pool_pre_ping"] is True
+        assert options["url"].query["prepared_statement_cache_size"] == "0"
+        assert options["connect_args"] == {
+            "statement_cache_size": 0,
+            "server_settings": {"statement_timeout": "1500"},
+        }
+
+
+class TestQueryStats:
+    def test_histogram_and_slow_count(self):
+        stats = QueryStats(slow_query_ms=100)
+        stats.record("SELECT 1", 0.5)
+        stats.record("SELECT 2", 30)
+        stats.record("SELECT 3", 120)
+        snapshot = stats.snapshot()
+        assert snapshot["count"] == 3
+        assert snapshot["slow"] == 1
+        assert snapshot["histogram"]["le_1ms"] == 1
+        assert snapshot["histogram"]["le_50ms"] == 1
+        assert snapshot["histogram"]["le_250ms"] == 1
+
+    def test_engine_events_record_statements(self, tmp_path):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'x.db'}")
+        stats = QueryStats(slow_query_ms=0)
+        instrument_engine(engine.sync_engine, stats)
+
+        async def run():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                with pytest.raises(Exception):
+                    await conn.execute(text("SELECT * FROM missing_table"))
+            assert "class" in pool_status(engine.sync_engine)
+            await engine.dispose()
+
+        asyncio.run(run())
+        assert stats.count == 1
+
+
+class TestSqliteRouting:
+    def test_reads_use_query_only_pool_and_writes_the_writer(self, tmp_path):
+        settings = Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / 'x.db'}")
+        writer, reader = create_engines(settings)
+        assert reader is not writer
+        maker = session_factory(writer, reader)
+
+        async def run():
+            async with writer.begin() as conn:
+                await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+                mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar_one()
+            assert mode == "wal"
+
+            async with maker() as db:
+                await db.execute(text("INSERT INTO t VALUES (1)"))
+                # Same transaction reads its own write through the writer
+                assert (await db.execute(text("SELECT count(*) FROM t"))).scalar_one() == 1
+                await db.commit()
+                assert (await db.execute(text("SELECT count(*) FROM t"))).scalar_one() == 1
+
+            async with reader.connect() as conn:
+                with pytest.raises(Exception):
+                    await conn.execute(text("INSERT INTO t VALUES (2)"))
+
+            await writer.dispose()
+            await reader.dispose()
+
+        asyncio.run(run())
+
+
+class TestUpgradeSchema:
+    LEGACY = [
+        "CREATE TABLE packing_items (id VARCHAR PRIMARY KEY, trip_id VARCHAR NOT NULL,"
+        " category VARCHAR(50) NOT NULL, item VARCHAR(255) NOT NULL)",
+        "INSERT INTO packing_items VALUES ('p1', 't1', 'Docs', 'Passport'), ('p2', 't1', 'Docs', 'Passport'),"
+        " ('p3', 't1', 'Gear', 'Charger'), ('p4', 't2', 'Docs', 'Passport')",
+    ]
+
+    def test_dedupes_and_adds_unique_indexes_and_columns_to_a_legacy_database(self, tmp_path):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}")
+
+        async def run():
+            async with engine.begin() as conn:
+                for statement in self.LEGACY:
+                    await conn.execute(text(statement))
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(upgrade_schema)
+                await conn.run_sync(upgrade_schema)
+                rows = (await conn.execute(text("SELECT id, notes FROM packing_items ORDER BY id"))).all()
+                indexes = await conn.run_sync(lambda sync: inspect(sync).get_indexes("packing_items"))
+            duplicate_rejected = False
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(text("INSERT INTO packing_items (id, trip_id, category, item) "
+                                            "VALUES ('p5', 't1', 'Gear', 'Charger')"))
+            except IntegrityError:
+                duplicate_rejected = True
+            await engine.dispose()
+            return rows, indexes, duplicate_rejected
+
+        rows, indexes, duplicate_rejected = asyncio.run(run())
+        assert rows == [("p1", None), ("p3", None), ("p4", None)]
+        assert {index["name"] for index in indexes if index["unique"]} == {"uq_packing_items_trip_category_item"}
+        assert duplicate_rejected
+
+    def test_is_a_no_op_on_a_current_database(self, tmp_path):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'current.db'}")
+        statements = []
+
+        async def run():
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                event.listen(engine.sync_engine, "before_cursor_execute",
+                             lambda conn, cursor, statement, *args: statements.append(statement.upper()))
+                await conn.run_sync(upgrade_schema)
+            await engine.dispose()
+
+        asyncio.run(run())
+        assert statements
+        assert all(statement.startswith(("PRAGMA", "SELECT")) for statement in statements)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
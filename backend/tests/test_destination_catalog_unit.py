@@ -0,0 +1,104 @@
+"""Unit tests for the destination catalog index and scoring."""
+import asyncio
+
+import pytest
+
+from app.models.trip import DestinationPreferences
+from app.services import agent_service
+from app.services.agent_service import phrase_match_reasons
+from app.services.destination_catalog import (
+    BUNDLED_CATALOG,
+    CatalogDestination,
+    DestinationCatalog,
+    build_catalog,
+    month_ranges,
+    read_catalog,
+    tag_key,
+    write_catalog,
+)
+
+
+def record(name, country, climate="temperate", months=(4, 5), mid_range=100, tags=("food",)):
+    return {
+        "name": name, "country": country, "region": "Europe", "climate": climate,
+        "best_months": list(months),
+        "daily_budget": {"budget": mid_range / 2, "mid_range": mid_range, "luxury": mid_range * 3},
+        "tags": list(tags), "highlights": ["h"], "pros": ["p"], "cons": ["c"],
+    }
+
+
+@pytest.fixture
+def catalog():
+    catalog = DestinationCatalog()
+    catalog.index([CatalogDestination.model_validate(item) for item in [
+        record("Lisbon", "Portugal", "mediterranean", (3, 4, 5, 9, 10), 110, ("food", "beach", "history")),
+        record("Porto", "Portugal", "mediterranean", (6, 7, 8), 80, ("wine", "food")),
+        record("Bangkok", "Thailand", "tropical", (11, 12, 1, 2), 70, ("food", "temples", "nightlife")),
+        record("Zurich", "Switzerland", "cold", (6, 7), 250, ("hiking", "lakes")),
+    ]])
+    return catalog
+
+
+def test_helpers():
+    assert month_ranges([3, 4, 5, 9, 10]) == "Mar-May, Sep-Oct"
+    assert month_ranges([11, 12, 1, 2, 6]) == "Jun, Nov-Feb"
+    assert month_ranges(range(1, 13)) == "Year-round"
+    assert [tag_key(word) for word in ("Beaches", "museums", "galleries", "glass", "Thermal  Baths")] == [
+        "beach", "museum", "gallery", "glass", "thermal bath"
+    ]
+
+
+def test_scoring_is_deterministic_and_weighted(catalog):
+    preferences = DestinationPreferences(interests=["Food", "beaches"], budget="mid-range", month=4, climate="mediterranean")
+    results = catalog.recommend(preferences)
+
+    assert [result.name for result in results] == ["Lisbon", "Porto", "Bangkok", "Zurich"]
+    assert results[0].match_score == 100
+    assert results[0].match_reasons[0] == "Great for Food, beaches"
+    assert results[0].best_time_to_visit == "Mar-May, Sep-Oct"
+    # food (20) + budget tier adjacent (0.4 * 25) + climate (15) of 100
+    assert results[1].match_score == 45
+    assert [result.match_score for result in catalog.recommend(preferences)] == [result.match_score for result in results]
+
+
+def test_country_filter_count_and_ties(catalog):
+    assert [result.name for result in catalog.recommend(DestinationPreferences(country="portugal"))] == ["Lisbon", "Porto"]
+    assert catalog.recommend(DestinationPreferences(country="Chile")) == []
+    results = catalog.recommend(DestinationPreferences(count=2))
+    assert [(result.name, result.match_score) for result in results] == [("Lisbon", 50), ("Porto", 50)]
+    assert results[0].id == "dest_lisbon-portugal"
+
+
+def test_build_validates_and_dedupes(tmp_path):
+    records = build_catalog([record("Lisbon", "Portugal", tags=(" Food ", "food")), record("lisbon", "portugal", mid_range=90)])
+    assert len(records) == 1 and records[0]["daily_budget"]["mid_range"] == 90
+
+    with pytest.raises(ValueError):
+        build_catalog([record("Nowhere", "X", climate="lunar")])
+
+    path = tmp_path / "catalog.json"
+    write_catalog(records, path)
+    assert read_catalog(path) == records
+
+
+def test_bundled_catalog_loads():
+    catalog = DestinationCatalog(BUNDLED_CATALOG).load()
+    assert len(catalog.entries) >= 40
+    assert len({entry.id for entry in catalog.entries}) == len(catalog.entries)
+
+
+def test_phrased_reasons_fall_back_per_destination(catalog, monkeypatch):
+    results = catalog.recommend(DestinationPreferences(interests=["food"], count=2))
+
+    async def structured_completion(prompt, model, max_tokens, user_id=None, cache=True):
+        assert "dest_lisbon-portugal" in prompt
+        return {"destinations": [{"id": "dest_lisbon-portugal", "reasons": ["Lisbon is a food lover's dream."]}]}
+
+    monkeypatch.setattr(agent_service, "structured_completion", structured_completion)
+    phrased = asyncio.run(phrase_match_reasons(results, DestinationPreferences(interests=["food"])))
+    assert phrased[0].match_reasons == ["Lisbon is a food lover's dream."]
+    assert phrased[1].match_reasons == results[1].match_reasons
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
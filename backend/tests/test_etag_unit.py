@@ -0,0 +1,34 @@
+"""Unit tests for ETag helpers."""
+import pytest
+
+from app.utils.etag import etag_for, etag_matches, version_etag
+
+
+class TestEtag:
+    def test_etag_is_stable_and_content_sensitive(self):
+        assert etag_for({"a": 1, "b": [1, 2]}) == etag_for({"b": [1, 2], "a": 1})
+        assert etag_for({"a": 1}) != etag_for({"a": 2})
+        assert etag_for({}).startswith('"')
+
+    def test_matches_lists_weak_tags_and_wildcard(self):
+        etag = etag_for({"a": 1})
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"other", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"other"', etag)
+        assert not etag_matches(None, etag)
+
+    def test_strong_comparison_rejects_weak_tags(self):
+        etag = version_etag("it1", 2)
+        assert etag_matches(etag, etag, weak=False)
+        assert not etag_matches(f"W/{etag}", etag, weak=False)
+        assert not etag_matches(f"W/{etag}", f"W/{etag}", weak=False)
+        assert etag_matches("*", etag, weak=False)
+
+    def test_version_etag_changes_with_version(self):
+        assert version_etag("it1", 2) == '"it1.2"'
+        assert not etag_matches(version_etag("it1", 2), version_etag("it1", 3))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,90 @@
+"""Unit tests for partial itinerary edits."""
+import pytest
+from pydantic import TypeAdapter, ValidationError
+from typing import List
+
+from app.models.itinerary import ItineraryPatchOperation
+from app.services.itinerary_edits import apply_operations, replace_day, replace_time_slot
+from app.utils.json_patch import JsonPatchError
+
+operations = TypeAdapter(List[ItineraryPatchOperation])
+
+
+def activity(activity_id, time_slot="morning"):
+    return {
+        "id": activity_id, "name": activity_id, "type": "attraction", "time_slot": time_slot,
+        "duration": 60, "location": {"name": "L"}, "cost": 10,
+    }
+
+
+def itinerary():
+    return {
+        "destination": "Tokyo", "start_date": "2026-01-01", "end_date": "2026-01-02",
+        "days": [
+            {"day_number": 1, "date": "2026-01-01", "activities": [activity("a1"), activity("a2")], "meals": [], "daily_cost": 20},
+            {"day_number": 2, "date": "2026-01-02", "activities": [activity("b1")], "meals": [], "daily_cost": 10},
+        ],
+        "total_estimated_cost": 30,
+    }
+
+
+class TestApplyOperations:
+    def test_shortcuts_expand_to_json_patch(self):
+        data = itinerary()
+        result, patch = apply_operations(data, operations.validate_python([
+            {"op": "move_activity", "activity_id": "a1", "to_day": 2, "time_slot": "evening"},
+            {"op": "edit_activity", "activity_id": "a2", "changes": {"cost": 5}},
+        ]))
+        assert [a["id"] for a in result["days"][1]["activities"]] == ["b1", "a1"]
+        assert result["days"][1]["activities"][1]["time_slot"] == "evening"
+        assert result["days"][0]["activities"][0]["cost"] == 5
+        assert patch[0] == {"op": "move", "from": "/days/0/activities/0", "path": "/days/1/activities/1"}
+        assert {op["op"] for op in patch} == {"move", "replace"}
+        assert data == itinerary()
+
+    def test_move_within_day_and_add_day(self):
+        result, _ = apply_operations(itinerary(), operations.validate_python([
+            {"op": "move_activity", "activity_id": "a1", "to_day": 1},
+            {"op": "add_day", "day": {"day_number": 3, "date": "2026-01-03", "activities": [], "meals": [], "daily_cost": 0}},
+        ]))
+        assert [a["id"] for a in result["days"][0]["activities"]] == ["a2", "a1"]
+        assert len(result["days"]) == 3
+
+    def test_validates_touched_days(self):
+        with pytest.raises(ValidationError):
+            apply_operations(itinerary(), operations.validate_python([
+                {"op": "replace", "path": "/days/1/activities/0/type", "value": "nap"},
+            ]))
+        with pytest.raises(ValidationError):
+            apply_operations(itinerary(), operations.validate_python([{"op": "remove", "path": "/days"}]))
+
+    def test_rejects_unknown_targets(self):
+        with pytest.raises(JsonPatchError):
+            apply_operations(itinerary(), operations.validate_python([
+                {"op": "move_activity", "activity_id": "zzz", "to_day": 1},
+            ]))
+        with pytest.raises(JsonPatchError):
+            apply_operations(itinerary(), operations.validate_python([
+                {"op": "add_day", "day": {"day_number": 1, "date": "2026-01-01", "activities": [], "meals": [], "daily_cost": 0}},
+            ]))
+
+
+class TestSplicing:
+    def test_replace_time_slot_keeps_other_slots_and_costs(self):
+        data = itinerary()
+        data["days"][0]["activities"][1]["time_slot"] = "evening"
+        result = replace_time_slot(data, 0, "morning", [dict(activity("new", "morning"), cost=25)])
+        assert [a["id"] for a in result["days"][0]["activities"]] == ["new", "a2"]
+        assert result["days"][0]["daily_cost"] == 35
+        assert result["total_estimated_cost"] == 45
+        assert data["days"][0]["activities"][0]["id"] == "a1"
+
+    def test_replace_day_adjusts_total(self):
+        day = {"day_number": 2, "date": "2026-01-02", "activities": [], "meals": [], "daily_cost": 50}
+        result = replace_day(itinerary(), 1, day)
+        assert result["days"][1] == day
+        assert result["total_estimated_cost"] == 70
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,77 @@
+"""Unit tests for itinerary version history."""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Itinerary, ItineraryVersion
+from app.services import itinerary_history
+from app.services.itinerary_history import document_at, list_versions, load_version, save_itinerary_version
+from app.services.itinerary_service import save_itinerary_data
+
+
+@pytest.fixture(autouse=True)
+def history_settings(monkeypatch):
+    monkeypatch.setattr(itinerary_history.settings, "itinerary_snapshot_every", 3)
+    monkeypatch.setattr(itinerary_history.settings, "itinerary_history_max_versions", 4)
+
+
+def document(n):
+    return {"destination": "Tokyo", "days": [{"day_number": 1, "theme": f"theme {n}"}], "notes": ["x"] * n}
+
+
+async def write_versions(engine, count):
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        itinerary_id = await save_itinerary_data(db, "t1", document(1), "u1")
+        await db.commit()
+        for n in range(2, count + 1):
+            itinerary = await db.get(Itinerary, itinerary_id)
+            assert await save_itinerary_version(db, itinerary, document(n), "u1")
+            await db.commit()
+    return itinerary_id
+
+
+class TestHistory:
+    def test_rebuilds_versions_from_snapshots_and_patches(self, engine):
+        async def run():
+            itinerary_id = await write_versions(engine, 5)
+            async with AsyncSession(engine) as db:
+                versions = await list_versions(db, itinerary_id)
+                rebuilt = [await load_version(db, itinerary_id, n) for n in range(1, 6)]
+                patch = (await db.execute(
+                    select(ItineraryVersion.patch).where(ItineraryVersion.version == 5)
+                )).scalar_one()
+            return versions, rebuilt, patch
+
+        versions, rebuilt, patch = asyncio.run(run())
+        assert [(row.version, row.snapshot) for row in versions] == [
+            (5, False), (4, False), (3, True), (2, False), (1, True)
+        ]
+        assert rebuilt == [document(n) for n in range(1, 6)]
+        assert patch == [
+            {"op": "replace", "path": "/days/0/theme", "value": "theme 5"},
+            {"op": "add", "path": "/notes/-", "value": "x"},
+        ]
+
+    def test_compaction_keeps_newest_versions_reconstructable(self, engine):
+        async def run():
+            itinerary_id = await write_versions(engine, 9)
+            async with AsyncSession(engine) as db:
+                versions = [row.version for row in await list_versions(db, itinerary_id)]
+                oldest = await load_version(db, itinerary_id, min(versions))
+                with pytest.raises(HTTPException):
+                    await load_version(db, itinerary_id, 1)
+                itinerary = await db.get(Itinerary, itinerary_id)
+                with pytest.raises(HTTPException):
+                    await document_at(db, itinerary, 10)
+            return versions, oldest
+
+        versions, oldest = asyncio.run(run())
+        assert versions == [9, 8, 7, 6]
+        assert oldest == document(6)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,201 @@
+"""Unit tests for skeleton + fan-out itinerary generation."""
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import agent_service, itinerary_planner
+from app.services.itinerary_planner import generate_itinerary, stream_itinerary, trip_dates
+
+
+def make_trip(start="2026-03-01", end="2026-03-10"):
+    return SimpleNamespace(
+        id="t1", user_id="u1", destination="Lisbon", start_date=start, end_date=end,
+        travelers=2, budget=2000, currency="EUR", notes=None,
+    )
+
+
+def fake_llm(monkeypatch, fail_days=()):
+    """Answer skeleton and chunk prompts; record calls and peak concurrency."""
+    state = {"prompts": [], "cached": [], "active": 0, "peak": 0}
+
+    async def structured_completion(prompt, model, max_tokens, user_id=None, cache=True):
+        state["prompts"].append(prompt)
+        state["cached"].append(cache)
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        if prompt.startswith("Outline"):
+            count = int(re.search(r"a (\d+)-day", prompt).group(1))
+            return {"days": [{"day_number": n, "theme": f"Theme {n}"} for n in range(1, count + 1)], "notes": ["Skeleton"]}
+        first, last = map(int, re.search(r"days (\d+) to (\d+)", prompt).groups())
+        return {"days": [
+            {
+                "day_number": n, "date": "wrong", "theme": "",
+                "activities": [{"id": "act_1", "name": f"Visit {n}", "type": "attraction",
+                                "time_slot": "morning", "duration": 60, "location": {"name": "X"}, "cost": 10}],
+                "meals": [], "daily_cost": 10,
+            }
+            for n in range(first, last + 1) if n not in fail_days
+        ]}
+
+    monkeypatch.setattr(itinerary_planner, "structured_completion", structured_completion)
+    return state
+
+
+def test_trip_dates():
+    assert trip_dates(make_trip("2026-03-30", "2026-04-02")) == ["2026-03-30", "2026-03-31", "2026-04-01", "2026-04-02"]
+    assert trip_dates(make_trip("2026-03-02", "2026-03-01")) is None
+    assert trip_dates(make_trip("soon", "later")) is None
+
+
+def test_long_trip_fans_out_in_chunks(monkeypatch):
+    monkeypatch.setattr(itinerary_planner.settings, "itinerary_chunk_days", 3)
+    monkeypatch.setattr(itinerary_planner.settings, "itinerary_fanout_concurrency", 2)
+    state = fake_llm(monkeypatch)
+
+    data = asyncio.run(generate_itinerary(make_trip()))
+
+    assert len(state["prompts"]) == 1 + 4  # skeleton + ceil(10 / 3) chunks
+    assert state["peak"] == 2
+    assert [day["day_number"] for day in data["days"]] == list(range(1, 11))
+    assert data["days"][9]["date"] == "2026-03-10"
+    assert data["days"][4]["theme"] == "Theme 5"
+    assert data["days"][4]["activities"][0]["id"] == "act_5_1"
+    assert data["total_estimated_cost"] == 100
+    assert data["notes"] == ["Skeleton"]
+
+
+def test_short_trip_skips_skeleton(monkeypatch):
+    monkeypatch.setattr(itinerary_planner.settings, "itinerary_chunk_days", 3)
+    state = fake_llm(monkeypatch)
+
+    data = asyncio.run(generate_itinerary(make_trip(end="2026-03-02")))
+
+    assert len(state["prompts"]) == 1
+    assert len(data["days"]) == 2
+
+
+def test_missing_days_are_retried_then_left_empty(monkeypatch):
+    monkeypatch.setattr(itinerary_planner.settings, "itinerary_chunk_days", 3)
+    state = fake_llm(monkeypatch, fail_days={5})
+
+    data = asyncio.run(generate_itinerary(make_trip()))
+
+    assert len(state["prompts"]) == 1 + 4 + 1  # the chunk holding day 5 is retried once
+    assert data["days"][4]["activities"] == [] and data["days"][4]["theme"] == "Theme 5"
+    assert data["days"][3]["activities"] and data["days"][5]["activities"]
+    assert data["total_estimated_cost"] == 90
+    assert "Day 5 could not be planned" in data["notes"][-1]
+    # The retry must not be answered from the cache
+    assert sorted(state["cached"]) == [False] + [True] * 5
+
+
+def test_regeneration_bypasses_the_cache(monkeypatch):
+    monkeypatch.setattr(itinerary_planner.settings, "itinerary_chunk_days", 3)
+    state = fake_llm(monkeypatch)
+
+    asyncio.run(generate_itinerary(make_trip(), cache=False))
+
+    assert state["cached"] and not any(state["cached"])
+
+
+def test_trip_without_destination_is_planned(monkeypatch):
+    monkeypatch.setattr(itinerary_planner.settings, "itinerary_chunk_days", 3)
+    fake_llm(monkeypatch)
+    trip = make_trip()
+    trip.destination = None
+
+    data = asyncio.run(generate_itinerary(trip))
+
+    assert data["destination"] == "" and len(data["days"]) == 10
+
+
+def test_single_call_keeps_only_complete_days(monkeypatch):
+    """Output repaired after truncation must not save a half-written day."""
+    complete = {
+        "day_number": 1, "date": "2026-03-01", "activities": [], "meals": [], "daily_cost": 40,
+    }
+
+    async def structured_completion(prompt, model, max_tokens, user_id=None, cache=True):
+        return {"destination": "Lisbon", "days": [complete, {"day_number": 2}]}
+
+    monkeypatch.setattr(agent_service, "structured_completion", structured_completion)
+    data = asyncio.run(generate_itinerary(make_trip("soon", "later")))
+
+    assert [day["day_number"] for day in data["days"]] == [1]
+    assert data["total_estimated_cost"] == 40 and data["start_date"] == "soon"
+
+
+def test_salvaged_itinerary_of_a_trip_without_destination_or_dates(monkeypatch):
+    complete = {"day_number": 1, "date": "", "activities": [], "meals": [], "daily_cost": 0}
+
+    async def structured_completion(prompt, model, max_tokens, user_id=None, cache=True):
+        return {"days": [complete, {"day_number": 2}], "notes": "not a list"}
+
+    monkeypatch.setattr(agent_service, "structured_completion", structured_completion)
+    trip = make_trip(None, None)
+    trip.destination = None
+    data = asyncio.run(generate_itinerary(trip))
+
+    assert (data["destination"], data["start_date"], data["end_date"]) == ("", "", "")
+    assert len(data["days"]) == 1 and data["notes"] == []
+
+
+def test_single_call_without_usable_days_falls_back_to_empty(monkeypatch):
+    async def structured_completion(prompt, model, max_tokens, user_id=None, cache=True):
+        return {"days": [{"day_number": 1}]}
+
+    monkeypatch.setattr(agent_service, "structured_completion", structured_completion)
+    data = asyncio.run(generate_itinerary(make_trip("soon", "later")))
+
+    assert data["days"] == [] and "Unable to generate" in data["notes"][0]
+
+
+def collect(stream):
+    async def run():
+        return [event async for event in stream]
+
+    return asyncio.run(run())
+
+
+def test_long_trip_streams_the_skeleton_then_each_chunk(monkeypatch):
+    monkeypatch.setattr(itinerary_planner.settings, "itinerary_chunk_days", 3)
+    fake_llm(monkeypatch)
+
+    events = collect(stream_itinerary(make_trip()))
+
+    assert [kind for kind, _ in events] == ["skeleton"] + ["chunk"] * 4 + ["complete"]
+    skeleton = events[0][1]
+    assert len(skeleton) == 10 and skeleton[4]["theme"] == "Theme 5" and skeleton[4]["activities"] == []
+    chunked = sorted(day["day_number"] for _, days in events[1:-1] for day in days)
+    assert chunked == list(range(1, 11))
+    itinerary = events[-1][1]
+    assert itinerary["days"][4]["activities"][0]["id"] == "act_5_1"
+    assert itinerary["total_estimated_cost"] == 100
+
+
+def test_short_trip_streams_from_a_single_validated_call(monkeypatch):
+    day = {"day_number": 1, "date": "2026-03-01", "activities": [], "meals": [], "daily_cost": 40}
+    document = json.dumps({"destination": "Lisbon", "days": [day, {"day_number": 2}], "total_estimated_cost": "lots"})
+
+    async def stream_chat_completion(**kwargs):
+        for start in range(0, len(document), 16):
+            delta = SimpleNamespace(content=document[start:start + 16])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+    monkeypatch.setattr(agent_service.travel_agent, "llm", SimpleNamespace(stream_chat_completion=stream_chat_completion))
+
+    events = collect(stream_itinerary(make_trip(end="2026-03-02")))
+
+    assert [kind for kind, _ in events] == ["day", "complete"]
+    itinerary = events[-1][1]
+    assert [day["day_number"] for day in itinerary["days"]] == [1]
+    assert itinerary["total_estimated_cost"] == 40 and itinerary["destination"] == "Lisbon"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,136 @@
+"""Unit tests for conditional requests on the itinerary routes."""
+import asyncio
+
+import pytest
+from sqlalchemy import event, update
+
+from app.api.routes import itinerary as itinerary_routes
+from app.services import itinerary_service
+from app.db.models import Itinerary
+from app.services.itinerary_history import record_created
+
+DATA = {
+    "destination": "Lisbon", "start_date": "2026-03-01", "end_date": "2026-03-02",
+    "days": [], "total_estimated_cost": 0, "notes": ["Pack light"],
+}
+ETAG = '"i1.1"'
+
+
+@pytest.fixture
+def api(client, sessionmaker):
+    async def seed():
+        async with sessionmaker() as db:
+            db.add(Itinerary(id="i1", trip_id="t1", data=DATA, version=1))
+            record_created(db, "i1", DATA, "u1")
+            await db.commit()
+
+    asyncio.run(seed())
+    return client
+
+
+def call(api, method, *, if_match=None, if_none_match=None, json=None):
+    headers = {}
+    if if_match:
+        headers["If-Match"] = if_match
+    if if_none_match:
+        headers["If-None-Match"] = if_none_match
+
+    async def run():
+        async with api() as client:
+            return await client.request(method, "/api/trips/t1/itinerary", headers=headers, json=json)
+
+    return asyncio.run(run())
+
+
+def put_body(note):
+    return {"data": {**DATA, "notes": [note]}}
+
+
+PATCH_BODY = [{"op": "replace", "path": "/notes", "value": ["Patched"]}]
+
+
+class TestConditionalGet:
+    def test_get_returns_the_version_etag(self, api):
+        response = call(api, "GET")
+        assert response.status_code == 200
+        assert response.headers["ETag"] == ETAG
+
+    @pytest.mark.parametrize("header", [ETAG, f"W/{ETAG}", f'"other", {ETAG}', "*"])
+    def test_matching_if_none_match_is_304(self, api, header):
+        response = call(api, "GET", if_none_match=header)
+        assert response.status_code == 304
+        assert response.headers["ETag"] == ETAG and not response.content
+
+    def test_stale_if_none_match_returns_the_document(self, api):
+        response = call(api, "GET", if_none_match='"i1.0"')
+        assert response.status_code == 200 and response.json()["version"] == 1
+
+
+class TestConditionalWrites:
+    def test_put_with_current_etag_succeeds(self, api):
+        response = call(api, "PUT", if_match=ETAG, json=put_body("New"))
+        assert response.status_code == 200
+        assert response.headers["ETag"] == '"i1.2"'
+        assert response.json()["data"]["notes"] == ["New"]
+
+    @pytest.mark.parametrize("method,body", [("PUT", put_body("New")), ("PATCH", PATCH_BODY)])
+    @pytest.mark.parametrize("header", ['"i1.0"', f"W/{ETAG}"])
+    def test_stale_or_weak_if_match_is_412(self, api, method, body, header):
+        response = call(api, method, if_match=header, json=body)
+        assert response.status_code == 412
+        assert response.headers["ETag"] == ETAG
+        assert call(api, "GET").json()["data"]["notes"] == ["Pack light"]
+
+    def test_patch_with_current_etag_succeeds(self, api):
+        response = call(api, "PATCH", if_match=ETAG, json=PATCH_BODY)
+        assert response.status_code == 200
+        assert response.json()["data"]["notes"] == ["Patched"]
+
+
+class TestCompareAndSet:
+    @pytest.fixture
+    def racing_write(self, api, sessionmaker, monkeypatch):
+        """Another writer bumps the version between the route's read and its update."""
+        save = itinerary_routes.save_itinerary_version
+
+        async def save_after_concurrent_write(db, itinerary, data, user_id=None, patch=None):
+            async with sessionmaker() as other:
+                await other.execute(update(Itinerary).where(Itinerary.id == "i1").values(version=2))
+                await other.commit()
+            return await save(db, itinerary, data, user_id, patch=patch)
+
+        monkeypatch.setattr(itinerary_routes, "save_itinerary_version", save_after_concurrent_write)
+        return api
+
+    @pytest.mark.parametrize("method,body", [("PUT", put_body("Lost")), ("PATCH", PATCH_BODY)])
+    def test_lost_race_without_if_match_is_409(self, racing_write, method, body):
+        assert call(racing_write, method, json=body).status_code == 409
+
+    def test_lost_race_with_if_match_is_412(self, racing_write):
+        assert call(racing_write, "PUT", if_match=ETAG, json=put_body("Lost")).status_code == 412
+
+
+@pytest.mark.parametrize("path", ["/api/trips/t1/itinerary", "/api/trips/t1/itinerary/regenerate"])
+def test_generation_does_not_hold_the_request_session(api, engine, monkeypatch, path):
+    connections, checked_out = [], []
+    event.listen(engine.sync_engine, "checkout", lambda *args: connections.append(1))
+    event.listen(engine.sync_engine, "checkin", lambda *args: connections.append(-1))
+
+    async def generate_itinerary(trip, preferences=None, cache=True):
+        checked_out.append(sum(connections))
+        return {**DATA, "notes": ["Generated"]}
+
+    monkeypatch.setattr(itinerary_service, "generate_itinerary", generate_itinerary)
+
+    async def run():
+        async with api() as client:
+            return await client.post(path)
+
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    assert response.json()["data"]["notes"] == ["Generated"]
+    assert checked_out == [0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
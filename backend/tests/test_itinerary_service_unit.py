@@ -0,0 +1,63 @@
+"""Unit tests for itinerary generation and saving."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import itinerary_service
+from app.services.itinerary_service import generate_and_save_itinerary, itinerary_generation_key
+
+
+def make_trip():
+    return SimpleNamespace(
+        id="t1", user_id="u1", destination="Lisbon", start_date="2026-03-01", end_date="2026-03-03",
+        travelers=2, budget=1000, currency="EUR", notes=None,
+    )
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def generated(monkeypatch):
+    calls = []
+
+    async def generate_itinerary(trip, preferences=None, cache=True):
+        calls.append(cache)
+        return {"days": []}
+
+    async def save_itinerary_data(db, trip_id, data, user_id=None):
+        return "i1"
+
+    monkeypatch.setattr(itinerary_service, "generate_itinerary", generate_itinerary)
+    monkeypatch.setattr(itinerary_service, "save_itinerary_data", save_itinerary_data)
+    monkeypatch.setattr(itinerary_service, "AsyncSessionLocal", FakeSession)
+    return calls
+
+
+def test_generation_reads_the_cache(generated):
+    assert asyncio.run(generate_and_save_itinerary(make_trip())) == "i1"
+    assert generated == [True]
+
+
+def test_regeneration_bypasses_the_cache(generated):
+    asyncio.run(generate_and_save_itinerary(make_trip(), {"pace": "slow"}, regenerate=True))
+    assert generated == [False]
+
+
+def test_regeneration_does_not_join_a_plain_generation():
+    trip = make_trip()
+    assert itinerary_generation_key(trip) != itinerary_generation_key(trip, regenerate=True)
+    assert itinerary_generation_key(trip, {"a": 1}) == itinerary_generation_key(trip, {"a": 1})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,214 @@
+"""Unit tests for the background job queue and the job routes."""
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.db.models import GenerationJob
+from app.services import itinerary_service, job_queue as job_queue_module
+from app.services.job_queue import JobQueue, job_queue
+
+
+@pytest.fixture
+def sessionmaker(sessionmaker, monkeypatch):
+    monkeypatch.setattr(job_queue_module, "AsyncSessionLocal", sessionmaker)
+    return sessionmaker
+
+
+async def wait_for_status(sessionmaker, job_id, *statuses):
+    for _ in range(200):
+        async with sessionmaker() as db:
+            job = (await db.execute(select(GenerationJob).where(GenerationJob.id == job_id))).scalar_one()
+        if job.status in statuses:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job stayed {job.status}")
+
+
+def test_submitted_job_runs_and_reports_progress(sessionmaker):
+    queue = JobQueue(workers=1, max_size=5)
+
+    async def handler(job, report):
+        await report(50, "Halfway")
+        return "r1"
+
+    queue.register("echo", handler)
+
+    async def run():
+        await queue.start()
+        try:
+            job = await queue.submit("echo", user_id="u1", trip_id="t1")
+            events = queue.subscribe(job.id)
+            done = await wait_for_status(sessionmaker, job.id, "succeeded")
+            seen = [events.get_nowait() for _ in range(events.qsize())]
+            return job, done, seen
+        finally:
+            await queue.stop()
+
+    job, done, seen = asyncio.run(run())
+    assert job.worker_id == queue.worker_id and job.status == "queued"
+    assert done.progress == 100 and done.result_id == "r1" and done.finished_at is not None
+    assert [event.status for event in seen][-1] == "succeeded"
+
+
+def test_failing_handler_marks_the_job_failed(sessionmaker):
+    queue = JobQueue(workers=1, max_size=5)
+
+    async def handler(job, report):
+        raise RuntimeError("model unavailable")
+
+    queue.register("boom", handler)
+
+    async def run():
+        await queue.start()
+        try:
+            job = await queue.submit("boom", user_id="u1")
+            return await wait_for_status(sessionmaker, job.id, "failed")
+        finally:
+            await queue.stop()
+
+    failed = asyncio.run(run())
+    assert failed.error == "model unavailable" and failed.finished_at is not None
+
+
+def test_concurrent_submits_never_overfill_the_queue(sessionmaker):
+    queue = JobQueue(workers=0, max_size=2)
+    queue.register("echo", lambda job, report: None)
+
+    async def run():
+        await queue.start()
+        results = await asyncio.gather(
+            *(queue.submit("echo", user_id="u1") for _ in range(5)), return_exceptions=True
+        )
+        async with sessionmaker() as db:
+            rows = (await db.execute(select(GenerationJob))).scalars().all()
+        await queue.stop()
+        return results, rows, queue._queue.qsize()
+
+    results, rows, queued = asyncio.run(run())
+    assert sum(isinstance(result, asyncio.QueueFull) for result in results) == 3
+    assert len(rows) == queued == 2
+
+
+def test_submit_before_start_is_rejected(sessionmaker):
+    queue = JobQueue(workers=1, max_size=5)
+    queue.register("echo", lambda job, report: None)
+    with pytest.raises(asyncio.QueueFull):
+        asyncio.run(queue.submit("echo", user_id="u1"))
+
+
+def test_startup_fails_only_stale_jobs_of_other_workers(sessionmaker):
+    queue = JobQueue(workers=0, max_size=5, stale_seconds=60)
+    now = datetime.now(timezone.utc)
+    rows = {
+        "live": GenerationJob(user_id="u1", kind="echo", status="running", worker_id="other", heartbeat_at=now),
+        "stale": GenerationJob(user_id="u1", kind="echo", status="running", worker_id="other",
+                               heartbeat_at=now - timedelta(minutes=5)),
+        "legacy": GenerationJob(user_id="u1", kind="echo", status="queued"),
+        "done": GenerationJob(user_id="u1", kind="echo", status="succeeded", worker_id="other",
+                              heartbeat_at=now - timedelta(minutes=5)),
+    }
+
+    async def run():
+        async with sessionmaker() as db:
+            db.add_all(rows.values())
+            await db.commit()
+        await queue.start()
+        await queue.stop()
+        async with sessionmaker() as db:
+            jobs = (await db.execute(select(GenerationJob))).scalars().all()
+        return {job.id: job.status for job in jobs}
+
+    statuses = asyncio.run(run())
+    assert {name: statuses[row.id] for name, row in rows.items()} == {
+        "live": "running", "stale": "failed", "legacy": "failed", "done": "succeeded",
+    }
+
+
+def test_heartbeat_keeps_own_jobs_alive(sessionmaker):
+    queue = JobQueue(workers=0, max_size=5)
+    queue.register("echo", lambda job, report: None)
+    old = datetime.now(timezone.utc) - timedelta(minutes=5)
+
+    async def run():
+        await queue.start()
+        job = await queue.submit("echo", user_id="u1")
+        async with sessionmaker() as db:
+            row = (await db.execute(select(GenerationJob).where(GenerationJob.id == job.id))).scalar_one()
+            row.heartbeat_at = old
+            await db.commit()
+        await queue._touch_jobs()
+        await queue._fail_stale_jobs()
+        await queue.stop()
+        return await wait_for_status(sessionmaker, job.id, "queued")
+
+    job = asyncio.run(run())
+    assert job.heartbeat_at.replace(tzinfo=timezone.utc) > old
+
+
+@pytest.fixture
+def started_queue(client, monkeypatch):
+    """The app's job queue, with itinerary generation stubbed out."""
+    async def generate_itinerary(trip, preferences=None, cache=True):
+        return {"days": [], "notes": ["Stubbed"]}
+
+    monkeypatch.setattr(itinerary_service, "generate_itinerary", generate_itinerary)
+    monkeypatch.setattr(job_queue, "_queue", None)
+    return client
+
+
+def parse_events(body: str):
+    return [
+        json.loads(line[len("data: "):])
+        for line in body.splitlines() if line.startswith("data: ")
+    ]
+
+
+def test_background_generation_streams_job_events(started_queue):
+    async def run():
+        await job_queue.start()
+        try:
+            async with started_queue() as api:
+                accepted = await api.post("/api/trips/t1/itinerary", params={"background": "true"})
+                job_id = accepted.json()["id"]
+                events = await api.get(f"/api/jobs/{job_id}/events")
+                job = await api.get(f"/api/jobs/{job_id}")
+                itinerary = await api.get("/api/trips/t1/itinerary")
+                missing = await api.get("/api/jobs/nope/events")
+            return accepted, events, job, itinerary, missing
+        finally:
+            await job_queue.stop()
+
+    accepted, events, job, itinerary, missing = asyncio.run(run())
+    assert accepted.status_code == 202
+    assert accepted.headers["Location"] == f"/api/jobs/{accepted.json()['id']}"
+    assert events.headers["content-type"].startswith("text/event-stream")
+    parsed = parse_events(events.text)
+    assert parsed[-1]["status"] == "succeeded" and parsed[-1]["result_id"]
+    assert job.json()["status"] == "succeeded"
+    assert itinerary.json()["id"] == parsed[-1]["result_id"]
+    assert missing.status_code == 404
+
+
+def test_background_generation_answers_503_when_the_queue_is_full(started_queue, monkeypatch):
+    monkeypatch.setattr(job_queue, "max_size", 1)
+    monkeypatch.setattr(job_queue, "workers", 0)
+
+    async def run():
+        await job_queue.start()
+        try:
+            job_queue._queue.put_nowait("placeholder")
+            async with started_queue() as api:
+                return await api.post("/api/trips/t1/itinerary", params={"background": "true"})
+        finally:
+            await job_queue.stop()
+
+    response = asyncio.run(run())
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,50 @@
+"""Unit tests for the RFC 6902 JSON Patch implementation."""
+import pytest
+
+from app.utils.json_patch import JsonPatchError, JsonPatchTestFailed, apply_patch, diff_documents, parse_pointer
+
+
+class TestJsonPatch:
+    def test_operations(self):
+        document = {"a": {"b": [1, 2, 3]}, "c": "x"}
+        result = apply_patch(document, [
+            {"op": "add", "path": "/a/b/-", "value": 4},
+            {"op": "remove", "path": "/a/b/0"},
+            {"op": "replace", "path": "/c", "value": "y"},
+            {"op": "move", "from": "/a/b/0", "path": "/moved"},
+            {"op": "copy", "from": "/c", "path": "/a/c"},
+            {"op": "test", "path": "/a/b", "value": [3, 4]},
+        ])
+        assert result == {"a": {"b": [3, 4], "c": "y"}, "c": "y", "moved": 2}
+        assert document == {"a": {"b": [1, 2, 3]}, "c": "x"}
+
+    def test_pointer_escapes(self):
+        assert parse_pointer("/a~1b/c~0d") == ["a/b", "c~d"]
+        assert parse_pointer("") == []
+
+    def test_errors_leave_document_untouched(self):
+        document = {"a": [1]}
+        with pytest.raises(JsonPatchError):
+            apply_patch(document, [{"op": "add", "path": "/a/-", "value": 2}, {"op": "remove", "path": "/missing"}])
+        with pytest.raises(JsonPatchError):
+            apply_patch(document, [{"op": "add", "path": "/a/5", "value": 2}])
+        with pytest.raises(JsonPatchTestFailed):
+            apply_patch(document, [{"op": "test", "path": "/a", "value": [2]}])
+        with pytest.raises(JsonPatchError):
+            apply_patch(document, [{"op": "move", "from": "/a", "path": "/a/0"}])
+        assert document == {"a": [1]}
+
+
+class TestDiff:
+    def test_diff_round_trips(self):
+        source = {"a": [1, 2, {"b": 1}], "c/d": {"e": "x"}, "gone": 1, "n": 1}
+        target = {"a": [1, {"b": 2}], "c/d": {"e": 1}, "new": [None], "n": 1.0}
+        patch = diff_documents(source, target)
+        assert apply_patch(source, patch) == target
+        assert {"op": "replace", "path": "/c~1d/e", "value": 1} in patch
+        assert not any(op["path"] == "/n" for op in patch)
+        assert diff_documents(source, source) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
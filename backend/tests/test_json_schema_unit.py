@@ -0,0 +1,61 @@
+"""Unit tests for structured-output schemas derived from Pydantic models."""
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from app.models.itinerary import ItineraryData
+from app.models.trip import DestinationRecommendation
+from app.utils.json_schema import response_format_for, strict_json_schema
+
+
+def objects(node):
+    if isinstance(node, dict):
+        if "properties" in node:
+            yield node
+        for value in node.values():
+            yield from objects(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from objects(value)
+
+
+@pytest.mark.parametrize("model", [ItineraryData, DestinationRecommendation])
+def test_generation_models_are_strict(model):
+    schema, strict = strict_json_schema(model)
+    assert strict
+    for node in objects(schema):
+        assert node["additionalProperties"] is False
+        assert node["required"] == list(node["properties"])
+        assert "title" not in node
+
+
+def test_optional_fields_stay_nullable_and_free_form_ones_are_dropped():
+    schema, _ = strict_json_schema(ItineraryData)
+    location = schema["$defs"]["Location"]
+    assert "coordinates" not in location["properties"]
+    assert {"type": "null"} in location["properties"]["address"]["anyOf"]
+    assert "default" not in location["properties"]["address"]
+
+
+def test_required_free_form_field_is_not_strict():
+    class Loose(BaseModel):
+        name: str
+        extra: dict
+        maybe: Optional[List[int]] = None
+
+    schema, strict = strict_json_schema(Loose)
+    assert not strict
+    assert schema["required"] == ["name", "extra", "maybe"]
+
+
+def test_response_format():
+    response_format = response_format_for(ItineraryData)
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["name"] == "ItineraryData"
+    assert response_format["json_schema"]["strict"] is True
+    assert response_format_for(ItineraryData) is response_format
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
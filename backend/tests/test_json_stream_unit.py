@@ -0,0 +1,83 @@
+"""Unit tests for incremental parsing of streamed itinerary JSON."""
+import json
+
+import pytest
+
+from app.utils.json_stream import JSONArrayItemStream, repair_json
+
+DOCUMENT = {
+    "destination": "Tokyo",
+    "notes": ["Bring cash {not a brace}", 'Say "hi"'],
+    "days": [
+        {"day_number": 1, "theme": "Arrival [day]", "activities": [{"id": "act_1"}]},
+        {"day_number": 2, "theme": "Temples", "activities": []},
+    ],
+    "total_estimated_cost": 300,
+}
+
+
+def feed_in_chunks(parser, text, size):
+    items = []
+    for i in range(0, len(text), size):
+        items.extend(parser.feed(text[i:i + size]))
+    return items
+
+
+class TestJSONArrayItemStream:
+    @pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+    def test_yields_each_day_once(self, chunk_size):
+        parser = JSONArrayItemStream("days")
+        text = "```json\n" + json.dumps(DOCUMENT, indent=2) + "\n```"
+
+        items = feed_in_chunks(parser, text, chunk_size)
+
+        assert items == DOCUMENT["days"]
+        assert parser.document() == DOCUMENT
+
+    def test_day_is_emitted_before_document_finishes(self):
+        parser = JSONArrayItemStream("days")
+        text = json.dumps(DOCUMENT)
+        cut = text.index('{"day_number": 2')
+
+        assert parser.feed(text[:cut]) == [DOCUMENT["days"][0]]
+        assert parser.document() is None
+
+    def test_ignores_arrays_under_other_keys(self):
+        parser = JSONArrayItemStream("days")
+        items = parser.feed(json.dumps({"other": [{"a": 1}], "days": [{"b": 2}]}))
+        assert items == [{"b": 2}]
+
+    def test_truncated_output_keeps_completed_items(self):
+        parser = JSONArrayItemStream("days")
+        text = json.dumps(DOCUMENT)
+        items = parser.feed(text[:text.index('"Temples"')])
+
+        assert items == [DOCUMENT["days"][0]]
+        assert parser.document() is None
+
+
+
+class TestRepairJson:
+    def test_complete_document_parses_as_is(self):
+        text = "```json\n" + json.dumps(DOCUMENT) + "\n```"
+        assert repair_json(text) == DOCUMENT
+
+    def test_truncated_document_keeps_complete_values(self):
+        text = json.dumps(DOCUMENT)
+        cut = text.index('"Temples"') + 4
+        repaired = repair_json(text[:cut])
+        assert repaired["destination"] == "Tokyo"
+        assert repaired["notes"] == DOCUMENT["notes"]
+        assert repaired["days"][0] == DOCUMENT["days"][0]
+        assert repaired["days"][1] == {"day_number": 2}
+
+    def test_truncated_inside_string_with_brackets(self):
+        assert repair_json('{"a": [1, 2], "b": "x, ] }') == {"a": [1, 2]}
+
+    def test_nothing_parseable(self):
+        assert repair_json("no json here") is None
+        assert repair_json('{"a": 1,,} trailing') is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
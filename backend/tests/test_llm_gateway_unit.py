@@ -0,0 +1,102 @@
+"""Unit tests for the shared LLM gateway (limits and retries)."""
+import asyncio
+import time
+
+import httpx
+import pytest
+from openai import APIConnectionError, BadRequestError, RateLimitError
+
+from app.services.llm_gateway import LLMGateway, LLMUnavailableError, TokenBucket, is_retryable
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def rate_limit_error(retry_after=None):
+    headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+    response = httpx.Response(429, request=REQUEST, headers=headers)
+    return RateLimitError("Rate limit reached", response=response, body=None)
+
+
+def make_gateway(**kwargs):
+    options = {"api_key": "test", "retry_base_seconds": 0.001, "retry_max_seconds": 0.01}
+    options.update(kwargs)
+    return LLMGateway(**options)
+
+
+class TestRetry:
+    def test_retries_rate_limits_then_succeeds(self):
+        gateway = make_gateway()
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise rate_limit_error()
+            return "ok"
+
+        assert asyncio.run(gateway._with_retry(call)) == "ok"
+        assert len(attempts) == 3
+
+    def test_gives_up_after_max_retries(self):
+        gateway = make_gateway(max_retries=2)
+
+        async def call():
+            raise APIConnectionError(request=REQUEST)
+
+        with pytest.raises(LLMUnavailableError):
+            asyncio.run(gateway._with_retry(call))
+
+    def test_respects_deadline(self):
+        gateway = make_gateway(retry_deadline_seconds=0.5)
+
+        async def call():
+            raise rate_limit_error(retry_after=5)
+
+        started = time.monotonic()
+        with pytest.raises(LLMUnavailableError) as info:
+            asyncio.run(gateway._with_retry(call))
+        assert time.monotonic() - started < 0.5
+        assert info.value.retry_after >= 5
+
+    def test_client_errors_are_not_retried(self):
+        response = httpx.Response(400, request=REQUEST)
+        error = BadRequestError("bad request", response=response, body=None)
+        assert not is_retryable(error)
+        assert is_retryable(rate_limit_error())
+
+
+class TestConcurrencyLimits:
+    def test_per_user_concurrency(self):
+        gateway = make_gateway(max_concurrency=10, per_user_concurrency=1)
+        active = {"now": 0, "peak": 0}
+
+        async def call():
+            async with gateway._limits("user-1", {}):
+                active["now"] += 1
+                active["peak"] = max(active["peak"], active["now"])
+                await asyncio.sleep(0.01)
+                active["now"] -= 1
+
+        async def run():
+            await asyncio.gather(*(call() for _ in range(4)))
+
+        asyncio.run(run())
+        assert active["peak"] == 1
+        assert gateway._user_semaphores == {}
+
+
+class TestTokenBucket:
+    def test_waits_when_empty(self):
+        bucket = TokenBucket(rate_per_minute=600, capacity=1)  # 10 per second
+
+        async def run():
+            started = time.monotonic()
+            await bucket.acquire(1)
+            await bucket.acquire(1)
+            return time.monotonic() - started
+
+        assert asyncio.run(run()) >= 0.09
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
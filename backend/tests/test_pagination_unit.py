@@ -0,0 +1,93 @@
+"""Unit tests for keyset pagination and sparse fieldsets."""
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.database import Base
+from app.db.models import Trip, User
+from app.models.trip import TripResponse
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    after_cursor,
+    column_fields,
+    decode_cursor,
+    encode_cursor,
+    page_response,
+    parse_fields,
+)
+
+
+class TestCursor:
+    def test_round_trip(self):
+        value = datetime(2026, 1, 2, 3, 4, 5)
+        assert decode_cursor(encode_cursor(value, "abc")) == (value, "abc")
+
+    def test_invalid_cursor_is_400(self):
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor("not a cursor")
+        assert exc.value.status_code == 400
+
+
+class TestFields:
+    def test_projection_keeps_id_and_model_order(self):
+        allowed = column_fields(Trip, TripResponse)
+        assert "notes" in allowed
+        expected = [name for name in allowed if name in ("id", "name", "destination")]
+        assert parse_fields("destination, name", allowed) == expected
+        assert parse_fields(None, allowed) is None
+
+    def test_unknown_field_is_400(self):
+        with pytest.raises(HTTPException) as exc:
+            parse_fields("name,password", column_fields(Trip, TripResponse))
+        assert exc.value.status_code == 400
+
+
+class TestKeyset:
+    def test_pages_cover_rows_with_equal_timestamps(self, tmp_path):
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+        stamp = datetime(2026, 1, 1, 12, 0, 0)
+
+        async def run():
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                db.add(User(id="u1", email="u1@example.com", name="U"))
+                for i in range(7):
+                    db.add(Trip(id=f"t{i}", user_id="u1", name=f"T{i}", updated_at=stamp if i < 4 else datetime(2026, 1, i)))
+                await db.commit()
+
+                seen, cursor = [], None
+                while True:
+                    query = select(Trip).order_by(Trip.updated_at.desc(), Trip.id.desc())
+                    if cursor:
+                        query = query.where(after_cursor(Trip, Trip.updated_at, cursor, descending=True))
+                    rows = (await db.execute(query.limit(3))).scalars().all()
+                    response = page_response(rows, 2, "updated_at", TripResponse)
+                    seen += [trip["id"] for trip in json.loads(response.body)]
+                    cursor = response.headers.get(NEXT_CURSOR_HEADER)
+                    if not cursor:
+                        break
+            await engine.dispose()
+            return seen
+
+        seen = asyncio.run(run())
+        assert seen == ["t6", "t5", "t4", "t3", "t2", "t1", "t0"]
+
+
+def test_cursor_and_etag_headers_are_exposed_to_cross_origin_clients(client):
+    async def run():
+        async with client() as api:
+            return await api.get("/api/trips", params={"limit": 1}, headers={"Origin": "http://app.example"})
+
+    response = asyncio.run(run())
+    exposed = {value.strip() for value in response.headers["access-control-expose-headers"].split(",")}
+    assert {NEXT_CURSOR_HEADER, "ETag"} <= exposed
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
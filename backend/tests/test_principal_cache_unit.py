@@ -0,0 +1,46 @@
+"""Unit tests for the authenticated principal cache."""
+import time
+
+import pytest
+
+from app.models.user import AuthPrincipal
+from app.services.principal_cache import PrincipalCache
+
+
+def principal(user_id: str) -> AuthPrincipal:
+    return AuthPrincipal(id=user_id, email=f"{user_id}@example.com")
+
+
+class TestPrincipalCache:
+    def test_hit_and_invalidate(self):
+        cache = PrincipalCache(ttl_seconds=60, max_entries=10)
+        cache.set(principal("u1"))
+        assert cache.get("u1").email == "u1@example.com"
+        cache.invalidate("u1")
+        assert cache.get("u1") is None
+        assert cache.stats() == {"entries": 0, "hits": 1, "misses": 1}
+
+    def test_lru_bound(self):
+        cache = PrincipalCache(ttl_seconds=60, max_entries=2)
+        cache.set(principal("u1"))
+        cache.set(principal("u2"))
+        cache.get("u1")
+        cache.set(principal("u3"))
+        assert cache.get("u2") is None
+        assert cache.get("u1") is not None
+
+    def test_expired_entries_miss(self, monkeypatch):
+        cache = PrincipalCache(ttl_seconds=1, max_entries=10)
+        cache.set(principal("u1"))
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 2)
+        assert cache.get("u1") is None
+
+    def test_disabled_with_zero_ttl(self):
+        cache = PrincipalCache(ttl_seconds=0, max_entries=10)
+        cache.set(principal("u1"))
+        assert cache.get("u1") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
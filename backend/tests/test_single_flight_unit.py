@@ -0,0 +1,76 @@
+"""Unit tests for single-flight deduplication of concurrent work."""
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_run(self):
+        flights = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "itinerary-1"
+
+        async def run():
+            return await asyncio.gather(*(flights.do("trip-1", work) for _ in range(5)))
+
+        assert asyncio.run(run()) == ["itinerary-1"] * 5
+        assert len(calls) == 1
+        assert len(flights) == 0
+
+    def test_different_keys_run_separately(self):
+        flights = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0)
+            return len(calls)
+
+        async def run():
+            return await asyncio.gather(flights.do("a", work), flights.do("b", work))
+
+        asyncio.run(run())
+        assert len(calls) == 2
+
+    def test_key_is_released_after_completion(self):
+        flights = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            return len(calls)
+
+        async def run():
+            first = await flights.do("trip-1", work)
+            second = await flights.do("trip-1", work)
+            return first, second
+
+        assert asyncio.run(run()) == (1, 2)
+
+    def test_errors_propagate_to_every_caller(self):
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0)
+            raise RuntimeError("LLM unavailable")
+
+        async def run():
+            return await asyncio.gather(
+                flights.do("trip-1", work),
+                flights.do("trip-1", work),
+                return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert len(flights) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
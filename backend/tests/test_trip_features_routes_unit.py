@@ -0,0 +1,98 @@
+"""Unit tests for the batched packing item PATCH route."""
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from app.api.routes import trip_features
+from app.db.models import PackingItem, Trip, User
+
+
+@pytest.fixture
+def api(client, sessionmaker):
+    """u1 owns t1 with p1 (Docs/Passport) and p2 (Gear/Charger); u2 owns t2 with p3."""
+    async def seed():
+        async with sessionmaker() as db:
+            db.add(User(id="u2", email="u2@example.com", name="V"))
+            db.add(Trip(id="t2", user_id="u2", name="Other trip"))
+            db.add_all([
+                PackingItem(id="p1", trip_id="t1", category="Docs", item="Passport"),
+                PackingItem(id="p2", trip_id="t1", category="Gear", item="Charger"),
+                PackingItem(id="p3", trip_id="t2", category="Docs", item="Passport"),
+            ])
+            await db.commit()
+
+    asyncio.run(seed())
+    return client
+
+
+def patch(api, trip_id, changes):
+    async def run():
+        async with api() as client:
+            return await client.patch(f"/api/trips/{trip_id}/packing", json=changes)
+
+    return asyncio.run(run())
+
+
+def stored(sessionmaker):
+    async def run():
+        async with sessionmaker() as db:
+            items = (await db.execute(select(PackingItem))).scalars().all()
+        return {item.id: item for item in items}
+
+    return asyncio.run(run())
+
+
+def test_partial_updates_are_merged_and_only_changed_rows_returned(api, sessionmaker):
+    response = patch(api, "t1", [
+        {"id": "p1", "packed": True},
+        {"id": "p2", "quantity": 1},  # already 1: not a change
+        {"id": "p1", "notes": "In the blue bag", "packed": False},
+        {"id": "p1", "packed": True},
+    ])
+
+    assert response.status_code == 200
+    assert response.json() == [{
+        "id": "p1", "trip_id": "t1", "category": "Docs", "item": "Passport",
+        "packed": True, "quantity": 1, "notes": "In the blue bag",
+    }]
+    items = stored(sessionmaker)
+    assert items["p1"].packed and items["p1"].notes == "In the blue bag"
+    assert items["p2"].packed is False and items["p2"].notes is None
+
+
+def test_unknown_item_is_404_and_nothing_is_written(api, sessionmaker):
+    response = patch(api, "t1", [{"id": "p1", "packed": True}, {"id": "nope", "packed": True}])
+
+    assert response.status_code == 404
+    assert stored(sessionmaker)["p1"].packed is False
+
+
+@pytest.mark.parametrize("trip_id,item_id", [("t2", "p3"), ("t1", "p3"), ("missing", "p1")])
+def test_items_of_other_users_or_trips_are_404(api, sessionmaker, trip_id, item_id):
+    response = patch(api, trip_id, [{"id": item_id, "packed": True}])
+
+    assert response.status_code == 404
+    assert not any(item.packed for item in stored(sessionmaker).values())
+
+
+def test_renaming_onto_an_existing_item_is_409(api):
+    response = patch(api, "t1", [{"id": "p2", "category": "Docs", "item": "Passport"}])
+    assert response.status_code == 409
+
+
+def test_empty_batch_changes_nothing(api):
+    response = patch(api, "t1", [])
+    assert response.status_code == 200 and response.json() == []
+
+
+def test_oversized_batch_is_413_and_nothing_is_written(api, sessionmaker, monkeypatch):
+    monkeypatch.setattr(trip_features.settings, "packing_patch_max_items", 2)
+    response = patch(api, "t1", [{"id": "p1", "packed": True}] * 3)
+
+    assert response.status_code == 413
+    assert stored(sessionmaker)["p1"].packed is False
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,129 @@
+"""Unit tests for set-based packing item and todo writes."""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import PackingItem
+from app.services.trip_access import insert_for_owned_trip, owned_child, owned_children
+from app.services.trip_features_service import (
+    apply_updates,
+    insert_packing_items,
+    insert_todos,
+    todo_completion_updates,
+)
+
+
+def count_statements(engine):
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+class TestInsert:
+    def test_packing_items_skip_existing_and_duplicate_pairs(self, engine):
+        async def run():
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                first = await insert_packing_items(db, "t1", "u1", [
+                    {"category": "Docs", "item": "Passport"},
+                    {"category": "Docs", "item": "Visa"},
+                ])
+                await db.commit()
+                assert [i.item for i in first] == ["Passport", "Visa"]
+
+                statements = count_statements(engine)
+                second = await insert_packing_items(db, "t1", "u1", [
+                    {"category": "Docs", "item": "Passport"},
+                    {"category": "Gear", "item": "Passport"},
+                    {"category": "Gear", "item": "Passport"},
+                ])
+                await db.commit()
+                assert [(i.category, i.item) for i in second] == [("Gear", "Passport")]
+                # One lookup and one INSERT ... RETURNING, whatever the number of rows
+                assert len([s for s in statements if not s.startswith(("BEGIN", "COMMIT"))]) == 2
+
+        asyncio.run(run())
+
+    def test_todos_skip_existing_titles(self, engine):
+        async def run():
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                await insert_todos(db, "t1", "u1", [{"title": "Book flights", "priority": 2}])
+                created = await insert_todos(db, "t1", "u1", [{"title": "Book flights"}, {"title": "Pack"}])
+                await db.commit()
+                assert [t.title for t in created] == ["Pack"]
+
+        asyncio.run(run())
+
+
+class TestUpdate:
+    def test_one_update_per_field_set(self, engine):
+        async def run():
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                items = await insert_packing_items(db, "t1", "u1", [
+                    {"category": "Docs", "item": name} for name in ("A", "B", "C")
+                ])
+                await db.commit()
+                ids = [i.id for i in items]
+
+                statements = count_statements(engine)
+                await apply_updates(db, PackingItem, [
+                    {"id": ids[0], "packed": True},
+                    {"id": ids[1], "packed": True},
+                    {"id": ids[2], "quantity": 4},
+                ])
+                await db.commit()
+                assert len([s for s in statements if s.startswith("UPDATE")]) == 2
+
+                rows = (await db.execute(
+                    select(PackingItem.item, PackingItem.packed, PackingItem.quantity)
+                    .order_by(PackingItem.item)
+                )).all()
+                assert [tuple(r) for r in rows] == [("A", True, 1), ("B", True, 1), ("C", False, 4)]
+
+        asyncio.run(run())
+
+    def test_todo_completion_timestamps(self):
+        stamped = todo_completion_updates(
+            [{"id": "a", "completed": True}, {"id": "b", "completed": True}, {"id": "c", "completed": False}],
+            {"a": False, "b": True, "c": True},
+        )
+        assert stamped[0]["completed_at"] is not None
+        assert "completed_at" not in stamped[1]
+        assert stamped[2]["completed_at"] is None
+
+
+class TestTripAccess:
+    def test_missing_trip_and_empty_children_are_told_apart(self, engine):
+        async def run():
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                statements = count_statements(engine)
+                assert await owned_children(db, PackingItem, "t1", "u1") == []
+                assert len(statements) == 1
+                with pytest.raises(HTTPException) as missing:
+                    await owned_children(db, PackingItem, "t1", "someone-else")
+                assert missing.value.detail == "Trip not found"
+                with pytest.raises(HTTPException) as no_child:
+                    await owned_child(db, PackingItem, "t1", "u1", PackingItem.id == "x", detail="Packing item not found")
+                assert no_child.value.detail == "Packing item not found"
+
+        asyncio.run(run())
+
+    def test_insert_is_guarded_by_ownership(self, engine):
+        async def run():
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                item = await insert_for_owned_trip(db, PackingItem, "t1", "u1", {"category": "Docs", "item": "Visa"})
+                await db.commit()
+                assert item.packed is False and item.quantity == 1
+                with pytest.raises(HTTPException):
+                    await insert_for_owned_trip(db, PackingItem, "t1", "u2", {"category": "Docs", "item": "Map"})
+                children = await owned_children(db, PackingItem, "t1", "u1")
+                assert [c.item for c in children] == ["Visa"]
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
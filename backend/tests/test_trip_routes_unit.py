@@ -0,0 +1,143 @@
+"""Unit tests for the trip list and trip dashboard routes."""
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from app.db.models import BudgetEstimate, Itinerary, PackingItem, Trip, TripTodo
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+DATA = {
+    "destination": "Lisbon", "start_date": "2026-03-01", "end_date": "2026-03-02",
+    "days": [], "total_estimated_cost": 0, "notes": [],
+}
+CHILDREN = {"itinerary", "budget_estimate", "packing_items", "todos"}
+
+
+@pytest.fixture
+def api(client, sessionmaker):
+    """t1 with an itinerary, a budget estimate, a packing item and a todo."""
+    async def seed():
+        async with sessionmaker() as db:
+            db.add_all([
+                Itinerary(id="i1", trip_id="t1", data=DATA, version=1),
+                BudgetEstimate(id="b1", trip_id="t1", breakdown={"food": 100}, total_likely=100),
+                PackingItem(id="p1", trip_id="t1", category="Docs", item="Passport"),
+                TripTodo(id="d1", trip_id="t1", title="Book hotel"),
+            ])
+            await db.commit()
+
+    asyncio.run(seed())
+    return client
+
+
+def request(api, method, path, headers=None, **kwargs):
+    async def run():
+        async with api() as client:
+            return await client.request(method, path, headers=headers, **kwargs)
+
+    return asyncio.run(run())
+
+
+class TestTripFull:
+    def test_returns_every_child_by_default(self, api):
+        response = request(api, "GET", "/api/trips/t1/full")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert CHILDREN <= body.keys()
+        assert body["itinerary"]["id"] == "i1" and body["budget_estimate"]["total_likely"] == 100
+        assert [item["id"] for item in body["packing_items"]] == ["p1"]
+        assert [todo["id"] for todo in body["todos"]] == ["d1"]
+
+    @pytest.mark.parametrize("include,expected", [
+        ("budget,packing", {"budget_estimate", "packing_items"}),
+        ("budget_estimate, packing_items", {"budget_estimate", "packing_items"}),
+        ("itinerary,todos,todos", {"itinerary", "todos"}),
+    ])
+    def test_include_names_and_aliases(self, api, include, expected):
+        response = request(api, "GET", "/api/trips/t1/full", params={"include": include})
+
+        assert response.status_code == 200
+        assert CHILDREN & response.json().keys() == expected
+
+    def test_unknown_include_is_400(self, api):
+        response = request(api, "GET", "/api/trips/t1/full", params={"include": "packing,weather"})
+
+        assert response.status_code == 400
+        assert "weather" in response.json()["detail"]
+
+    def test_matching_if_none_match_is_304(self, api):
+        etag = request(api, "GET", "/api/trips/t1/full").headers["ETag"]
+
+        response = request(api, "GET", "/api/trips/t1/full", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag and not response.content
+
+    def test_etag_changes_after_a_child_edit(self, api):
+        etag = request(api, "GET", "/api/trips/t1/full").headers["ETag"]
+
+        edited = request(api, "PUT", "/api/trips/t1/packing/p1", json={"packed": True})
+        response = request(api, "GET", "/api/trips/t1/full", headers={"If-None-Match": etag})
+
+        assert edited.status_code == 200
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.json()["packing_items"][0]["packed"] is True
+
+    def test_missing_trip_is_404(self, api):
+        assert request(api, "GET", "/api/trips/nope/full").status_code == 404
+
+
+class TestListTrips:
+    @pytest.fixture
+    def trips(self, client, sessionmaker):
+        """t1 (updated now), t3 and t2, most recently updated first."""
+        async def seed():
+            async with sessionmaker() as db:
+                db.add_all([
+                    Trip(id="t2", user_id="u1", name="Older", updated_at=datetime(2026, 1, 1, tzinfo=timezone.utc)),
+                    Trip(id="t3", user_id="u1", name="Newer", updated_at=datetime(2026, 2, 1, tzinfo=timezone.utc)),
+                ])
+                await db.commit()
+
+        asyncio.run(seed())
+        return client
+
+    def test_walks_pages_with_the_next_cursor(self, trips):
+        first = request(trips, "GET", "/api/trips", params={"limit": 2})
+        cursor = first.headers[NEXT_CURSOR_HEADER]
+        second = request(trips, "GET", "/api/trips", params={"limit": 2, "cursor": cursor})
+
+        assert [trip["id"] for trip in first.json()] == ["t1", "t3"]
+        assert [trip["id"] for trip in second.json()] == ["t2"]
+        assert NEXT_CURSOR_HEADER not in second.headers
+
+    def test_without_limit_returns_every_trip(self, trips):
+        response = request(trips, "GET", "/api/trips")
+
+        assert [trip["id"] for trip in response.json()] == ["t1", "t3", "t2"]
+        assert NEXT_CURSOR_HEADER not in response.headers
+
+    def test_fields_returns_only_those_columns_and_id(self, trips):
+        response = request(trips, "GET", "/api/trips", params={"fields": "name,status"})
+
+        assert response.status_code == 200
+        assert response.json() == [
+            {"id": "t1", "name": "Trip", "status": "draft"},
+            {"id": "t3", "name": "Newer", "status": "draft"},
+            {"id": "t2", "name": "Older", "status": "draft"},
+        ]
+
+    @pytest.mark.parametrize("params", [
+        {"fields": "name,password"},
+        {"cursor": "not-a-cursor"},
+        {"limit": 2, "cursor": "WyJub3QgYSBkYXRlIiwgInQxIl0"},  # ["not a date", "t1"]
+    ])
+    def test_unknown_field_or_malformed_cursor_is_400(self, trips, params):
+        assert request(trips, "GET", "/api/trips", params=params).status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])